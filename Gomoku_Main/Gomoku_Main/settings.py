@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -118,3 +119,75 @@ CORS_ALLOW_METHODS = [
     "DELETE",
 ]
 
+# 开局库文件, 由 python -m MCTS.GomokuOpening 离线生成, 文件不存在时不使用开局库
+OPENING_BOOK_PATH = BASE_DIR / 'MCTS' / 'opening_book.json.gz'
+
+# 对局状态存储: 最多保存capacity局, 超过ttl秒没有访问的对局被淘汰
+# 多个工作进程部署时将cache设置为CACHES中共享的缓存(例如文件缓存), 任一进程都可以处理任一对局
+GOMOKU_GAME_STORE = {
+    'capacity': 1000,
+    'ttl': 3600,
+    'cache': None,
+}
+
+# 异步计算AI落子的进程池大小, 以及结束的任务保留的时间(秒)
+GOMOKU_AI_JOBS = {
+    'workers': 2,
+    'ttl': 600,
+}
+
+# 对局设置(settings接口)中搜索参数的上限, 超过时按上限设置
+GOMOKU_SEARCH_LIMITS = {
+    'max_workers': None,  # 并行搜索的进程数, None为CPU核数
+    'max_simulations': 100000,
+    'max_simulation_depth': 1000,
+    'max_time_budget': 60,  # 每步思考时间(秒)
+    'max_node_budget': 1000000,
+    'max_batch_size': 256,
+    'max_rollout_vcf_nodes': 10000,
+    'max_ponder_time': 60,  # 每次后台思考的时间(秒)
+}
+
+# 跨对局的搜索结果缓存: 内存中最多capacity个局面; path设置为SQLite文件路径(例如BASE_DIR / 'search_cache.sqlite3')时
+# 同时保存到文件中, 多个工作进程(包括异步任务的进程)共用, 文件中最多disk_capacity个局面
+GOMOKU_SEARCH_CACHE = {
+    'capacity': 10000,
+    'path': None,
+    'disk_capacity': 100000,
+}
+
+# 对局记录: 关闭后不写入数据库; 缓冲的落子达到batch_size或每隔flush_interval秒批量写入
+GOMOKU_RECORDER = {
+    'enabled': True,
+    'batch_size': 200,
+    'flush_interval': 5,
+}
+
+# 批量分析局面(analyze接口)的进程数、每次请求的局面数量上限、每个局面的预算和搜索参数的上限、每次请求的总预算上限
+GOMOKU_ANALYSIS = {
+    'workers': 2,
+    'max_positions': 10000,
+    'max_simulations': 20000,
+    'max_time_budget': 10,
+    'max_node_budget': 200000,
+    'max_simulation_depth': 1000,
+    'max_ucb_c': 10,
+    'max_total_simulations': 1000000,  # 每次请求所有局面的模拟次数之和
+    'max_total_time': 600,  # 每次请求所有局面的时间预算之和(秒)
+}
+
+# 日志: 搜索引擎(MCTS)和接口(gomoku)的日志级别可以通过环境变量调整, 设为DEBUG时输出每次模拟
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'MCTS': {'handlers': ['console'], 'level': os.environ.get('GOMOKU_MCTS_LOG_LEVEL', 'WARNING')},
+        'gomoku': {'handlers': ['console'], 'level': os.environ.get('GOMOKU_LOG_LEVEL', 'INFO')},
+    },
+}
@@ -0,0 +1,135 @@
+import time
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from MCTS.GomokuEnv import GomokuGame
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+
+# 分析时搜索树的默认参数, 可以被settings覆盖
+DEFAULT_SETTINGS = {
+    'SIMULATION_TIMES': 500,
+    'SIMULATION_DEPTH': 1000,
+    'ONLY_NEARBY': True,
+    'TRANSPOSITION': True,
+}
+# 每个进程最多同时提交的局面数量
+IN_FLIGHT_PER_WORKER = 2
+
+# 批量分析专用的进程池, 按进程数缓存, 与对局中根并行搜索的进程池(get_process_pool)分开, 分析不会占满对局的进程池
+_ANALYSIS_POOLS = {}
+
+
+def get_analysis_pool(workers):
+    if workers not in _ANALYSIS_POOLS:
+        _ANALYSIS_POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _ANALYSIS_POOLS[workers]
+
+
+def load_position(position):
+    """
+    根据局面字典还原棋盘, board为二维列表, current_player省略时按双方棋子数推断(黑先)
+    局面不合法时抛出ValueError
+    """
+    if not isinstance(position.get('board'), list):
+        raise ValueError('board必须是二维列表')
+    try:
+        board = np.array(position['board'], dtype=int)
+    except (TypeError, ValueError):
+        raise ValueError('board必须是整数组成的二维列表')
+    if board.ndim != 2 or board.shape[0] != board.shape[1] or board.shape[0] < 5:
+        raise ValueError('棋盘必须是边长不小于5的正方形')
+    if not np.isin(board, (0, 1, 2)).all():
+        raise ValueError('棋盘只能包含0、1、2')
+    black, white = int(np.count_nonzero(board == 1)), int(np.count_nonzero(board == 2))
+    current_player = position.get('current_player', 1 if black == white else 2)
+    if current_player not in (1, 2):
+        raise ValueError('current_player只能是1或2')
+    game = GomokuGame(board.shape[0])
+    game.set(board=board, size=board.shape[0], current_player=current_player)
+    for x, y in np.argwhere(board != 0):
+        if game.check_win(x, y):
+            raise ValueError('局面已经分出胜负')
+    if black + white == board.size:
+        raise ValueError('棋盘已满')
+    return game
+
+
+def analyze(position, settings=None, top_k=5, seed=None):
+    """
+    用MCTS分析一个局面, 不修改任何共享状态, 可以在工作进程中运行
+    position中的simulations、time_budget(秒)、node_budget为该局面的搜索预算, 省略时使用settings
+
+    返回:
+        {'best_move', 'value', 'visits', 'simulations', 'elapsed'}, value为最佳落子的胜率(当前玩家视角),
+        visits为访问次数最多的top_k个落子[{'move', 'visits', 'value'}]
+    """
+    if seed is not None:
+        random.seed(seed)
+    game = load_position(position)
+    tree = MCTSTree(MCTSNode(BitboardGame.from_game(game)))
+    for key, value in {**DEFAULT_SETTINGS, **(settings or {})}.items():
+        setattr(tree, key, value)
+    # 批量分析本身已经在进程池中并行, 每个局面只用单进程搜索
+    tree.WORKERS = 1
+    if position.get('simulations') is not None:
+        tree.SIMULATION_TIMES = int(position['simulations'])
+    if position.get('time_budget') is not None:
+        tree.TIME_BUDGET = float(position['time_budget'])
+    if position.get('node_budget') is not None:
+        tree.NODE_BUDGET = int(position['node_budget'])
+
+    root = tree.root_node
+    start_time = time.perf_counter()
+    best_move = tree.model()[1]
+    elapsed = time.perf_counter() - start_time
+
+    children = sorted(root.children, key=lambda node: node.visits, reverse=True)
+    best = next(child for child in children if child.move[1] == best_move)
+    return {
+        'best_move': [int(best_move[0]), int(best_move[1])],
+        'value': best.wins / best.visits if best.visits > 0 else None,
+        'visits': [{'move': [int(child.move[1][0]), int(child.move[1][1])], 'visits': int(child.visits),
+                    'value': child.wins / child.visits if child.visits > 0 else None}
+                   for child in children[:top_k]],
+        'simulations': tree.simulation_count,
+        'elapsed': elapsed,
+    }
+
+
+def analyze_batch(positions, settings=None, top_k=5, workers=2, seed=None):
+    """
+    在专用的进程池中并行分析多个局面, 按完成的先后依次产生结果
+    每个结果包括局面在positions中的下标index和局面的id(如果有), 分析失败时包括error, 不影响其他局面
+    同时提交的局面不超过workers * IN_FLIGHT_PER_WORKER个, 一个局面完成后再提交下一个
+
+    生成器被提前关闭时(例如客户端断开)取消尚未开始的局面
+    """
+    pool = get_analysis_pool(workers)
+    pending = iter(enumerate(positions))
+    futures = {}
+
+    def submit():
+        for index, position in pending:
+            position_seed = seed + index if seed is not None else None
+            futures[pool.submit(analyze, position, settings, top_k, position_seed)] = index
+            if len(futures) >= workers * IN_FLIGHT_PER_WORKER:
+                break
+
+    try:
+        submit()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures.pop(future)
+                position = positions[index]
+                result = {'index': index, 'id': position.get('id') if isinstance(position, dict) else None}
+                try:
+                    result.update(future.result())
+                except Exception as e:
+                    result['error'] = str(e) or type(e).__name__
+                yield result
+            submit()
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,518 @@
+import random
+import time
+import logging
+import multiprocessing
+from contextlib import nullcontext
+from multiprocessing import shared_memory
+import numpy as np
+from MCTS.GomokuEnv import FRONTIER_RADIUS
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import rollout
+from MCTS.GomokuRule import ThreatIndex
+from MCTS.GomokuEvaluate import evaluate, EVAL_SCALE
+from MCTS.GomokuBatchRollout import batch_rollout
+from MCTS.GomokuStats import SearchStats
+
+logger = logging.getLogger(__name__)
+
+# 每个节点的字段及类型, 子节点在数组中连续存放
+NODE_FIELDS = [
+    ('parent', np.int32),  # 父节点编号, 根节点为-1
+    ('move', np.int32),  # 到达该节点的落子 x * size + y, 根节点为-1
+    ('first_child', np.int32),  # 第一个子节点的编号
+    ('child_count', np.int32),  # 子节点数量, 0表示未扩展
+    ('visits', np.int64),
+    ('wins', np.float64),
+    ('virtual_loss', np.int32),  # 正在进行中的模拟经过该节点的次数
+    ('winner', np.int8),  # 模拟得到的胜利者, 0为没有胜利者, 与MCTSNode.if_winner含义相同
+]
+
+
+class NodeStore:
+    """
+    数组形式的搜索树存储(struct of arrays), 每个字段为一个NumPy数组, 节点用数组下标表示
+    每个节点只占用NODE_FIELDS中各字段共37字节, 容量不足时自动扩容
+    shared为True时所有数组位于同一块共享内存中, 可以在多个进程之间共享同一棵树, 此时容量固定
+    """
+
+    def __init__(self, capacity, shared=False, name=None):
+        self.capacity = capacity
+        self.shared = shared
+        # 各字段按8字节对齐依次排列, 最前面是记录已分配节点数的计数器
+        offsets = {}
+        nbytes = 8
+        for field, dtype in NODE_FIELDS:
+            offsets[field] = nbytes
+            nbytes += (capacity * np.dtype(dtype).itemsize + 7) // 8 * 8
+        if shared:
+            self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=nbytes)
+            buffer = self.shm.buf
+        else:
+            self.shm = None
+            buffer = bytearray(nbytes)
+        self.counter = np.ndarray((1,), dtype=np.int64, buffer=buffer, offset=0)
+        for field, dtype in NODE_FIELDS:
+            setattr(self, field, np.ndarray((capacity,), dtype=dtype, buffer=buffer, offset=offsets[field]))
+        if name is None:
+            self.counter[0] = 0
+
+    def __getstate__(self):
+        # 只有共享内存中的树可以传给其他进程, 子进程按名称重新挂载
+        if not self.shared:
+            raise TypeError("只有shared=True的NodeStore可以在进程之间传递")
+        return {'capacity': self.capacity, 'name': self.shm.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['capacity'], shared=True, name=state['name'])
+
+    def __len__(self):
+        return int(self.counter[0])
+
+    def grow(self, capacity):
+        """将容量扩大到capacity, 只用于非共享内存的树"""
+        grown = NodeStore(capacity)
+        count = len(self)
+        grown.counter[0] = count
+        for field, _ in NODE_FIELDS:
+            getattr(grown, field)[:count] = getattr(self, field)[:count]
+        self.__dict__.update(grown.__dict__)
+
+    def allocate(self, count, parent=-1):
+        """分配count个连续的新节点, 返回第一个节点的编号, 共享内存的树容量不足时返回-1"""
+        start = int(self.counter[0])
+        if start + count > self.capacity:
+            if self.shared:
+                return -1
+            self.grow(max(self.capacity * 2, start + count))
+        end = start + count
+        self.parent[start:end] = parent
+        self.move[start:end] = -1
+        self.first_child[start:end] = -1
+        self.child_count[start:end] = 0
+        self.visits[start:end] = 0
+        self.wins[start:end] = 0
+        self.virtual_loss[start:end] = 0
+        self.winner[start:end] = 0
+        self.counter[0] = end
+        return start
+
+    def children(self, node):
+        start = self.first_child[node]
+        return range(start, start + self.child_count[node])
+
+    def subtree(self, root, capacity=None, shared=False):
+        """
+        将以root为根的子树复制到新的NodeStore中并按广度优先顺序重新编号, 新树的根节点编号为0
+        用于切换根节点后丢弃其余分支, 以及在普通内存和共享内存之间转换
+
+        参数:
+            root: 子树根节点的编号
+            capacity: 新树的容量, 默认为子树的节点数
+            shared: 新树是否位于共享内存中
+        """
+        # 逐层收集子树中的节点, 同一父节点的子节点在下一层中仍然连续
+        levels = [np.array([root], dtype=np.int64)]
+        while True:
+            level = levels[-1]
+            counts = self.child_count[level].astype(np.int64)
+            total = int(counts.sum())
+            if total == 0:
+                break
+            offsets = np.repeat(np.cumsum(counts) - counts, counts)
+            levels.append(np.repeat(self.first_child[level].astype(np.int64), counts) + np.arange(total) - offsets)
+        order = np.concatenate(levels)
+        count = len(order)
+
+        result = NodeStore(max(capacity or count, count), shared=shared)
+        result.allocate(count)
+        new_ids = np.full(len(self), -1, dtype=np.int32)
+        new_ids[order] = np.arange(count, dtype=np.int32)
+        result.parent[:count] = new_ids[self.parent[order]]
+        result.parent[0] = -1
+        result.move[:count] = self.move[order]
+        child_count = self.child_count[order]
+        result.first_child[:count] = np.where(child_count > 0, new_ids[self.first_child[order]], -1)
+        result.child_count[:count] = child_count
+        result.visits[:count] = self.visits[order]
+        result.wins[:count] = self.wins[order]
+        result.winner[:count] = self.winner[order]
+        return result
+
+    def close(self):
+        """释放共享内存, 由创建共享内存的进程调用"""
+        if self.shm is not None:
+            # 先释放引用共享内存的数组, 否则无法关闭
+            self.counter = None
+            for field, _ in NODE_FIELDS:
+                setattr(self, field, None)
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+def tree_search_worker(tree, store, lock, simulation_times, seed, time_budget=None, node_budget=None):
+    """树并行搜索的工作进程: 与其他进程共享store中的同一棵树"""
+    random.seed(seed)
+    tree.search(store, lock, simulation_times, time_budget, node_budget)
+
+
+class ArrayMCTSTree:
+    """
+    节点保存在NodeStore数组中的MCTS, 算法与MCTSTree相同, 可以代替MCTSNode组成的树
+    节点不保存棋盘, 每次迭代从根节点的位棋盘沿选择路径依次落子还原出叶子节点的状态, 模拟结束后再悔棋回到根节点
+    WORKERS大于1时使用树并行: 多个进程共享位于共享内存中的同一棵树,
+    选择时对路径上的节点施加虚拟损失使其他进程倾向于选择别的分支, 回溯时撤销
+    BATCH_SIZE大于1时每次借助虚拟损失选出多个叶子节点, 用batch_rollout一起模拟
+    """
+
+    def __init__(self, state):
+        self.SIMULATION_DEPTH = 1000
+        self.SIMULATION_TIMES = 100
+        self.ONLY_NEARBY: bool = False
+        self.NEARBY_RADIUS = FRONTIER_RADIUS  # 与MCTSTree.NEARBY_RADIUS相同
+        self.UCB_C = np.log(2)  # 与MCTSTree.UCB_C相同
+        self.WORKERS = 1  # 大于1时使用多进程树并行搜索
+        self.VIRTUAL_LOSS = 1  # 每个进行中的模拟对路径上节点增加的虚拟访问次数
+        self.NODE_CAPACITY = 2000000  # 树并行时共享内存中的节点数量上限
+        self.BATCH_SIZE = 1  # 大于1时每次选出多个叶子节点一起模拟
+        self.ROLLOUT_VCF_NODES = 0  # 与MCTSTree.ROLLOUT_VCF_NODES相同, 批量模拟时不使用
+        self.ROLLOUT_CUTOFF = None  # 与MCTSTree.ROLLOUT_CUTOFF相同, 批量模拟时不使用
+        self.EVAL_SCALE = EVAL_SCALE
+        self.PROGRESS_INTERVAL = 50  # 与MCTSTree.PROGRESS_INTERVAL相同
+        self.progress_callback = None
+        # 与MCTSTree.INSTRUMENT相同. 选择和扩展在descend中一起进行, 耗时都计入selection; 批量模拟和树并行时不记录各阶段耗时
+        self.INSTRUMENT: bool = False
+        self.stats: SearchStats = None
+        self.TIME_BUDGET = None  # 与MCTSTree.TIME_BUDGET相同
+        self.NODE_BUDGET = None  # 与MCTSTree.NODE_BUDGET相同
+        self.simulation_count = 0  # 上一次搜索实际完成的模拟次数
+        self.last_statistics = None  # 与MCTSTree.last_statistics相同
+        # 搜索在位棋盘上进行, 需要make_move/unmake_move
+        self.state = state if isinstance(state, BitboardGame) else BitboardGame.from_game(state)
+        self.player = self.state.current_player
+        self.store: NodeStore = None  # 首次搜索时创建
+
+    def __getstate__(self):
+        # 树并行时树通过共享内存传给工作进程, 不随对象传递
+        state = self.__dict__.copy()
+        state['store'] = None
+        state['progress_callback'] = None
+        return state
+
+    def select_child(self, store, node, ucb_c=np.log(2)):
+        """
+        计算node所有子节点的UCB值(虚拟损失计入访问次数但不计入胜利次数), 返回最大的子节点, 没有正的UCB值时返回-1
+        """
+        children = slice(store.first_child[node], store.first_child[node] + store.child_count[node])
+        n = store.visits[children] + store.virtual_loss[children]
+        parent_n = store.visits[node] + store.virtual_loss[node]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            uct_values = np.where(n == 0, 99999,
+                                  store.wins[children] / n + ucb_c * np.sqrt(2 * np.log(parent_n) / n))
+        best = int(np.argmax(uct_values))
+        if uct_values[best] <= 0:
+            return -1
+        return children.start + best
+
+    def descend(self, store):
+        """
+        选择并扩展: 从根节点按UCB下降到叶子节点并在位棋盘上依次落子, 需要时扩展叶子节点并随机进入一个子节点
+        返回 (叶子节点编号, 落子次数)
+        """
+        node = 0
+        depth = 0
+        # 选择
+        while store.child_count[node] > 0:
+            child = self.select_child(store, node, self.UCB_C)
+            if child < 0:
+                break
+            node = child
+            self.state.make_move(divmod(int(store.move[node]), self.state.size))
+            depth += 1
+        # 扩展
+        if store.child_count[node] == 0 and store.winner[node] == 0 and not self.state.game_over:
+            if self.ONLY_NEARBY:
+                actions = self.state.get_nearby_points(n=self.NEARBY_RADIUS)
+            else:
+                actions = self.state.get_empty_points()
+            start = store.allocate(len(actions), parent=node)
+            if start >= 0:
+                store.move[start:start + len(actions)] = [x * self.state.size + y for x, y in actions]
+                store.first_child[node] = start
+                store.child_count[node] = len(actions)
+                node = start + random.randrange(len(actions))
+                self.state.make_move(divmod(int(store.move[node]), self.state.size))
+                depth += 1
+        return node, depth
+
+    def backpropagation(self, store, node, winner, virtual_loss, value=None):
+        """与MCTSTree.backpropagation相同, 同时撤销选择时施加的虚拟损失"""
+        while node >= 0:
+            store.visits[node] += 1
+            store.virtual_loss[node] -= virtual_loss
+            if winner is not None:
+                if winner != 0 and winner == self.player:
+                    store.wins[node] += 1
+            elif value is not None:
+                store.wins[node] += value
+            else:
+                store.wins[node] += 0.1
+            node = store.parent[node]
+
+    def search(self, store, lock, simulation_times, time_budget=None, node_budget=None, stats: SearchStats = None):
+        """
+        迭代simulation_times次, 或用完time_budget秒, 或新建了node_budget个节点, 与MCTSTree.search相同
+        选择、扩展和回溯在锁内修改树, 耗时最多的模拟在锁外进行. 树并行时节点预算由所有进程共同使用
+
+        返回:
+            实际完成的模拟次数
+        """
+        virtual_loss = self.VIRTUAL_LOSS if self.WORKERS > 1 or self.BATCH_SIZE > 1 else 0
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        node_limit = len(store) + node_budget if node_budget is not None else None
+        next_progress = self.PROGRESS_INTERVAL
+        i = 0
+        while simulation_times is None or i < simulation_times:
+            if i > 0 and deadline is not None and time.monotonic() >= deadline:
+                break
+            if i > 0 and node_limit is not None and len(store) >= node_limit:
+                break
+            if self.progress_callback is not None and i >= next_progress:
+                next_progress = i + self.PROGRESS_INTERVAL
+                if self.progress_callback(self, i) is False:
+                    break
+            if self.BATCH_SIZE > 1:
+                count = self.BATCH_SIZE if simulation_times is None else min(self.BATCH_SIZE, simulation_times - i)
+                i += self.batch_search(store, lock, count, virtual_loss)
+                continue
+            start = time.perf_counter() if stats is not None else None
+            with lock:
+                node, depth = self.descend(store)
+                path_node = node
+                while path_node >= 0:
+                    store.virtual_loss[path_node] += virtual_loss
+                    path_node = store.parent[path_node]
+            selected = time.perf_counter() if stats is not None else None
+            # 模拟, 截断的模拟没有分出胜负时用静态评估
+            value = None
+            if store.winner[node] != 0:
+                winner = int(store.winner[node])
+            else:
+                if self.ROLLOUT_CUTOFF is None:
+                    winner, steps = rollout(self.state, self.SIMULATION_DEPTH, vcf_nodes=self.ROLLOUT_VCF_NODES,
+                                            stats=stats)
+                else:
+                    threat_index = ThreatIndex(self.state)
+                    winner, steps = rollout(self.state, min(self.ROLLOUT_CUTOFF, self.SIMULATION_DEPTH),
+                                            vcf_nodes=self.ROLLOUT_VCF_NODES, stats=stats, threat_index=threat_index)
+                    if winner is None and not self.state.game_over:
+                        value = evaluate(threat_index, self.player, self.EVAL_SCALE)
+                for _ in range(steps):
+                    self.state.unmake_move()
+                if winner is not None:
+                    store.winner[node] = winner
+            simulated = time.perf_counter() if stats is not None else None
+            with lock:
+                self.backpropagation(store, node, winner, virtual_loss, value)
+            if stats is not None:
+                stats.add_phases(selected - start, 0.0, simulated - selected, time.perf_counter() - simulated)
+            for _ in range(depth):
+                self.state.unmake_move()
+            i += 1
+        return i
+
+    def batch_search(self, store, lock, count, virtual_loss):
+        """
+        选出count个叶子节点并对路径施加虚拟损失, 记录各叶子节点的棋盘后悔棋回到根节点,
+        再用batch_rollout同时模拟所有叶子节点, 最后依次回溯
+
+        返回:
+            完成的模拟次数, 即count
+        """
+        size = self.state.size
+        leaves = []
+        boards = np.zeros((count, size, size), dtype=np.int8)
+        players = np.zeros(count, dtype=np.int8)
+        winners = np.zeros(count, dtype=np.int8)
+        finished = np.zeros(count, dtype=bool)
+        simulated = np.ones(count, dtype=bool)  # 叶子节点没有已知的胜利者, 需要记录模拟结果
+        with lock:
+            for k in range(count):
+                node, depth = self.descend(store)
+                leaves.append(node)
+                path_node = node
+                while path_node >= 0:
+                    store.virtual_loss[path_node] += virtual_loss
+                    path_node = store.parent[path_node]
+                if store.winner[node] != 0:
+                    winners[k] = store.winner[node]
+                    finished[k] = True
+                    simulated[k] = False
+                else:
+                    boards[k] = self.state.board
+                    players[k] = self.state.current_player
+                    winners[k] = self.state.winner or 0
+                    finished[k] = self.state.game_over
+                for _ in range(depth):
+                    self.state.unmake_move()
+        # 模拟
+        winners = batch_rollout(boards, players, self.SIMULATION_DEPTH, np.random.default_rng(random.randrange(2 ** 32)),
+                                winners=winners, finished=finished)
+        with lock:
+            for k, node in enumerate(leaves):
+                winner = int(winners[k]) if winners[k] != 0 else None
+                if winner is not None and simulated[k]:
+                    store.winner[node] = winner
+                self.backpropagation(store, node, winner, virtual_loss)
+        return count
+
+    def ponder(self, stop_event, time_budget=None, node_budget=None, interval=10):
+        """
+        与MCTSTree.ponder相同, 胜利次数按创建树时的玩家self.player统计
+
+        返回:
+            完成的模拟次数
+        """
+        if self.store is None or stop_event.is_set() or self.state.game_over:
+            return 0
+        progress_callback, progress_interval = self.progress_callback, self.PROGRESS_INTERVAL
+        self.progress_callback = lambda tree, i: not stop_event.is_set()
+        self.PROGRESS_INTERVAL = interval
+        try:
+            return self.search(self.store, nullcontext(), None, time_budget, node_budget)
+        finally:
+            self.progress_callback, self.PROGRESS_INTERVAL = progress_callback, progress_interval
+
+    def parallel_search(self, simulation_times, time_budget=None, node_budget=None):
+        """
+        树并行搜索: 将当前树复制到共享内存中, WORKERS个进程共享这棵树各分担simulation_times中的一份, 结束后复制回普通内存
+        分配共享内存失败、启动进程失败或有工作进程异常退出时丢弃共享的树, 记录日志后改用单进程搜索
+
+        返回:
+            所有进程完成的模拟次数之和
+        """
+        cells = self.state.size * self.state.size
+        if node_budget is not None:
+            # 每个进程在检查预算前最多再扩展一个节点的全部子节点
+            needed = node_budget + self.WORKERS * cells
+        elif simulation_times is not None:
+            needed = simulation_times * cells
+        else:
+            needed = self.NODE_CAPACITY
+        capacity = max(min(len(self.store) + needed, self.NODE_CAPACITY), len(self.store))
+        root_visits = int(self.store.visits[0])
+        try:
+            shared = self.store.subtree(0, capacity=capacity, shared=True)
+        except OSError:
+            logger.exception("分配共享内存失败, 改用单进程搜索")
+            return self.search(self.store, nullcontext(), simulation_times, time_budget, node_budget)
+        processes = []
+        failed = False
+        try:
+            lock = multiprocessing.Lock()
+            worker_times = -(-simulation_times // self.WORKERS) if simulation_times is not None else None
+            processes = [multiprocessing.Process(target=tree_search_worker,
+                                                 args=(self, shared, lock, worker_times, random.randrange(2 ** 32),
+                                                       time_budget, node_budget))
+                         for _ in range(self.WORKERS)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            exitcodes = [process.exitcode for process in processes if process.exitcode != 0]
+            if len(exitcodes) > 0:
+                logger.error("树并行搜索的工作进程异常退出(退出码%s), 丢弃其结果, 改用单进程搜索", exitcodes)
+                failed = True
+            else:
+                self.store = shared.subtree(0)
+        except Exception:
+            # 创建锁、创建或启动进程时失败, 此时可能还没有任何进程
+            logger.exception("启动树并行搜索的工作进程失败, 改用单进程搜索")
+            failed = True
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+        finally:
+            shared.close()
+        if failed:
+            return self.search(self.store, nullcontext(), simulation_times, time_budget, node_budget)
+        return int(self.store.visits[0]) - root_visits
+
+    def model(self, print_simulation_result=False):
+        """
+        搜索并返回最优行动, 格式与MCTSTree.model相同, 为(player, action). 最优子节点的子树保留为新的根节点
+        """
+        if self.store is None:
+            self.store = NodeStore(1024)
+            self.store.allocate(1)
+        # 有时间预算时迭代到时间用完为止, 否则复用的子树中子节点已有的访问次数计入模拟次数
+        if self.TIME_BUDGET is not None:
+            simulation_times = None
+        else:
+            children = self.store.children(0)
+            reused_visits = int(self.store.visits[children.start:children.stop].sum())
+            simulation_times = max(self.SIMULATION_TIMES - reused_visits, 1)
+        self.stats = SearchStats() if self.INSTRUMENT else None
+        start_time = time.perf_counter()
+        node_count = len(self.store)
+        if self.WORKERS > 1:
+            self.simulation_count = self.parallel_search(simulation_times, self.TIME_BUDGET, self.NODE_BUDGET)
+        else:
+            self.simulation_count = self.search(self.store, nullcontext(), simulation_times,
+                                                self.TIME_BUDGET, self.NODE_BUDGET, self.stats)
+
+        store = self.store
+        if self.stats is not None:
+            self.stats.finish(self.simulation_count, time.perf_counter() - start_time, len(store) - node_count,
+                              len(store))
+        if print_simulation_result:
+            for child in store.children(0):
+                logger.info('访问次数%s 胜利次数%s 节点对应行动%s', store.visits[child], store.wins[child],
+                            divmod(int(store.move[child]), self.state.size))
+
+        # 选择忽略探索的最优子节点, 所有子节点都没有胜利次数时选择访问次数最多的
+        best = self.select_child(store, 0, ucb_c=0)
+        if best < 0:
+            children = store.children(0)
+            best = children.start + int(np.argmax(store.visits[children.start:children.stop]))
+        move = (self.state.current_player, divmod(int(store.move[best]), self.state.size))
+        self.last_statistics = self.root_statistics()
+        # 设置最优子节点为根节点
+        self.set_root(best)
+        return move
+
+    def root_statistics(self):
+        """与MCTSTree.root_statistics相同"""
+        store = self.store
+        if store is None:
+            return []
+        return [(divmod(int(store.move[child]), self.state.size), int(store.visits[child]), float(store.wins[child]))
+                for child in store.children(0)]
+
+    def set_root(self, node):
+        """
+        在根节点的位棋盘上执行node对应的落子, 并只保留node的子树作为新的树
+        """
+        self.state.make_move(divmod(int(self.store.move[node]), self.state.size))
+        self.store = self.store.subtree(node)
+        # 模拟得到的胜利者只是一次模拟的结果, 作为根节点时需要继续扩展
+        if not self.state.game_over:
+            self.store.winner[0] = 0
+
+    def advance(self, action, state):
+        """
+        对手执行action后推进根节点, 与MCTSTree.advance相同
+
+        返回:
+            是否复用了已有的子树
+        """
+        if self.store is not None:
+            move = action[0] * self.state.size + action[1]
+            for child in self.store.children(0):
+                if self.store.move[child] == move:
+                    self.set_root(child)
+                    return True
+        self.state = state if isinstance(state, BitboardGame) else BitboardGame.from_game(state)
+        self.store = None
+        return False
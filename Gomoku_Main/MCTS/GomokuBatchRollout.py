@@ -0,0 +1,99 @@
+import numpy as np
+
+# 横 竖 斜 反斜 四个方向
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+# 落子优先级, 对应RuleStrategy的规则1到规则4, 0为规则5
+WIN, BLOCK_FIVE, MAKE_FOUR, BLOCK_FOUR = 4, 3, 2, 1
+
+
+def window_slices(size, dx, dy, length=5):
+    """
+    返回方向(dx, dy)上所有长度为length的窗口第t格组成的切片, 共length个
+    对棋盘取第t个切片得到的数组中, 下标(i, j)为以(i, j)为起点的窗口的第t格
+    """
+    rows = size - (length - 1) * dx
+    cols = size - (length - 1) * abs(dy)
+    col_start = (length - 1) if dy < 0 else 0
+    return [(slice(None), slice(t * dx, t * dx + rows), slice(col_start + t * dy, col_start + t * dy + cols))
+            for t in range(length)]
+
+
+# 窗口内我方棋子记为1, 对方棋子记为RIVAL, 窗口之和对应的落子优先级
+RIVAL = 6
+PRIORITY_TABLE = np.zeros(5 * RIVAL + 1, dtype=np.int8)
+PRIORITY_TABLE[4] = WIN
+PRIORITY_TABLE[4 * RIVAL] = BLOCK_FIVE
+PRIORITY_TABLE[3] = MAKE_FOUR
+PRIORITY_TABLE[3 * RIVAL] = BLOCK_FOUR
+
+
+def cell_priority(boards, players, slices_list):
+    """
+    计算每局每个空位的落子优先级, 向量化近似RuleStrategy的规则1到4:
+    窗口内只有一方的棋子时, 我方4子(落子成五)、对方4子(堵五)、我方3子(成四)、对方3子(堵四)的优先级依次降低,
+    每个空位取经过它的所有窗口中最高的优先级
+    """
+    player = players[:, None, None]
+    values = np.where(boards == player, 1, np.where(boards == 0, 0, RIVAL)).astype(np.int8)
+    priority = np.zeros(boards.shape, dtype=np.int8)
+    for slices in slices_list:
+        sums = values[slices[0]].copy()
+        for s in slices[1:]:
+            sums += values[s]
+        window_priority = PRIORITY_TABLE[sums]
+        for s in slices:
+            np.maximum(priority[s], window_priority, out=priority[s])
+    return priority
+
+
+def batch_rollout(boards, players, simulation_depth, rng, winners=None, finished=None):
+    """
+    同时模拟K局对局, 直到每局结束或达到simulation_depth步
+    每步对所有未结束的对局一起计算落子优先级: 有规则1到4的落子点时在最高优先级的点中等概率选择,
+    否则与RuleStrategy.rule5相同, 按到棋盘中心曼哈顿距离加1的倒数为权重随机选择空位
+    落子优先级为WIN的点即为成五的点, 因此不需要另外检测五连
+
+    参数:
+        boards: (K, size, size)的棋盘, 0为空位, 会被直接修改
+        players: 每局当前落子的玩家
+        simulation_depth: 每局最多的落子次数
+        rng: numpy.random.Generator
+        winners: 每局已有的胜利者, 0为没有
+        finished: 每局是否已经结束, 已结束的对局不再模拟
+
+    返回:
+        每局的胜利者, 0为平局或没有分出胜负
+    """
+    count, size, _ = boards.shape
+    players = np.array(players, dtype=np.int8)
+    winners = np.zeros(count, dtype=np.int8) if winners is None else np.array(winners, dtype=np.int8)
+    active = np.ones(count, dtype=bool) if finished is None else ~np.asarray(finished, dtype=bool)
+    active &= winners == 0
+    slices_list = [window_slices(size, dx, dy) for dx, dy in DIRECTIONS]
+    center = size // 2
+    x, y = np.indices((size, size))
+    log_weights = -np.log(np.abs(x - center) + np.abs(y - center) + 1.0).reshape(-1)
+
+    for _ in range(simulation_depth):
+        games = np.flatnonzero(active)
+        if len(games) == 0:
+            break
+        sub_boards = boards[games]
+        empty = (sub_boards == 0).reshape(len(games), -1)
+        priority = cell_priority(sub_boards, players[games], slices_list).reshape(len(games), -1)
+        # 按优先级分层, 同层内加噪声随机选择; 最低层用Gumbel噪声按rule5的权重抽样
+        noise = rng.random(priority.shape)
+        keys = np.where(priority > 0, priority * 1000.0 + noise,
+                        log_weights - np.log(-np.log(noise + 1e-300)))
+        keys[~empty] = -np.inf
+        cells = np.argmax(keys, axis=1)
+        rows = np.arange(len(games))
+        boards[games, cells // size, cells % size] = players[games]
+
+        won = priority[rows, cells] == WIN
+        winners[games[won]] = players[games[won]]
+        full = empty.sum(axis=1) == 1
+        active[games[won | full]] = False
+        players[games] = 3 - players[games]
+    return winners
@@ -0,0 +1,229 @@
+import numpy as np
+from MCTS.GomokuEnv import GomokuGame, get_zobrist_table, get_neighborhood_masks, FRONTIER_RADIUS
+
+
+class BitboardGame:
+    """
+    基于位棋盘的五子棋环境, 对外接口与GomokuGame保持一致, 供MCTS搜索使用
+    每个玩家的棋子保存为一个Python整数, 第x行第y列对应第 x * (size + 1) + y 位,
+    每行末尾多留一位空的哨兵位, 保证按位移检测连珠时不会跨行
+    make_move/unmake_move均为O(1)操作, 搜索时可以在同一个对象上落子和悔棋, 无需拷贝棋盘
+    """
+
+    def __init__(self, size=10):
+        self.size = size
+        self.stride = size + 1
+        self.bits = [0, 0, 0]  # 下标1、2分别为玩家1、2的位棋盘
+        self.full_mask = 0
+        for x in range(size):
+            self.full_mask |= ((1 << size) - 1) << (x * self.stride)
+        # 横 竖 斜 反斜 四个方向对应的位移量
+        self.shifts = (1, self.stride, self.stride + 1, self.stride - 1)
+        self.history = []  # 落子记录, 用于悔棋
+        self.last_move = (None, (None, None))
+        self.current_player = 1  # 玩家1为先手，2为后手
+        self.game_over = False
+        self.winner = None
+        self.hash = 0  # 棋盘的Zobrist哈希值, 每次落子和悔棋时增量更新
+        self.frontier = 0  # 已有棋子周围FRONTIER_RADIUS格以内的空位, 与位棋盘使用相同的位序, 落子时增量更新, 悔棋时还原
+
+    @classmethod
+    def from_game(cls, game: GomokuGame):
+        """由GomokuGame构造位棋盘"""
+        result = cls(game.size)
+        result.set(size=game.size, board=game.board, current_player=game.current_player,
+                   game_over=game.game_over, winner=game.winner)
+        result.last_move = game.last_move
+        return result
+
+    def to_game(self):
+        """转换为GomokuGame"""
+        game = GomokuGame(self.size)
+        game.set(size=self.size, board=self.board, current_player=self.current_player,
+                 game_over=self.game_over, winner=self.winner)
+        game.last_move = self.last_move
+        return game
+
+    def set(self, **kwargs):
+        size = kwargs.get('size', 10)
+        self.__init__(size)
+        board = np.array(kwargs.get('board', np.zeros((size, size), dtype=int)))
+        table = get_zobrist_table(size)
+        masks = get_neighborhood_masks(size, FRONTIER_RADIUS, self.stride)
+        for x, y in np.argwhere(board != 0):
+            self.bits[int(board[x, y])] |= 1 << self.index(x, y)
+            self.hash ^= table[int(board[x, y])][x * size + y]
+            self.frontier |= masks[x * size + y]
+        self.frontier &= ~self.occupied()
+        self.current_player = kwargs.get('current_player', 1)
+        self.game_over = kwargs.get('game_over', False)
+        self.winner = kwargs.get('winner', None)
+
+    def copy(self):
+        result = self.__class__.__new__(self.__class__)
+        result.__dict__.update(self.__dict__)
+        result.bits = self.bits[:]
+        result.history = self.history[:]
+        return result
+
+    def reset(self):
+        self.__init__(self.size)
+        return self.get_state()
+
+    @property
+    def board(self):
+        """以NumPy数组形式返回棋盘, 仅用于兼容GomokuGame的接口, 搜索过程中不应调用"""
+        board = np.zeros((self.size, self.size), dtype=int)
+        for player in (1, 2):
+            for x, y in self.iter_points(self.bits[player]):
+                board[x, y] = player
+        return board
+
+    def index(self, x, y):
+        return int(x) * self.stride + int(y)
+
+    def iter_points(self, mask):
+        """按行优先顺序遍历掩码中所有置位对应的坐标"""
+        while mask:
+            low = mask & -mask
+            yield divmod(low.bit_length() - 1, self.stride)
+            mask ^= low
+
+    def occupied(self):
+        return self.bits[1] | self.bits[2]
+
+    def hash_after(self, action):
+        """返回当前玩家在action落子后的哈希值, 不修改棋盘"""
+        x, y = action
+        return self.hash ^ get_zobrist_table(self.size)[self.current_player][x * self.size + y]
+
+    def get_point(self, x, y):
+        """返回指定位置的棋子, 0表示空位"""
+        i = int(x) * self.stride + int(y)
+        if (self.bits[1] >> i) & 1:
+            return 1
+        if (self.bits[2] >> i) & 1:
+            return 2
+        return 0
+
+    def get_state(self):
+        return self.board, self.current_player, self.game_over, self.winner
+
+    def get_valid_points(self):
+        return np.where(self.board == 0, 1, 0)
+
+    def get_empty_points(self):
+        return list(self.iter_points(self.full_mask & ~self.occupied()))
+
+    def get_player_points(self, player):
+        return list(self.iter_points(self.bits[player]))
+
+    def get_nearby_points(self, n=4):
+        """
+        获取已有棋子周围n格以内的空位, 结果与GomokuEnv.get_nearby_points一致
+        n为FRONTIER_RADIUS时直接读取增量维护的候选落子范围.
+        否则, 多源广度优先搜索的距离即到最近棋子的切比雪夫距离, 因此对占位掩码做n次八方向膨胀即可
+        """
+        if n == FRONTIER_RADIUS:
+            points = list(self.iter_points(self.frontier))
+        else:
+            occupied = self.occupied()
+            area = occupied
+            for _ in range(n):
+                grown = area
+                for shift in self.shifts:
+                    grown |= (area << shift) | (area >> shift)
+                area = grown & self.full_mask
+            points = list(self.iter_points(area & ~occupied))
+        if len(points) > 0:
+            return points
+        center = self.size // 2
+        return [(center, center)]
+
+    def make_move(self, action):
+        """在当前对象上落子, 不做合法性检查, 可通过unmake_move撤销"""
+        x, y = action
+        player = self.current_player
+        self.history.append((action, self.last_move, self.game_over, self.winner, player, self.frontier))
+        bits = self.bits[player] | (1 << (int(x) * self.stride + int(y)))
+        self.bits[player] = bits
+        self.last_move = (player, action)
+        self.hash ^= get_zobrist_table(self.size)[player][x * self.size + y]
+        self.frontier = (self.frontier | get_neighborhood_masks(self.size, FRONTIER_RADIUS, self.stride)[
+            x * self.size + y]) & ~self.occupied()
+
+        # 检查是否胜利
+        if self.check_five(bits):
+            self.game_over = True
+            self.winner = player
+        # 没有胜利则检查是否还有空位置（平局）
+        elif self.occupied() == self.full_mask:
+            self.game_over = True
+        else:
+            self.current_player = 3 - player
+
+    def unmake_move(self):
+        """撤销最近一次落子"""
+        action, self.last_move, self.game_over, self.winner, player, self.frontier = self.history.pop()
+        x, y = action
+        self.bits[player] &= ~(1 << (int(x) * self.stride + int(y)))
+        self.hash ^= get_zobrist_table(self.size)[player][x * self.size + y]
+        self.current_player = player
+
+    def step(self, action):
+        if self.game_over:
+            return self.get_state()
+
+        if not self.check_point_empty(action):
+            return self.get_state()
+
+        self.make_move(action)
+        return self.get_state()
+
+    def check_five(self, bits):
+        """按位与检测掩码中是否存在五连"""
+        for shift in self.shifts:
+            pairs = bits & (bits >> shift)
+            fours = pairs & (pairs >> (2 * shift))
+            if fours & (bits >> (4 * shift)):
+                return True
+        return False
+
+    def check_win(self, x, y):
+        player = self.get_point(x, y)
+        if player == 0:
+            return False
+        return self.check_five(self.bits[player])
+
+    def check_line(self, x, y, dx, dy):
+        """检查在一条线上有多少个相连棋子"""
+        player = self.get_point(x, y)
+        positions = [(x, y)]
+        count = 1
+        # 正向检查
+        nx, ny = x + dx, y + dy
+        while 0 <= nx < self.size and 0 <= ny < self.size and self.get_point(nx, ny) == player:
+            count += 1
+            positions.append((nx, ny))
+            nx += dx
+            ny += dy
+        # 反向检查
+        nx, ny = x - dx, y - dy
+        while 0 <= nx < self.size and 0 <= ny < self.size and self.get_point(nx, ny) == player:
+            count += 1
+            positions.append((nx, ny))
+            nx -= dx
+            ny -= dy
+        return count, positions
+
+    def check_boarder(self, point):
+        """检查是否在边界内"""
+        x, y = point
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def check_point_empty(self, point):
+        """检查当前点是否为空"""
+        x, y = point
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        return not ((self.bits[1] | self.bits[2]) >> (int(x) * self.stride + int(y))) & 1
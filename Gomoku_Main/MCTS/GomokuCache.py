@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from MCTS.GomokuOpening import canonicalize, transform_point, inverse_point
+
+logger = logging.getLogger(__name__)
+
+
+class SearchCache:
+    """
+    跨对局的搜索结果缓存: 以对称标准化后的局面为键, 保存最优落子、根节点各子节点的访问次数和胜利次数(当前玩家的),
+    以及这些统计对应的模拟次数. 坐标按标准形式保存, 查询时变换回原棋盘的坐标, 因此对称的局面共用一项
+    内存中最多保存capacity项, 淘汰最久未使用的项(LRU); path不为None时同时写入该SQLite文件,
+    多个工作进程共用, 内存中没有时从文件中读取. 文件中最多保存disk_capacity项, 淘汰最久没有写入的项
+    缓存不区分搜索参数, 同一局面只保留模拟次数最多的结果. 文件读写失败时只记录日志, 当作没有缓存
+    """
+
+    def __init__(self, capacity=10000, path=None, disk_capacity=100000):
+        self.capacity = capacity
+        self.path = str(path) if path is not None else None
+        self.disk_capacity = disk_capacity
+        self.entries = OrderedDict()  # 键 -> 标准形式下的结果
+        self.lock = threading.Lock()
+        self.connection = None
+        self.pid = None  # 打开连接的进程, fork出的子进程需要重新打开
+        self.writes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def connect(self):
+        """返回本进程的SQLite连接, 第一次使用时打开并建表"""
+        if self.connection is None or self.pid != os.getpid():
+            self.connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS search_cache ('
+                                    'key TEXT PRIMARY KEY, simulations INTEGER, data TEXT, updated REAL)')
+            self.pid = os.getpid()
+        return self.connection
+
+    def get(self, board, player):
+        """
+        查询局面的搜索结果
+
+        返回:
+            {'best_move': (x, y), 'visits': [((x, y), visits, wins)], 'simulations'}, 坐标为board中的坐标, 没有时返回None
+        """
+        size = len(board)
+        key, symmetry = canonicalize(board, player)
+        key = f'{size}:{key}'
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            elif self.path is not None:
+                try:
+                    row = self.connect().execute('SELECT data FROM search_cache WHERE key = ?', (key,)).fetchone()
+                except sqlite3.Error:
+                    logger.warning('读取搜索缓存失败', exc_info=True)
+                    row = None
+                if row is not None:
+                    entry = json.loads(row[0])
+                    self.remember(key, entry)
+        if entry is None:
+            return None
+        return {
+            'best_move': inverse_point(entry['best_move'], size, symmetry),
+            'visits': [(inverse_point(action, size, symmetry), visits, wins) for action, visits, wins in entry['visits']],
+            'simulations': entry['simulations'],
+        }
+
+    def put(self, board, player, best_move, statistics):
+        """
+        保存局面的搜索结果, statistics为搜索树的root_statistics(). 已有模拟次数更多的结果时不覆盖
+        """
+        size = len(board)
+        key, symmetry = canonicalize(board, player)
+        key = f'{size}:{key}'
+        statistics = [(action, int(visits), float(wins)) for action, visits, wins in statistics if visits > 0]
+        entry = {
+            'best_move': transform_point(best_move, size, symmetry),
+            'visits': [(transform_point(action, size, symmetry), visits, wins) for action, visits, wins in statistics],
+            'simulations': sum(visits for _, visits, _ in statistics),
+        }
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None and cached['simulations'] > entry['simulations']:
+                return
+            self.remember(key, entry)
+            if self.path is not None:
+                try:
+                    self.store(key, entry)
+                except sqlite3.Error:
+                    logger.warning('写入搜索缓存失败', exc_info=True)
+
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def store(self, key, entry):
+        """写入SQLite文件, 每写入100次检查一次数量上限"""
+        connection = self.connect()
+        with connection:
+            connection.execute('INSERT INTO search_cache (key, simulations, data, updated) VALUES (?, ?, ?, ?) '
+                               'ON CONFLICT(key) DO UPDATE SET simulations = excluded.simulations, '
+                               'data = excluded.data, updated = excluded.updated '
+                               'WHERE excluded.simulations >= search_cache.simulations',
+                               (key, entry['simulations'], json.dumps(entry), time.time()))
+            self.writes += 1
+            if self.disk_capacity is not None and self.writes % 100 == 0:
+                connection.execute('DELETE FROM search_cache WHERE key IN '
+                                   '(SELECT key FROM search_cache ORDER BY updated DESC LIMIT -1 OFFSET ?)',
+                                   (self.disk_capacity,))
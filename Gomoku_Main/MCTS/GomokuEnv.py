@@ -1,7 +1,47 @@
+import random
 import numpy as np
 from copy import deepcopy
 from collections import deque
 
+# 按棋盘大小缓存的Zobrist随机数表, 见get_zobrist_table
+_ZOBRIST_CACHE = {}
+# 候选落子范围(frontier)对应的距离, 与MCTS扩展邻近节点使用的距离相同
+FRONTIER_RADIUS = 2
+# 按(棋盘大小, 距离, 行宽)缓存的邻域掩码, 见get_neighborhood_masks
+_NEIGHBORHOOD_CACHE = {}
+
+
+def get_zobrist_table(size):
+    """
+    获取Zobrist随机数表, table[player][x * size + y]为玩家player在(x, y)落子对应的64位随机数
+    局面的哈希值为所有棋子对应随机数的异或, 使用固定的随机种子保证不同进程中同一局面的哈希值相同
+    """
+    if size not in _ZOBRIST_CACHE:
+        rng = random.Random(size)
+        _ZOBRIST_CACHE[size] = [[0] * (size * size)] + [[rng.getrandbits(64) for _ in range(size * size)]
+                                                         for _ in (1, 2)]
+    return _ZOBRIST_CACHE[size]
+
+
+def get_neighborhood_masks(size, radius, stride=None):
+    """
+    获取每个格子周围radius格以内(切比雪夫距离)所有格子的掩码
+    masks[x * size + y]为(x, y)的邻域, 邻域中的(i, j)对应第 i * stride + j 位, stride默认为size
+    """
+    stride = size if stride is None else stride
+    key = (size, radius, stride)
+    if key not in _NEIGHBORHOOD_CACHE:
+        masks = []
+        for x in range(size):
+            for y in range(size):
+                mask = 0
+                for i in range(max(x - radius, 0), min(x + radius + 1, size)):
+                    for j in range(max(y - radius, 0), min(y + radius + 1, size)):
+                        mask |= 1 << (i * stride + j)
+                masks.append(mask)
+        _NEIGHBORHOOD_CACHE[key] = masks
+    return _NEIGHBORHOOD_CACHE[key]
+
 
 class GomokuGame:
     def __init__(self, size=10):
@@ -11,6 +51,11 @@ class GomokuGame:
         self.current_player = 1  # 玩家1为先手，2为后手
         self.game_over = False
         self.winner = None
+        self.hash = 0  # 棋盘的Zobrist哈希值, 每次落子时增量更新
+        # 已有棋子和候选落子范围的掩码, (x, y)对应第 x * size + y 位, 每次落子时增量更新
+        # 候选落子范围为已有棋子周围FRONTIER_RADIUS格以内的空位
+        self.occupied_mask = 0
+        self.frontier = 0
 
     def __deepcopy__(self, memo):
         cls = self.__class__
@@ -27,6 +72,16 @@ class GomokuGame:
         self.current_player = kwargs.get('current_player', 1)
         self.game_over = kwargs.get('game_over', False)
         self.winner = kwargs.get('winner', None)
+        table = get_zobrist_table(size)
+        masks = get_neighborhood_masks(size, FRONTIER_RADIUS)
+        self.hash = 0
+        self.occupied_mask = 0
+        self.frontier = 0
+        for x, y in np.argwhere(self.board != 0):
+            self.hash ^= table[self.board[x, y]][x * size + y]
+            self.occupied_mask |= 1 << int(x * size + y)
+            self.frontier |= masks[x * size + y]
+        self.frontier &= ~self.occupied_mask
 
     def copy(self):
         return deepcopy(self)
@@ -36,6 +91,9 @@ class GomokuGame:
         self.current_player = 1
         self.game_over = False
         self.winner = None
+        self.hash = 0
+        self.occupied_mask = 0
+        self.frontier = 0
         return self.get_state()
 
     def get_state(self):
@@ -44,6 +102,36 @@ class GomokuGame:
     def get_valid_points(self):
         return np.where(self.board == 0, 1, 0)
 
+    def hash_after(self, action):
+        """返回当前玩家在action落子后的哈希值, 不修改棋盘"""
+        x, y = action
+        return self.hash ^ get_zobrist_table(self.size)[self.current_player][x * self.size + y]
+
+    def get_point(self, x, y):
+        """返回指定位置的棋子, 0表示空位"""
+        return self.board[x, y]
+
+    def get_empty_points(self):
+        return [tuple(point) for point in np.argwhere(self.board == 0)]
+
+    def get_player_points(self, player):
+        return [tuple(point) for point in np.argwhere(self.board == player)]
+
+    def get_nearby_points(self, n=4):
+        """n为FRONTIER_RADIUS时直接读取增量维护的候选落子范围, 否则在整个棋盘上搜索"""
+        if n != FRONTIER_RADIUS:
+            return [tuple(point) for point in get_nearby_points(self.board, n=n)]
+        if self.frontier == 0:
+            center = self.size // 2
+            return [(center, center)]
+        points = []
+        mask = self.frontier
+        while mask:
+            low = mask & -mask
+            points.append(divmod(low.bit_length() - 1, self.size))
+            mask ^= low
+        return points
+
     def step(self, action):
         if self.game_over:
             return self.get_state()
@@ -55,6 +143,10 @@ class GomokuGame:
         x, y = action
         self.board[x, y] = self.current_player
         self.last_move = (self.current_player, action)
+        self.hash ^= get_zobrist_table(self.size)[self.current_player][x * self.size + y]
+        self.occupied_mask |= 1 << int(x * self.size + y)
+        self.frontier = (self.frontier | get_neighborhood_masks(self.size, FRONTIER_RADIUS)[x * self.size + y]) \
+            & ~self.occupied_mask
 
         # 检查是否胜利
         if self.check_win(x, y):
@@ -0,0 +1,47 @@
+from math import exp
+from MCTS.GomokuRule import ThreatIndex
+from MCTS.GomokuPattern import OPEN_FOUR, FOUR, BROKEN_FOUR, OPEN_THREE, BROKEN_THREE, THREE
+
+# 各棋型的分值, 按棋型索引中的窗口数量计分, 双方分值之差为局面的得分
+PATTERN_SCORES = {
+    OPEN_FOUR: 500,
+    FOUR: 60,
+    BROKEN_FOUR: 60,
+    OPEN_THREE: 40,
+    BROKEN_THREE: 30,
+    THREE: 5,
+}
+# 得分换算为胜率时的缩放, 得分为EVAL_SCALE时胜率约为0.73
+EVAL_SCALE = 100
+
+
+def evaluate(threat_index: ThreatIndex, player, scale=EVAL_SCALE):
+    """
+    静态评估局面, 返回player获胜概率的估计(0到1), 用于代替截断的模拟
+    轮到落子的一方能直接成五时判胜; 对方有活四或两个以上的成五点(无法全部堵住)时判负;
+    否则按双方棋型的分值之差经过logistic函数换算为胜率
+    """
+    game = threat_index.game_env
+    if game.winner is not None:
+        return 1.0 if game.winner == player else 0.0
+    to_move = game.current_player
+    rival = 3 - to_move
+    threats = threat_index.threats
+    if any(threats[to_move][threat_class] for threat_class in (OPEN_FOUR, FOUR, BROKEN_FOUR)):
+        value = 1.0
+    elif threats[rival][OPEN_FOUR] or len(five_points(threat_index, rival)) > 1:
+        value = 0.0
+    else:
+        score = sum(weight * (len(threats[to_move][threat_class]) - len(threats[rival][threat_class]))
+                    for threat_class, weight in PATTERN_SCORES.items())
+        value = 1 / (1 + exp(-score / scale))
+    return value if to_move == player else 1 - value
+
+
+def five_points(threat_index: ThreatIndex, player):
+    """玩家落子即可成五的所有位置"""
+    points = set()
+    for threat_class in (FOUR, BROKEN_FOUR):
+        for window_points in threat_index.find(player, threat_class):
+            points.update(window_points)
+    return points
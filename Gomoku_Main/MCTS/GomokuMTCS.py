@@ -1,40 +1,209 @@
 import numpy as np
-from MCTS.GomokuEnv import GomokuGame, get_nearby_points
-from MCTS.GomokuRule import RuleStrategy
+from MCTS.GomokuEnv import GomokuGame, FRONTIER_RADIUS
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuRule import RuleStrategy, ThreatIndex
+from MCTS.GomokuPattern import OPEN_FOUR, FOUR, BROKEN_FOUR, OPEN_THREE, BROKEN_THREE, THREE
+from MCTS.GomokuThreatSearch import ThreatSpaceSearch
+from MCTS.GomokuStats import SearchStats
+from MCTS.GomokuEvaluate import evaluate, EVAL_SCALE
 import random
-from math import sqrt, log
+import time
+import logging
+import threading
+from math import sqrt, log, ceil
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 根并行搜索使用的进程池(进程数, 进程池), 只保留一个, 见get_process_pool
+_PROCESS_POOL = None
+# 获取进程池并提交任务时持有, 避免提交前进程池被其他线程关闭
+PROCESS_POOL_LOCK = threading.RLock()
+
+
+def get_process_pool(workers):
+    """
+    获取指定进程数的进程池, 进程池在多次搜索之间复用. 进程数变化时关闭原来的进程池再重新创建,
+    已经提交的任务仍会完成. 调用方需要在PROCESS_POOL_LOCK中获取进程池并提交任务
+    """
+    global _PROCESS_POOL
+    with PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is None or _PROCESS_POOL[0] != workers:
+            if _PROCESS_POOL is not None:
+                _PROCESS_POOL[1].shutdown(wait=False)
+            _PROCESS_POOL = (workers, ProcessPoolExecutor(max_workers=workers))
+        return _PROCESS_POOL[1]
+
+
+def root_search(state, move, settings, seed):
+    """
+    根并行搜索的工作进程: 以不同的随机种子从同一根节点独立搜索
+
+    参数:
+        state: 根节点的棋盘状态
+        move: 到达根节点的行动
+        settings: MCTSTree的参数, 例如{'SIMULATION_TIMES': 100, 'ONLY_NEARBY': True}, SIMULATION_TIMES为None时只受预算限制
+        seed: 随机种子
+
+    返回:
+        根节点各子节点的统计, 格式为{action: (visits, wins, amaf_visits, amaf_wins)}
+    """
+    random.seed(seed)
+    tree = MCTSTree(MCTSNode(state, move=move))
+    for key, value in settings.items():
+        setattr(tree, key, value)
+    tree.search(tree.SIMULATION_TIMES, tree.TIME_BUDGET, tree.NODE_BUDGET)
+    return {child.move[1]: (child.visits, child.wins, child.amaf_visits, child.amaf_wins)
+            for child in tree.root_node.children}
+
+
+def rollout(g, simulation_depth, moves=None, vcf_nodes=0, stats: SearchStats = None, threat_index: ThreatIndex = None):
+    """
+    从状态g开始双方按RuleStrategy轮流落子, 直到游戏结束或达到simulation_depth步, 会直接修改g
+    传入列表moves时, 按顺序记录模拟中的每一步(player, action)
+    vcf_nodes大于0时, 在当前玩家能够冲四且双方都没有成五点时以vcf_nodes为节点上限搜索VCF, 找到时直接判当前玩家获胜
+    传入stats时记录模拟的步数和各规则的命中次数
+    传入与g一致的threat_index时使用并随落子更新该索引, 模拟结束后可以用它评估局面
+
+    返回:
+        (winner, steps), winner为胜利者(没有分出胜负时为None), steps为落子次数, 位棋盘可据此悔棋还原
+    """
+    # 整个模拟过程共用一个棋型索引, 每步落子后只更新经过落子点的窗口
+    if threat_index is None:
+        threat_index = ThreatIndex(g)
+    rule_strategy = RuleStrategy(g, threat_index=threat_index, rule_hits=stats.rule_hits if stats is not None else None)
+    in_place = isinstance(g, BitboardGame)
+    threat_search = ThreatSpaceSearch(g, threat_index, max_nodes=vcf_nodes) if vcf_nodes > 0 and in_place else None
+    steps = 0
+    # 到达当前状态的落子已经分出胜负时不需要模拟
+    winner = g.winner
+
+    while not g.game_over and steps < simulation_depth:
+        if vcf_nodes > 0 and is_near_terminal(threat_index, g.current_player):
+            if threat_search is None:
+                action = ThreatSpaceSearch(g, max_nodes=vcf_nodes).vcf()
+            else:
+                action = threat_search.vcf()
+            if action is not None:
+                winner = g.current_player
+                break
+        steps += 1
+        action = rule_strategy.model()
+        if moves is not None:
+            moves.append((g.current_player, action))
+        if in_place:
+            g.make_move(action)
+        else:
+            g.step(action)
+        threat_index.update(action)
+        # 判断退出条件
+        if g.winner is not None:
+            winner = g.winner
+            break
+    if stats is not None:
+        stats.add_rollout(steps)
+    return winner, steps
+
+
+def is_near_terminal(threat_index, player):
+    """玩家能够冲四(有眠三、活三或跳活三), 且双方都不能直接成五时, 值得用VCF判断胜负"""
+    for threat_class in [OPEN_FOUR, FOUR, BROKEN_FOUR]:
+        if threat_index.has_threat(1, threat_class) or threat_index.has_threat(2, threat_class):
+            return False
+    return any(threat_index.has_threat(player, threat_class) for threat_class in [THREE, OPEN_THREE, BROKEN_THREE])
+
+
+class TranspositionEntry:
+    """
+    节点的访问次数和胜利次数. 开启置换表时, 局面相同(棋子相同而落子顺序不同)的节点共享同一个对象,
+    同时共享棋盘状态, 避免重复拷贝
+    """
+    __slots__ = ('visits', 'wins', 'state')
+
+    def __init__(self, state=None):
+        self.visits = 0
+        self.wins = 0
+        self.state = state
+
+
+class TranspositionTable:
+    """
+    以局面的Zobrist哈希值为键的置换表, 超过容量时淘汰最久未使用的项(LRU)
+    被淘汰的项仍由已创建的节点持有, 只是不再与之后创建的节点共享
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key):
+        """返回key对应的项, 不存在时新建"""
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = TranspositionEntry()
+            self.entries[key] = entry
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return entry
 
 
 class MCTSNode:
-    def __init__(self, state, parent=None, move=None):
-        self.state: GomokuGame = state  # 状态
+    def __init__(self, state, parent=None, move=None, entry=None):
+        self.state: GomokuGame | BitboardGame = state  # 状态
         self.parent = parent  # 父节点
         if move is None:
             self.move = (state.current_player, None)
         else:
             self.move = move  # 到达当前节点采取的行动，在五子棋环境中需要为(player, action)，即记录玩家执行的动作
         self.children = []  # 子节点列表
-        self.wins = 0
+        # 访问次数和胜利次数, 开启置换表时与相同局面的节点共享
+        self.entry = entry if entry is not None else TranspositionEntry(state)
         self.if_winner = None  # 表示当前节点经过模拟后可能的胜利者，None为当前节点没有胜利者
-        self.visits = 0
         self.untried_actions = None
         self.nearby_actions = None
+        # AMAF统计: 当前节点的行动在经过父节点的模拟中(无论第几步)被同一玩家执行的次数和其中的胜利次数
+        self.amaf_visits = 0
+        self.amaf_wins = 0
+
+    @property
+    def visits(self):
+        return self.entry.visits
+
+    @visits.setter
+    def visits(self, value):
+        self.entry.visits = value
+
+    @property
+    def wins(self):
+        return self.entry.wins
+
+    @wins.setter
+    def wins(self, value):
+        self.entry.wins = value
 
     def get_untried_actions(self):
         """
         获取所有没有棋子的位置
         """
-        valid_moves = np.argwhere(self.state.get_valid_points() == 1)
-        return [tuple(move) for move in valid_moves]
+        return self.state.get_empty_points()
 
-    def get_nearby_actions(self):
+    def get_nearby_actions(self, radius=FRONTIER_RADIUS):
         """
-        获取已有棋子的位置邻近的没有棋子的位置
+        获取已有棋子的位置邻近(radius格以内)的没有棋子的位置
         """
-        valid_moves = get_nearby_points(self.state.board, n=2)
-        return [tuple(move) for move in valid_moves]
+        return self.state.get_nearby_points(n=radius)
 
-    def select_child(self, ucb_c=np.log(2)):
+    def select_child(self, ucb_c=np.log(2), rave_equivalence=None):
+        """
+        选择UCB值最大的子节点. 传入rave_equivalence时胜率按 beta = sqrt(k / (3n + k)) 混合AMAF胜率(RAVE),
+        k为rave_equivalence, 访问次数n越大AMAF胜率的权重越小
+        """
         selected_child = None
         best_value = 0.0
         for child in self.children:
@@ -43,37 +212,67 @@ class MCTSNode:
             if n == 0:
                 uct_value = 99999
             else:
-                uct_value = (v / n) + (ucb_c * sqrt(2 * log(self.visits) / n))
+                q = v / n
+                if rave_equivalence is not None and child.amaf_visits > 0:
+                    beta = sqrt(rave_equivalence / (3 * n + rave_equivalence))
+                    q = (1 - beta) * q + beta * child.amaf_wins / child.amaf_visits
+                uct_value = q + (ucb_c * sqrt(2 * log(self.visits) / n))
             if uct_value > best_value:
                 best_value = uct_value
                 selected_child = child
         return selected_child
 
-    def expand(self):
+    def new_child(self, action, transposition_table=None):
+        """
+        创建执行action后的子节点. 传入置换表时, 已经出现过的局面直接复用其统计和棋盘状态
+        """
+        entry = None
+        if transposition_table is not None:
+            entry = transposition_table.lookup(self.state.hash_after(action))
+        if entry is not None and entry.state is not None:
+            new_state = entry.state
+        else:
+            new_state = self.state.copy()
+            new_state.step(action)
+            if entry is not None:
+                entry.state = new_state
+        return MCTSNode(new_state, parent=self, move=(self.state.current_player, action), entry=entry)
+
+    def expand(self, transposition_table=None):
         if self.untried_actions is None:
             self.untried_actions = self.get_untried_actions()
         for ua in self.untried_actions:
-            new_state = self.state.copy()
-            new_state.step(ua)
-            new_node = MCTSNode(new_state, parent=self, move=(self.state.current_player, ua))
+            new_node = self.new_child(ua, transposition_table)
             self.children.append(new_node)
         self.untried_actions = None
         return new_node
 
-    def expand_nearby(self):
+    def expand_nearby(self, transposition_table=None, radius=FRONTIER_RADIUS):
         """
         仅扩展邻近节点
         """
         if self.nearby_actions is None:
-            self.nearby_actions = self.get_nearby_actions()
+            self.nearby_actions = self.get_nearby_actions(radius)
         for na in self.nearby_actions:
-            new_state = self.state.copy()
-            new_state.step(na)
-            new_node = MCTSNode(new_state, parent=self, move=(self.state.current_player, na))
+            new_node = self.new_child(na, transposition_table)
             self.children.append(new_node)
         self.nearby_actions = None
         return new_node
 
+    def expand_progressive(self, transposition_table=None, only_nearby=False, radius=FRONTIER_RADIUS):
+        """
+        渐进展开: 第一次调用时按RuleStrategy.rank_actions对候选位置排序, 每次调用按顺序添加一个子节点并返回,
+        候选位置用完时返回None
+        """
+        if self.untried_actions is None:
+            actions = self.get_nearby_actions(radius) if only_nearby else self.get_untried_actions()
+            self.untried_actions = RuleStrategy(self.state).rank_actions(actions)
+        if len(self.untried_actions) == 0:
+            return None
+        new_node = self.new_child(self.untried_actions.pop(0), transposition_table)
+        self.children.append(new_node)
+        return new_node
+
     def update(self, result):
         self.visits += 1
         self.wins += result
@@ -87,7 +286,38 @@ class MCTSTree:
         self.SIMULATION_DEPTH = 1000
         self.SIMULATION_TIMES = 100
         self.ONLY_NEARBY: bool = False
+        self.NEARBY_RADIUS = FRONTIER_RADIUS  # ONLY_NEARBY时扩展已有棋子周围几格以内的空位
+        self.UCB_C = np.log(2)  # 选择时UCB的探索系数
+        self.WORKERS = 1  # 大于1时使用多进程根并行搜索
+        self.TRANSPOSITION: bool = False  # 是否使用置换表在落子顺序不同的相同局面之间共享统计
+        self.TRANSPOSITION_CAPACITY = 100000
+        self.transposition_table: TranspositionTable = None
+        self.TIME_BUDGET = None  # 每步搜索的时间预算(秒), 设置后迭代到时间用完为止, 不再受SIMULATION_TIMES限制
+        self.NODE_BUDGET = None  # 每步搜索新建节点数量的上限
+        self.node_count = 0  # 扩展创建的节点总数
+        self.simulation_count = 0  # 上一次搜索实际完成的模拟次数
+        self.last_statistics = None  # 上一次搜索结束时(选出落子前)根节点各子节点的统计, 见root_statistics
+        # 渐进展开: 节点的子节点数量不超过 WIDENING_C * visits ** WIDENING_ALPHA, 按优先级逐个添加
+        self.PROGRESSIVE_WIDENING: bool = False
+        self.WIDENING_C = 2
+        self.WIDENING_ALPHA = 0.5
+        # RAVE: 回溯时把模拟中的落子也记入路径上各节点兄弟节点的AMAF统计, 选择时按RAVE_EQUIVALENCE混合
+        self.RAVE: bool = False
+        self.RAVE_EQUIVALENCE = 1000
+        self.ROLLOUT_VCF_NODES = 0  # 大于0时模拟中局面接近终局时用VCF判断胜负, 为每次VCF搜索的节点上限
+        # 截断模拟: 不为None时模拟最多进行ROLLOUT_CUTOFF步, 没有分出胜负时用静态评估的胜率代替平局的0.1,
+        # 为0时完全用静态评估代替模拟. EVAL_SCALE见GomokuEvaluate
+        self.ROLLOUT_CUTOFF = None
+        self.EVAL_SCALE = EVAL_SCALE
+        # 单进程搜索时每PROGRESS_INTERVAL次模拟调用一次progress_callback(tree, 已完成的模拟次数), 返回False时停止搜索
+        self.PROGRESS_INTERVAL = 50
+        self.progress_callback = None
+        # 开启时每次model()记录各阶段耗时、模拟长度、树的大小和规则命中次数, 结果保存在stats中
+        self.INSTRUMENT: bool = False
+        self.stats: SearchStats = None
         self.root_node: MCTSNode = root_node
+        # 胜利次数始终按创建树时根节点的玩家统计, 根节点推进到对手落子的局面(如后台思考时)统计仍然一致
+        self.player = root_node.state.current_player
 
     def selection(self, node: MCTSNode):
         """
@@ -98,12 +328,38 @@ class MCTSTree:
             return node
         # 循环找到叶子节点
         while True:
-            child_node = node.select_child()
+            # 渐进展开时访问次数增加到允许更多子节点则添加下一个子节点, 并从该子节点开始模拟
+            if self.PROGRESSIVE_WIDENING and len(node.children) > 0:
+                child_node = self.widen(node)
+                if child_node is not None:
+                    return child_node
+            child_node = node.select_child(self.UCB_C, rave_equivalence=self.RAVE_EQUIVALENCE if self.RAVE else None)
             if child_node is None:
                 break
             node = child_node
         return node
 
+    def widen(self, node: MCTSNode):
+        """
+        渐进展开: 子节点数量小于 WIDENING_C * visits ** WIDENING_ALPHA 时添加优先级最高的未展开子节点并返回, 否则返回None
+        """
+        if node.if_winner or node.state.game_over:
+            return None
+        if len(node.children) >= max(ceil(self.WIDENING_C * node.visits ** self.WIDENING_ALPHA), 1):
+            return None
+        new_node = node.expand_progressive(self.get_transposition_table(), self.ONLY_NEARBY, self.NEARBY_RADIUS)
+        if new_node is not None:
+            self.node_count += 1
+        return new_node
+
+    def get_transposition_table(self):
+        """开启置换表时返回置换表(首次使用时创建), 否则返回None"""
+        if not self.TRANSPOSITION:
+            return None
+        if self.transposition_table is None:
+            self.transposition_table = TranspositionTable(self.TRANSPOSITION_CAPACITY)
+        return self.transposition_table
+
     def expansion(self, node: MCTSNode):
         """
         如果选择的节点不是叶子节点或当前胜负已分则不需要扩展
@@ -113,56 +369,76 @@ class MCTSTree:
             return node
         if node.if_winner:
             return node
-        # 节点进行扩展
+        # 节点进行扩展, 开启置换表时相同局面的子节点共享统计
+        transposition_table = self.get_transposition_table()
+        if self.PROGRESSIVE_WIDENING:
+            new_node = node.expand_progressive(transposition_table, self.ONLY_NEARBY, self.NEARBY_RADIUS)
+            if new_node is None:
+                return node
+            self.node_count += 1
+            return new_node
         if self.ONLY_NEARBY:
-            node.expand_nearby()
+            node.expand_nearby(transposition_table, self.NEARBY_RADIUS)
         else:
-            node.expand()
+            node.expand(transposition_table)
+        self.node_count += len(node.children)
         return random.choice(node.children)
 
-    def simulation(self, node: MCTSNode):
+    def simulation(self, node: MCTSNode, moves=None, stats: SearchStats = None):
         """
-        从扩展的子节点做模拟,直到游戏结束或达到预设的深度
+        从扩展的子节点做模拟,直到游戏结束或达到预设的深度, 传入列表moves时记录模拟中的落子
+        模拟分出胜负时记录在node.if_winner中
+
+        返回:
+            截断的模拟没有分出胜负时为静态评估得到的self.player的胜率, 否则为None
         """
         # 查看当前节点是否获胜
         if node.if_winner:
-            return node.state.winner
-        g = node.state.copy()
-        i = 0
-        winner = None
-
-        while True:
-            i += 1
-            action = RuleStrategy(g).model()
-            _, _, _, res_winner = g.step(action)
-            # 判断退出条件
-            if res_winner is not None:
-                winner = res_winner
-                break
-            if i >= self.SIMULATION_DEPTH:
-                break
-        if winner is None:
-            pass
+            return None
+        # 位棋盘直接在节点状态上落子, 模拟结束后悔棋还原, 避免拷贝
+        in_place = isinstance(node.state, BitboardGame)
+        g = node.state if in_place else node.state.copy()
+        value = None
+        if self.ROLLOUT_CUTOFF is None:
+            winner, steps = rollout(g, self.SIMULATION_DEPTH, moves, self.ROLLOUT_VCF_NODES, stats)
         else:
-            print()
+            threat_index = ThreatIndex(g)
+            winner, steps = rollout(g, min(self.ROLLOUT_CUTOFF, self.SIMULATION_DEPTH), moves, self.ROLLOUT_VCF_NODES,
+                                    stats, threat_index)
+            if winner is None and not g.game_over:
+                value = evaluate(threat_index, self.player, self.EVAL_SCALE)
+        if in_place:
+            for _ in range(steps):
+                g.unmake_move()
+        if winner is not None:
             node.if_winner = winner
-        return winner
+        return value
 
-    def backpropagation(self, node: MCTSNode):
+    def backpropagation(self, node: MCTSNode, moves=None, value=None):
         """
         将模拟结果反向传播给沿途阶段,包括访问次数和胜利次数
         将沿途节点访问次数加1
-        如果胜利将沿途节点胜利方胜利次数加1,平局则加0.1
+        如果胜利将沿途节点胜利方胜利次数加1,平局则加0.1, 截断的模拟则加静态评估的胜率value
+        传入模拟中的落子moves时, 沿途每个节点的子节点中, 其行动在该节点之后被同一玩家执行过的, 同样更新AMAF统计
         """
         cur_node = node
         winner = cur_node.if_winner
+        if winner is not None:
+            result = 1 if winner != 0 and winner == self.player else 0
+        elif value is not None:
+            result = value
+        else:
+            result = 0.1
+        played = set(moves) if moves is not None else None
         while cur_node is not None:
             cur_node.visits += 1
-            if winner is not None:
-                if winner != 0 and winner == self.root_node.state.current_player:
-                    cur_node.wins += 1
-            else:
-                cur_node.wins += 0.1
+            cur_node.wins += result
+            if played is not None:
+                for child in cur_node.children:
+                    if child.move in played:
+                        child.amaf_visits += 1
+                        child.amaf_wins += result
+                played.add(cur_node.move)
             cur_node = cur_node.parent
 
     def pruning(self):
@@ -179,7 +455,7 @@ class MCTSTree:
                 self.root_node.children.append(new_node)
                 # 设置新节点为根节点
                 self.root_node = new_node
-                print(f"触发规则,直接使用RuleStrategy模型,落点为{res}")
+                logger.info("触发规则,直接使用RuleStrategy模型,落点为%s", res)
                 return new_node.move
 
     def model(self, print_simulation_result=False):
@@ -202,23 +478,222 @@ class MCTSTree:
         # if res is not None:
         #     return res
         # 未匹配到规则, 使用MCTS算法
-        for i in range(self.SIMULATION_TIMES):
-            print(f"第{i}次模拟")
-            next_node = self.selection(self.root_node)
-            next_node = self.expansion(next_node)
-            self.simulation(next_node)
-            self.backpropagation(next_node)
+        # 有时间预算时迭代到时间用完为止, 否则复用的子树中子节点已有的访问次数计入模拟次数
+        if self.TIME_BUDGET is not None:
+            simulation_times = None
+        else:
+            reused_visits = sum(child.visits for child in self.root_node.children)
+            simulation_times = max(self.SIMULATION_TIMES - reused_visits, 1)
+        self.stats = SearchStats() if self.INSTRUMENT else None
+        start_time = time.perf_counter()
+        node_count = self.node_count
+        if self.WORKERS > 1:
+            self.simulation_count = self.parallel_search(simulation_times, self.TIME_BUDGET, self.NODE_BUDGET)
+        else:
+            self.simulation_count = self.search(simulation_times, self.TIME_BUDGET, self.NODE_BUDGET, self.stats)
+        if self.stats is not None:
+            self.stats.finish(self.simulation_count, time.perf_counter() - start_time, self.node_count - node_count,
+                              self.tree_size())
 
         if print_simulation_result:
             for n in self.root_node.children:
-                print(f'访问次数{n.visits} 胜利次数{n.wins} 节点对应行动{n.move}')
+                logger.info('访问次数%s 胜利次数%s 节点对应行动%s', n.visits, n.wins, n.move)
 
-        # 选择忽略探索的最优子节点
-        new_node = self.root_node.select_child(ucb_c=0)
+        # 选择忽略探索的最优子节点, 所有子节点都没有胜利次数时选择访问次数最多的
+        self.last_statistics = self.root_statistics()
+        new_node = self.root_node.select_child(ucb_c=0, rave_equivalence=self.RAVE_EQUIVALENCE if self.RAVE else None)
+        if new_node is None:
+            new_node = max(self.root_node.children, key=lambda node: node.visits)
         # 设置最优子节点为根节点
-        self.root_node = new_node
+        self.set_root(new_node)
         return new_node.move
 
+    def search(self, simulation_times, time_budget=None, node_budget=None, stats: SearchStats = None):
+        """
+        从根节点迭代选择、扩展、仿真、回溯, 直到完成simulation_times次, 或用完time_budget秒, 或新建了node_budget个节点
+        simulation_times为None时只受预算限制. 至少迭代一次. 传入stats时记录各阶段的耗时
+
+        返回:
+            实际完成的模拟次数
+        """
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        node_limit = self.node_count + node_budget if node_budget is not None else None
+        next_progress = self.PROGRESS_INTERVAL
+        debug = logger.isEnabledFor(logging.DEBUG)
+        i = 0
+        while simulation_times is None or i < simulation_times:
+            if i > 0 and deadline is not None and time.monotonic() >= deadline:
+                break
+            if i > 0 and node_limit is not None and self.node_count >= node_limit:
+                break
+            if self.progress_callback is not None and i >= next_progress:
+                next_progress = i + self.PROGRESS_INTERVAL
+                if self.progress_callback(self, i) is False:
+                    break
+            if debug:
+                logger.debug("第%d次模拟", i)
+            moves = [] if self.RAVE else None
+            if stats is None:
+                next_node = self.expansion(self.selection(self.root_node))
+                value = self.simulation(next_node, moves)
+                self.backpropagation(next_node, moves, value)
+            else:
+                start = time.perf_counter()
+                next_node = self.selection(self.root_node)
+                selected = time.perf_counter()
+                next_node = self.expansion(next_node)
+                expanded = time.perf_counter()
+                value = self.simulation(next_node, moves, stats)
+                simulated = time.perf_counter()
+                self.backpropagation(next_node, moves, value)
+                stats.add_phases(selected - start, expanded - selected, simulated - expanded,
+                                 time.perf_counter() - simulated)
+            i += 1
+        return i
+
+    def ponder(self, stop_event, time_budget=None, node_budget=None, interval=10):
+        """
+        在对手思考期间继续搜索保留的树(根节点轮到对手落子), 直到stop_event被设置或用完预算
+        每interval次模拟检查一次stop_event, 只使用单进程搜索
+
+        返回:
+            完成的模拟次数
+        """
+        if stop_event.is_set() or self.root_node.state.game_over:
+            return 0
+        progress_callback, progress_interval = self.progress_callback, self.PROGRESS_INTERVAL
+        self.progress_callback = lambda tree, i: not stop_event.is_set()
+        self.PROGRESS_INTERVAL = interval
+        try:
+            return self.search(None, time_budget, node_budget)
+        finally:
+            self.progress_callback, self.PROGRESS_INTERVAL = progress_callback, progress_interval
+
+    def parallel_search(self, simulation_times, time_budget=None, node_budget=None):
+        """
+        根并行搜索: WORKERS个进程以不同的随机种子从根节点独立搜索, 各分担模拟次数和节点预算中的一份并使用相同的时间预算,
+        结束后将各进程根节点子节点的访问次数和胜利次数按行动合并到当前树的根节点
+
+        返回:
+            所有进程完成的模拟次数之和
+        """
+        settings = {
+            'SIMULATION_DEPTH': self.SIMULATION_DEPTH,
+            'SIMULATION_TIMES': ceil(simulation_times / self.WORKERS) if simulation_times is not None else None,
+            'ONLY_NEARBY': self.ONLY_NEARBY,
+            'NEARBY_RADIUS': self.NEARBY_RADIUS,
+            'UCB_C': self.UCB_C,
+            'TRANSPOSITION': self.TRANSPOSITION,
+            'TRANSPOSITION_CAPACITY': self.TRANSPOSITION_CAPACITY,
+            'TIME_BUDGET': time_budget,
+            'NODE_BUDGET': ceil(node_budget / self.WORKERS) if node_budget is not None else None,
+            'PROGRESSIVE_WIDENING': self.PROGRESSIVE_WIDENING,
+            'WIDENING_C': self.WIDENING_C,
+            'WIDENING_ALPHA': self.WIDENING_ALPHA,
+            'RAVE': self.RAVE,
+            'RAVE_EQUIVALENCE': self.RAVE_EQUIVALENCE,
+            'ROLLOUT_VCF_NODES': self.ROLLOUT_VCF_NODES,
+            'ROLLOUT_CUTOFF': self.ROLLOUT_CUTOFF,
+            'EVAL_SCALE': self.EVAL_SCALE,
+        }
+        with PROCESS_POOL_LOCK:
+            pool = get_process_pool(self.WORKERS)
+            futures = [pool.submit(root_search, self.root_node.state, self.root_node.move, settings,
+                                   random.randrange(2 ** 32))
+                       for _ in range(self.WORKERS)]
+        children = {child.move[1]: child for child in self.root_node.children}
+        simulation_count = 0
+        for future in futures:
+            for action, (visits, wins, amaf_visits, amaf_wins) in future.result().items():
+                if action not in children:
+                    new_state = self.root_node.state.copy()
+                    new_state.step(action)
+                    children[action] = MCTSNode(new_state, parent=self.root_node,
+                                                move=(self.root_node.state.current_player, action))
+                    self.root_node.children.append(children[action])
+                children[action].visits += visits
+                children[action].wins += wins
+                children[action].amaf_visits += amaf_visits
+                children[action].amaf_wins += amaf_wins
+                self.root_node.visits += visits
+                simulation_count += visits
+        # 渐进展开时合并进来的子节点不再留在待展开的候选位置中
+        if self.root_node.untried_actions is not None:
+            self.root_node.untried_actions = [action for action in self.root_node.untried_actions
+                                              if action not in children]
+        return simulation_count
+
+    def root_statistics(self):
+        """根节点各子节点的统计, 格式为[(action, visits, wins)]"""
+        return [(child.move[1], child.visits, child.wins) for child in self.root_node.children]
+
+    def seed(self, statistics):
+        """
+        用先验统计(例如其他对局中相同局面的搜索结果)初始化根节点的子节点, 格式与root_statistics相同
+        只在根节点还没有子节点时进行, 先正常扩展根节点, 再把统计加到对应的子节点上(没有的子节点直接创建),
+        之后的model()与复用的子树一样把这些访问次数计入模拟次数
+
+        返回:
+            是否进行了初始化
+        """
+        root = self.root_node
+        if len(root.children) > 0 or root.state.game_over or len(statistics) == 0:
+            return False
+        self.expansion(root)
+        children = {tuple(child.move[1]): child for child in root.children}
+        for action, visits, wins in statistics:
+            action = tuple(action)
+            child = children.get(action)
+            if child is None:
+                child = root.new_child(action, self.get_transposition_table())
+                root.children.append(child)
+                self.node_count += 1
+                # 渐进展开时不再重复添加该位置
+                if root.untried_actions is not None and action in root.untried_actions:
+                    root.untried_actions.remove(action)
+            child.visits += visits
+            child.wins += wins
+            root.visits += visits
+        return True
+
+    def tree_size(self):
+        """当前树中的节点数量"""
+        count = 0
+        nodes = [self.root_node]
+        while nodes:
+            node = nodes.pop()
+            count += 1
+            nodes.extend(node.children)
+        return count
+
+    def set_root(self, node: MCTSNode):
+        """
+        将node设置为根节点并与原来的树断开, 保留node的子树及其统计以便下一次搜索复用
+        """
+        node.parent = None
+        # 模拟得到的胜利者只是一次模拟的结果, 作为根节点时需要继续扩展
+        if not node.state.game_over:
+            node.if_winner = None
+        self.root_node = node
+
+    def advance(self, action, state):
+        """
+        对手执行action后推进根节点: 存在对应子节点时下降到该子节点, 否则以state重新建立根节点
+
+        参数:
+            action: 对手的落子
+            state: 对手落子后的棋盘状态, 仅在没有对应子节点时使用
+
+        返回:
+            是否复用了已有的子树
+        """
+        for child in self.root_node.children:
+            if child.move[1] == action:
+                self.set_root(child)
+                return True
+        self.root_node = MCTSNode(state, move=state.last_move)
+        return False
+
 
 if __name__ == "__main__":
     # board = [[2, 0, 0, 0, 0, 0],
@@ -249,5 +724,6 @@ if __name__ == "__main__":
     game.set(board=board, size=6)
     node = MCTSNode(game, move=(2, (2, 1)))
     s = MCTSTree(node)
+    logging.basicConfig(level=logging.INFO)
     print(s.model(print_simulation_result=True))
 
@@ -0,0 +1,158 @@
+import os
+import gzip
+import json
+import logging
+import argparse
+import numpy as np
+from MCTS.GomokuEnv import GomokuGame
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+
+logger = logging.getLogger(__name__)
+
+# 棋盘的8种对称变换(二面体群), (k, flip)表示先逆时针旋转k次90度, flip为True时再转置
+SYMMETRIES = [(k, flip) for flip in (False, True) for k in range(4)]
+
+# 按文件路径缓存已加载的开局库, 见get_opening_book
+_BOOK_CACHE = {}
+
+
+def transform_board(board, symmetry):
+    k, flip = symmetry
+    board = np.rot90(board, k)
+    return board.T if flip else board
+
+
+def transform_point(point, size, symmetry):
+    """返回point在棋盘经过symmetry变换后的位置, 与transform_board一致"""
+    k, flip = symmetry
+    x, y = int(point[0]), int(point[1])
+    for _ in range(k):
+        # np.rot90逆时针旋转: 原(x, y)移动到(size - 1 - y, x)
+        x, y = size - 1 - y, x
+    return (y, x) if flip else (x, y)
+
+
+def inverse_point(point, size, symmetry):
+    """transform_point的逆变换"""
+    k, flip = symmetry
+    x, y = int(point[0]), int(point[1])
+    if flip:
+        x, y = y, x
+    for _ in range(k):
+        x, y = y, size - 1 - x
+    return x, y
+
+
+def encode_board(board):
+    """将棋盘按行优先的三进制编码为一个整数"""
+    code = 0
+    for value in np.asarray(board).reshape(-1):
+        code = code * 3 + int(value)
+    return code
+
+
+def canonicalize(board, player):
+    """
+    将局面变换为8种对称形式中编码最小的一种, 对称的局面得到相同的键
+
+    返回:
+        (key, symmetry), key为"玩家:十六进制编码", symmetry为从board到标准形式的变换
+    """
+    best = None
+    for symmetry in SYMMETRIES:
+        code = encode_board(transform_board(board, symmetry))
+        if best is None or code < best[0]:
+            best = (code, symmetry)
+    return f'{player}:{best[0]:x}', best[1]
+
+
+class OpeningBook:
+    """
+    开局库: 以标准化后的局面为键保存最优落子(同样为标准形式下的坐标), 查询时再变换回原棋盘的坐标
+    以gzip压缩的JSON保存, 格式为{"size": 10, "moves": {key: [x, y]}}
+    """
+
+    def __init__(self, size=10):
+        self.size = size
+        self.moves = {}
+
+    def __len__(self):
+        return len(self.moves)
+
+    def add(self, board, player, action):
+        key, symmetry = canonicalize(board, player)
+        self.moves[key] = transform_point(action, self.size, symmetry)
+
+    def lookup(self, board, player):
+        """返回局面在开局库中的落子, 不在开局库中时返回None"""
+        if len(self.moves) == 0 or np.shape(board) != (self.size, self.size):
+            return None
+        key, symmetry = canonicalize(board, player)
+        action = self.moves.get(key)
+        if action is None:
+            return None
+        return inverse_point(action, self.size, symmetry)
+
+    def save(self, path):
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump({'size': self.size, 'moves': {key: list(action) for key, action in self.moves.items()}}, f)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        book = cls(data['size'])
+        book.moves = {key: tuple(action) for key, action in data['moves'].items()}
+        return book
+
+
+def get_opening_book(path, size=10):
+    """加载path处的开局库, 同一路径只加载一次, 文件不存在时返回空的开局库"""
+    if path not in _BOOK_CACHE:
+        _BOOK_CACHE[path] = OpeningBook.load(path) if os.path.exists(path) else OpeningBook(size)
+    return _BOOK_CACHE[path]
+
+
+def generate_book(size=10, plies=4, simulation_times=5000, replies=3, only_nearby=True):
+    """
+    离线生成开局库: 从空棋盘开始(双方都可能先手), 对棋子数少于plies的每个局面用长时间的MCTS搜索最优落子,
+    并按访问次数取前replies个落子继续展开, 对称的局面只搜索一次
+    """
+    book = OpeningBook(size)
+    positions = []
+    for player in (1, 2):
+        game = GomokuGame(size)
+        game.current_player = player
+        positions.append(game)
+    while positions:
+        game = positions.pop()
+        key, _ = canonicalize(game.board, game.current_player)
+        if key in book.moves:
+            continue
+        tree = MCTSTree(MCTSNode(BitboardGame.from_game(game), move=game.last_move))
+        tree.SIMULATION_TIMES = simulation_times
+        tree.ONLY_NEARBY = only_nearby
+        root = tree.root_node
+        action = tree.model()[1]
+        book.add(game.board, game.current_player, action)
+        logger.info('%d: 棋子数%d 落子%s', len(book), int(np.count_nonzero(game.board)), action)
+        if np.count_nonzero(game.board) + 1 >= plies:
+            continue
+        for child in sorted(root.children, key=lambda node: node.visits, reverse=True)[:replies]:
+            next_game = game.copy()
+            next_game.step(child.move[1])
+            positions.append(next_game)
+    return book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='离线生成开局库')
+    parser.add_argument('--size', type=int, default=10)
+    parser.add_argument('--plies', type=int, default=4, help='开局库覆盖的最大棋子数')
+    parser.add_argument('--simulations', type=int, default=5000, help='每个局面的模拟次数')
+    parser.add_argument('--replies', type=int, default=3, help='每个局面继续展开的落子数量')
+    parser.add_argument('--output', default='opening_book.json.gz')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    generate_book(args.size, args.plies, args.simulations, args.replies).save(args.output)
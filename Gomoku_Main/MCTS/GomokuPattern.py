@@ -0,0 +1,100 @@
+from itertools import product
+
+# 棋型分类
+FIVE = 'five'  # 五连 XXXXX
+OPEN_FOUR = 'open_four'  # 活四 _XXXX_
+FOUR = 'four'  # 冲四 XXXX_
+BROKEN_FOUR = 'broken_four'  # 跳四 XX_XX X_XXX
+OPEN_THREE = 'open_three'  # 活三 _XXX__
+BROKEN_THREE = 'broken_three'  # 跳活三 _XX_X_
+THREE = 'three'  # 眠三 5格内3子2空, 例如 XXX__ X_X_X
+THREAT_CLASSES = [FIVE, OPEN_FOUR, FOUR, BROKEN_FOUR, OPEN_THREE, BROKEN_THREE, THREE]
+
+# 按棋盘大小缓存所有窗口, 见get_windows
+_WINDOW_CACHE = {}
+
+
+def classify_window(values):
+    """
+    判断一个窗口的棋型
+
+    参数:
+        values: 窗口内各格的棋子, 长度为5或6, 0表示空位
+
+    返回:
+        (player, threat_class, offsets), offsets为窗口内的应对点(落子即可成棋或堵住棋型的位置),
+        窗口内没有棋型或同时有双方棋子时返回None
+    """
+    players = set(values) - {0}
+    if len(players) != 1:
+        return None
+    player = players.pop()
+    empties = tuple(k for k, v in enumerate(values) if v == 0)
+
+    if len(values) == 5:
+        if len(empties) == 0:
+            return player, FIVE, ()
+        if len(empties) == 1:
+            # 空位在两端为冲四, 在中间为跳四, 应对点都是这个空位
+            threat_class = FOUR if empties[0] in (0, 4) else BROKEN_FOUR
+            return player, threat_class, empties
+        if len(empties) == 2:
+            return player, THREE, empties
+        return None
+
+    # 长度为6的窗口只用于识别活棋型, 要求两端为空
+    if values[0] != 0 or values[5] != 0:
+        return None
+    inner_empties = tuple(k for k in empties if 0 < k < 5)
+    if len(inner_empties) == 0:
+        return player, OPEN_FOUR, (0, 5)
+    if len(inner_empties) == 1:
+        # 中间的空位落子后形成活四
+        threat_class = OPEN_THREE if inner_empties[0] in (1, 4) else BROKEN_THREE
+        return player, threat_class, inner_empties
+    return None
+
+
+def build_table(length):
+    """
+    预先计算长度为length的窗口所有取值对应的棋型
+    窗口按三进制编码, 第k格的棋子v贡献 v * 3 ** k
+    """
+    table = [None] * (3 ** length)
+    for values in product(range(3), repeat=length):
+        code = sum(v * 3 ** k for k, v in enumerate(values))
+        table[code] = classify_window(values)
+    return table
+
+
+TABLE5 = build_table(5)
+TABLE6 = build_table(6)
+
+
+def get_windows(size):
+    """
+    获取棋盘上所有横、竖、斜、反斜方向上长度为5和6的窗口
+
+    返回:
+        windows: 每个窗口内按顺序排列的坐标
+        tables: 每个窗口对应的查找表(TABLE5或TABLE6)
+        cell_windows: cell_windows[x * size + y]为经过(x, y)的所有(窗口编号, 该格的三进制权重)
+    """
+    if size not in _WINDOW_CACHE:
+        windows = []
+        tables = []
+        cell_windows = [[] for _ in range(size * size)]
+        for length, table in [(5, TABLE5), (6, TABLE6)]:
+            for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]:  # 横、竖、斜、反斜
+                for x in range(size):
+                    for y in range(size):
+                        end_x, end_y = x + dx * (length - 1), y + dy * (length - 1)
+                        if not (0 <= end_x < size and 0 <= end_y < size):
+                            continue
+                        window = tuple((x + dx * k, y + dy * k) for k in range(length))
+                        for k, (px, py) in enumerate(window):
+                            cell_windows[px * size + py].append((len(windows), 3 ** k))
+                        windows.append(window)
+                        tables.append(table)
+        _WINDOW_CACHE[size] = (windows, tables, cell_windows)
+    return _WINDOW_CACHE[size]
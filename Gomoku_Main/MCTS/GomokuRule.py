@@ -1,154 +1,156 @@
 import random
-import numpy as np
 from MCTS.GomokuEnv import GomokuGame
+from MCTS.GomokuPattern import (get_windows, THREAT_CLASSES, OPEN_FOUR, FOUR, BROKEN_FOUR, OPEN_THREE,
+                                BROKEN_THREE, THREE)
+
+
+class ThreatIndex:
+    """
+    增量维护的棋型索引
+    棋盘上所有长度为5和6的窗口按三进制编码, 通过GomokuPattern中预先计算的查找表得到棋型,
+    落子或悔棋后只需更新经过该点的窗口, RuleStrategy查询棋型时直接读取索引, 不再扫描整个棋盘
+    """
+
+    def __init__(self, game_env: GomokuGame):
+        self.game_env = game_env
+        self.size = game_env.size
+        self.windows, self.tables, self.cell_windows = get_windows(self.size)
+        self.codes = [0] * len(self.windows)
+        self.window_patterns = [None] * len(self.windows)
+        self.cells = [0] * (self.size * self.size)
+        # threats[player][threat_class]: 窗口编号 -> 查找表中的棋型
+        self.threats = {player: {threat_class: {} for threat_class in THREAT_CLASSES} for player in (1, 2)}
+        for player in (1, 2):
+            for x, y in game_env.get_player_points(player):
+                self.update((x, y))
+
+    def update(self, action):
+        """在action处落子或悔棋后调用, 更新经过该点的窗口"""
+        x, y = action
+        cell = x * self.size + y
+        value = int(self.game_env.get_point(x, y))
+        delta = value - self.cells[cell]
+        if delta == 0:
+            return
+        self.cells[cell] = value
+        for window_id, weight in self.cell_windows[cell]:
+            code = self.codes[window_id] + delta * weight
+            self.codes[window_id] = code
+            pattern = self.tables[window_id][code]
+            previous = self.window_patterns[window_id]
+            if pattern is previous:
+                continue
+            if previous is not None:
+                del self.threats[previous[0]][previous[1]][window_id]
+            if pattern is not None:
+                self.threats[pattern[0]][pattern[1]][window_id] = pattern
+            self.window_patterns[window_id] = pattern
+
+    def has_threat(self, player, threat_class):
+        return len(self.threats[player][threat_class]) > 0
+
+    def find(self, player, threat_class):
+        """遍历玩家某一棋型的所有窗口, 每个窗口返回其应对点列表"""
+        for window_id, (_, _, offsets) in self.threats[player][threat_class].items():
+            window = self.windows[window_id]
+            yield [window[k] for k in offsets]
+
+    def first_point(self, player, threat_classes):
+        """按threat_classes的顺序返回第一个匹配棋型的第一个应对点, 没有时返回None"""
+        for threat_class in threat_classes:
+            for points in self.find(player, threat_class):
+                return points[0]
+        return None
 
 
 class RuleStrategy:
     """
     基于规则的模型
-    (1)当我方有4个棋子相连且一头为空时,落到其中一头
-    (2)当对手有4个棋子相连且一头为空时,堵住连珠
-    (3)当我方有3个棋子相连且两头为空时,落到其中一头.优先落到连续空位置大于1的一头(例如OOXXXO,X表示棋子,O表示空位置,应该落到左侧),如果都是1个空位置则任选一头
-    (4)当对手有3个棋子相连且两头为空,落到其中一头.其中至少有一头的空位置大于1,否则没必要堵住(例如OXXXO)
+    (1)当我方有冲四或跳四(例如XXXX_, XX_XX, X表示棋子, _表示空位置)时,落子成五
+    (2)当对手有冲四或跳四时,堵住成五的位置
+    (3)当我方有活三或跳活三(例如_XXX__, _XX_X_)时,落子形成活四;否则有眠三时,落子形成冲四
+    (4)当对手有活三或跳活三时,堵住其形成活四的位置
     (5)不符合上述所有情况,则随机选择位置（靠近棋盘中心）
     """
 
-    def __init__(self, game_env: GomokuGame):
+    def __init__(self, game_env: GomokuGame, threat_index: ThreatIndex = None, rule_hits=None):
         self.game_env: GomokuGame = game_env
-        # 当前行动的玩家
-        self.player = game_env.current_player
-        self.rival = 3 - game_env.current_player
+        # 模拟时由调用方持有索引并在每次落子后更新, 否则根据当前棋盘新建
+        self.threat_index = threat_index if threat_index is not None else ThreatIndex(game_env)
+        # 传入字典时记录各规则给出落子的次数, 见GomokuStats.SearchStats
+        self.rule_hits = rule_hits
+
+    @property
+    def player(self):
+        """当前行动的玩家"""
+        return self.game_env.current_player
+
+    @property
+    def rival(self):
+        return 3 - self.game_env.current_player
 
     def get_empty_positions(self):
         """获取所有空位置"""
-        return np.argwhere(self.game_env.board == 0)
-
-    def check_line_for_pattern(self, x, y, dx, dy):
-        """检查指定方向上的连线模式"""
-        count, positions = self.game_env.check_line(x, y, dx, dy)
-
-        # 检查两端空位
-        left_empty = 0
-        left_positions = []
-        right_empty = 0
-        right_positions = []
-
-        # 左端检查
-        l1 = (positions[0][0] - dx, positions[0][1] - dy)
-        if self.game_env.check_boarder(l1) and self.game_env.check_point_empty(l1):
-            left_empty += 1
-            left_positions.append(l1)
-            # 继续向左检查连续空位
-            temp_x, temp_y = positions[0][0] - dx, positions[0][1] - dy
-            while self.game_env.check_boarder((temp_x, temp_y)) and self.game_env.check_point_empty((temp_x, temp_y)):
-                left_empty += 1
-                left_positions.append((temp_x, temp_y))
-                temp_x -= dx
-                temp_y -= dy
-
-        # 右端检查
-        r1 = (positions[-1][0] + dx, positions[-1][1] + dy)
-        if self.game_env.check_boarder(r1) and self.game_env.check_point_empty(r1):
-            right_empty += 1
-            right_positions.append(r1)
-            # 继续向右检查连续空位
-            temp_x, temp_y = positions[-1][0] + dx, positions[-1][1] + dy
-            while self.game_env.check_boarder((temp_x, temp_y)) and self.game_env.check_point_empty((temp_x, temp_y)):
-                right_empty += 1
-                right_positions.append((temp_x, temp_y))
-                temp_x += dx
-                temp_y += dy
-
-        return count, left_empty, right_empty, positions, left_positions, right_positions
-
-    def find_pattern(self, player, n):
-        """查找符合n连珠模式的所有位置"""
-        patterns = []
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]  # 横、竖、斜、反斜
-
-        for x in range(self.game_env.size):
-            for y in range(self.game_env.size):
-                if self.game_env.board[x, y] != player:
-                    continue
-
-                for dx, dy in directions:
-                    res = self.check_line_for_pattern(x, y, dx, dy)
-
-                    if res[0] == n:
-                        patterns.append(res)
-
-        return patterns
-
-    def rule1(self, n=4):
-        """规则1: 当我方有4个棋子相连且一头为空时,落到其中一头"""
+        return self.game_env.get_empty_points()
+
+    def rule1(self):
+        """规则1: 当我方有冲四或跳四(例如XX_XX)时,落子成五"""
         if self.player is None:
             return None
+        return self.threat_index.first_point(self.player, [FOUR, BROKEN_FOUR])
 
-        patterns = self.find_pattern(self.player, n)
-
-        for count, left_empty, right_empty, positions, left_positions, right_positions in patterns:
-            if left_empty > 0 or right_empty > 0:
-                # 优先选择空位更多的一端
-                if left_empty > right_empty:
-                    return left_positions[0]
-                else:
-                    return right_positions[0]
-
-        return None
-
-    def rule2(self, n=4):
-        """规则2: 当对手有4个棋子相连且一头为空时,堵住连珠"""
+    def rule2(self):
+        """规则2: 当对手有冲四或跳四时,堵住成五的位置"""
         if self.player is None:
             return None
+        return self.threat_index.first_point(self.rival, [FOUR, BROKEN_FOUR])
 
-        patterns = self.find_pattern(self.rival, n)
-
-        for count, left_empty, right_empty, positions, left_positions, right_positions in patterns:
-            if left_empty > 0 or right_empty > 0:
-                # 优先选择空位更多的一端
-                if left_empty > right_empty:
-                    return left_positions[0]
-                else:
-                    return right_positions[0]
-
-        return None
-
-    def rule3(self, n=3):
-        """规则3: 当我方有3个棋子相连且两头为空时,落到其中一头.优先落到连续空位置更多的一头"""
+    def rule3(self):
+        """规则3: 当我方有活三或跳活三时,落子形成活四;否则有眠三时,任选一个空位形成冲四"""
         if self.player is None:
             return None
 
-        patterns = self.find_pattern(self.player, n)
-
-        for count, left_empty, right_empty, positions, left_positions, right_positions in patterns:
-            if left_empty > 0 or right_empty > 0:
-                # 优先选择空位更多的一端
-                if left_empty > right_empty:
-                    return left_positions[0]
-                elif right_empty > left_empty:
-                    return right_positions[0]
-                else:
-                    return random.choice([left_positions[0], right_positions[0]])
+        res = self.threat_index.first_point(self.player, [OPEN_THREE, BROKEN_THREE])
+        if res is not None:
+            return res
+        for points in self.threat_index.find(self.player, THREE):
+            return random.choice(points)
 
         return None
 
-    def rule4(self, n=3):
-        """规则4: 当对手有3个棋子相连且两头为空,落到其中一头.其中至少有一头的空位置大于0"""
+    def rule4(self):
+        """规则4: 当对手有活三或跳活三(两头为空)时,堵住其形成活四的位置"""
         if self.player is None:
             return None
-
-        patterns = self.find_pattern(self.rival, n)
-
-        for count, left_empty, right_empty, positions, left_positions, right_positions in patterns:
-            # 检查是否已经堵住至少一端
-            if left_empty > 0 and right_empty > 0:
-                # 优先选择空位更多的一端
-                if left_empty > right_empty:
-                    return left_positions[0]
-                else:
-                    return right_positions[0]
-
-        return None
+        return self.threat_index.first_point(self.rival, [OPEN_THREE, BROKEN_THREE])
+
+    def rank_actions(self, actions):
+        """
+        按优先级从高到低排序actions, 用于渐进展开
+        优先级依次为: 规则1(我方成五)、规则2(堵对方的五)、规则3(我方成活四)、规则4(堵对方的活四)、我方眠三成冲四,
+        同一优先级内周围8格已有棋子越多越靠前
+        """
+        scores = {}
+        for score, player, threat_classes in [(5, self.player, [OPEN_FOUR, FOUR, BROKEN_FOUR]),
+                                              (4, self.rival, [OPEN_FOUR, FOUR, BROKEN_FOUR]),
+                                              (3, self.player, [OPEN_THREE, BROKEN_THREE]),
+                                              (2, self.rival, [OPEN_THREE, BROKEN_THREE]),
+                                              (1, self.player, [THREE])]:
+            for threat_class in threat_classes:
+                for points in self.threat_index.find(player, threat_class):
+                    for point in points:
+                        scores[point] = max(scores.get(point, 0), score)
+
+        size = self.game_env.size
+        cells = self.threat_index.cells
+
+        def neighbors(point):
+            x, y = point
+            return sum(cells[i * size + j] != 0
+                       for i in range(max(x - 1, 0), min(x + 2, size))
+                       for j in range(max(y - 1, 0), min(y + 2, size)))
+
+        return sorted(actions, key=lambda point: (scores.get(tuple(point), 0), neighbors(point)), reverse=True)
 
     def rule5(self):
         """规则5: 随机选择位置（偏向棋盘中心）"""
@@ -192,5 +194,7 @@ class RuleStrategy:
                 # 检查位置是否有效
                 x, y = res
                 if self.game_env.check_boarder((x, y)) and self.game_env.check_point_empty((x, y)):
+                    if self.rule_hits is not None:
+                        self.rule_hits[rule.__name__] = self.rule_hits.get(rule.__name__, 0) + 1
                     return res
 
@@ -0,0 +1,82 @@
+PHASES = ['selection', 'expansion', 'simulation', 'backpropagation']
+
+
+class SearchStats:
+    """
+    一次搜索的统计: 各阶段耗时、模拟长度、新建节点数、树的大小、规则命中次数
+    搜索树的INSTRUMENT为True时每次model()新建并填写, 多次搜索的统计可以用merge累加
+    """
+
+    def __init__(self):
+        self.searches = 0  # 累加的搜索次数
+        self.simulations = 0
+        self.elapsed = 0.0  # 秒
+        self.phase_time = {phase: 0.0 for phase in PHASES}
+        self.rollouts = 0  # 实际进行的模拟次数, 不包括已分出胜负的节点
+        self.rollout_steps = 0
+        self.max_rollout_steps = 0
+        self.nodes_created = 0
+        self.tree_size = 0  # 搜索结束时树中的节点数量, 累加时取最大值
+        self.rule_hits = {}  # RuleStrategy中各规则给出落子的次数
+
+    def add_phases(self, selection, expansion, simulation, backpropagation):
+        self.phase_time['selection'] += selection
+        self.phase_time['expansion'] += expansion
+        self.phase_time['simulation'] += simulation
+        self.phase_time['backpropagation'] += backpropagation
+
+    def add_rollout(self, steps):
+        self.rollouts += 1
+        self.rollout_steps += steps
+        if steps > self.max_rollout_steps:
+            self.max_rollout_steps = steps
+
+    def finish(self, simulations, elapsed, nodes_created, tree_size):
+        self.searches += 1
+        self.simulations += simulations
+        self.elapsed += elapsed
+        self.nodes_created += nodes_created
+        self.tree_size = tree_size
+
+    def merge(self, other):
+        self.searches += other.searches
+        self.simulations += other.simulations
+        self.elapsed += other.elapsed
+        for phase in PHASES:
+            self.phase_time[phase] += other.phase_time[phase]
+        self.rollouts += other.rollouts
+        self.rollout_steps += other.rollout_steps
+        self.max_rollout_steps = max(self.max_rollout_steps, other.max_rollout_steps)
+        self.nodes_created += other.nodes_created
+        self.tree_size = max(self.tree_size, other.tree_size)
+        for rule, count in other.rule_hits.items():
+            self.rule_hits[rule] = self.rule_hits.get(rule, 0) + count
+
+    def to_dict(self):
+        """转换为可以JSON序列化的字典, 同时给出每秒模拟次数、每秒新建节点数和平均模拟长度"""
+        elapsed = self.elapsed
+        return {
+            'searches': self.searches,
+            'simulations': self.simulations,
+            'elapsed': self.elapsed,
+            'simulations_per_sec': self.simulations / elapsed if elapsed > 0 else 0.0,
+            'nodes_per_sec': self.nodes_created / elapsed if elapsed > 0 else 0.0,
+            'phase_time': dict(self.phase_time),
+            'rollouts': self.rollouts,
+            'rollout_steps': self.rollout_steps,
+            'mean_rollout_steps': self.rollout_steps / self.rollouts if self.rollouts else 0.0,
+            'max_rollout_steps': self.max_rollout_steps,
+            'nodes_created': self.nodes_created,
+            'tree_size': self.tree_size,
+            'rule_hits': dict(self.rule_hits),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for key in ['searches', 'simulations', 'elapsed', 'rollouts', 'rollout_steps', 'max_rollout_steps',
+                    'nodes_created', 'tree_size']:
+            setattr(stats, key, data[key])
+        stats.phase_time = dict(data['phase_time'])
+        stats.rule_hits = dict(data['rule_hits'])
+        return stats
@@ -0,0 +1,305 @@
+import time
+from itertools import product
+from contextlib import contextmanager
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuRule import ThreatIndex
+from MCTS.GomokuPattern import (classify_window, TABLE6, OPEN_FOUR, FOUR, BROKEN_FOUR, OPEN_THREE, BROKEN_THREE,
+                                THREE)
+
+# 对应点落子即可成五的棋型
+FIVE_THREATS = [OPEN_FOUR, FOUR, BROKEN_FOUR]
+# 对应点落子即可形成活四的棋型
+OPEN_FOUR_THREATS = [OPEN_THREE, BROKEN_THREE]
+# model()中VCF和VCT各自最多使用的剩余预算比例, 其余留给防守对手的VCF
+VCF_SHARE = 1 / 3
+VCT_SHARE = 1 / 2
+
+
+def build_three_table():
+    """
+    预先计算长度为6的窗口中落子后形成活三或跳活三的位置, 编码方式与GomokuPattern.build_table相同
+    table[code]为[(player, offset), ...]
+    """
+    table = [[] for _ in range(3 ** 6)]
+    for values in product(range(3), repeat=6):
+        code = sum(v * 3 ** k for k, v in enumerate(values))
+        for k in range(1, 5):
+            if values[k] != 0:
+                continue
+            for player in (1, 2):
+                result = classify_window(values[:k] + (player,) + values[k + 1:])
+                if result is not None and result[0] == player and result[1] in OPEN_FOUR_THREATS:
+                    table[code].append((player, k))
+    return table
+
+
+THREE_TABLE = build_three_table()
+
+
+class SearchLimitReached(Exception):
+    """搜索的节点数量或时间超过限制"""
+    pass
+
+
+class ThreatSpaceSearch:
+    """
+    威胁空间搜索, 判断当前玩家能否通过连续冲四(VCF)或连续冲四、活三(VCT)取胜
+    进攻方每一步都必须形成威胁, 防守方只考虑能够化解威胁的落子, 因此搜索范围远小于全部空位
+    搜索在位棋盘上落子和悔棋, 同时增量更新棋型索引, 结束后棋盘和索引都会还原
+    """
+
+    def __init__(self, game_env, threat_index: ThreatIndex = None, max_nodes=10000, time_limit=None):
+        """
+        参数:
+            game_env: 棋盘状态, 不是BitboardGame时复制为位棋盘
+            threat_index: game_env对应的棋型索引, 模拟中已经维护了索引时可以直接传入
+            max_nodes: 每次搜索最多访问的节点数量, model()和defend_vcf()中的所有搜索共用
+            time_limit: 每次搜索的时间限制(秒), None为不限制, 同样由model()和defend_vcf()中的所有搜索共用
+        """
+        if not isinstance(game_env, BitboardGame):
+            game_env = BitboardGame.from_game(game_env)
+            threat_index = None
+        self.game_env = game_env
+        self.threat_index = threat_index if threat_index is not None else ThreatIndex(game_env)
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.nodes = 0
+        self.node_limit = max_nodes
+        self.deadline = None
+        self.shared = False  # 为True时各次搜索共用begin()设置的预算
+
+    def points(self, player, threat_classes):
+        """玩家在threat_classes棋型中所有的应对点"""
+        result = set()
+        for threat_class in threat_classes:
+            for points in self.threat_index.find(player, threat_class):
+                result.update(points)
+        return result
+
+    def window_points(self, player, threat_classes):
+        """玩家threat_classes棋型所在窗口内的所有空位"""
+        result = set()
+        index = self.threat_index
+        for threat_class in threat_classes:
+            for window_id in index.threats[player][threat_class]:
+                for x, y in index.windows[window_id]:
+                    if index.cells[x * index.size + y] == 0:
+                        result.add((x, y))
+        return result
+
+    def open_three_points(self, player):
+        """玩家落子后能形成活三或跳活三的所有空位"""
+        result = set()
+        index = self.threat_index
+        for window_id, window in enumerate(index.windows):
+            if index.tables[window_id] is not TABLE6:
+                continue
+            for owner, k in THREE_TABLE[index.codes[window_id]]:
+                if owner == player:
+                    result.add(window[k])
+        return result
+
+    def threatens(self, action, player, threat_classes):
+        """经过action的窗口中是否有玩家threat_classes中的棋型, 即action处的落子是否形成了新的威胁"""
+        x, y = action
+        index = self.threat_index
+        for window_id, _ in index.cell_windows[x * index.size + y]:
+            pattern = index.window_patterns[window_id]
+            if pattern is not None and pattern[0] == player and pattern[1] in threat_classes:
+                return True
+        return False
+
+    def begin(self):
+        """开始计算预算: 之后最多访问max_nodes个节点, 用time_limit秒"""
+        self.nodes = 0
+        self.node_limit = self.max_nodes
+        self.deadline = time.monotonic() + self.time_limit if self.time_limit is not None else None
+
+    @contextmanager
+    def session(self):
+        """with中的所有搜索共用一份预算, 已经在共用预算时不重新开始"""
+        if self.shared:
+            yield
+            return
+        self.begin()
+        self.shared = True
+        try:
+            yield
+        finally:
+            self.shared = False
+
+    @contextmanager
+    def budget(self, fraction):
+        """with中只使用剩余节点数量和剩余时间的fraction, 避免一次搜索用完之后的搜索的预算"""
+        node_limit, deadline = self.node_limit, self.deadline
+        self.node_limit = self.nodes + int(max(node_limit - self.nodes, 0) * fraction)
+        if deadline is not None:
+            self.deadline = time.monotonic() + max(deadline - time.monotonic(), 0) * fraction
+        try:
+            yield
+        finally:
+            self.node_limit, self.deadline = node_limit, deadline
+
+    def play(self, action):
+        self.nodes += 1
+        if self.nodes > self.node_limit or (self.deadline is not None and time.monotonic() > self.deadline):
+            raise SearchLimitReached()
+        self.game_env.make_move(action)
+        self.threat_index.update(action)
+
+    def undo(self, action):
+        self.game_env.unmake_move()
+        self.threat_index.update(action)
+
+    def search(self, allow_three, depth):
+        """
+        当前玩家进攻, 返回取胜的第一步落子, 证明不了时返回None
+        allow_three为False时只搜索VCF, 否则还允许进攻方用活三进攻(VCT)
+        """
+        attacker = self.game_env.current_player
+        defender = 3 - attacker
+        # 我方已有成五点, 直接取胜
+        five_points = self.points(attacker, FIVE_THREATS)
+        if len(five_points) > 0:
+            return min(five_points)
+        if depth <= 0:
+            return None
+        # 对方有成五点时必须先堵, 堵的落子本身也要形成威胁才能继续进攻
+        defender_fives = self.points(defender, FIVE_THREATS)
+        if len(defender_fives) > 1:
+            return None
+        threat_classes = FIVE_THREATS + OPEN_FOUR_THREATS if allow_three else FIVE_THREATS
+        if len(defender_fives) == 1:
+            candidates = defender_fives
+        else:
+            # 形成冲四或活四的位置, VCT还包括形成活三的位置
+            candidates = self.points(attacker, [THREE] + OPEN_FOUR_THREATS)
+            if allow_three:
+                candidates |= self.open_three_points(attacker)
+
+        for action in sorted(candidates):
+            self.play(action)
+            try:
+                if self.game_env.winner == attacker:
+                    return action
+                if self.threatens(action, attacker, threat_classes) and self.defend(allow_three, depth):
+                    return action
+            finally:
+                self.undo(action)
+        return None
+
+    def defend(self, allow_three, depth):
+        """
+        进攻方落子后轮到防守方, 返回进攻方是否对防守方所有能化解威胁的落子都能继续取胜
+        """
+        defender = self.game_env.current_player
+        attacker = 3 - defender
+        five_points = self.points(attacker, FIVE_THREATS)
+        if len(five_points) > 1:
+            # 防守方无法同时堵住两个成五点, 除非自己能先成五
+            return len(self.points(defender, FIVE_THREATS)) == 0
+        if len(five_points) == 1:
+            if len(self.points(defender, FIVE_THREATS)) > 0:
+                return False
+            defences = five_points
+        else:
+            # 没有形成四时进攻方形成了活三, 防守方可以堵活三或者冲四反击
+            if not allow_three or len(self.points(defender, FIVE_THREATS)) > 0:
+                return False
+            defences = self.window_points(attacker, OPEN_FOUR_THREATS)
+            defences |= self.points(defender, [THREE] + OPEN_FOUR_THREATS)
+
+        for action in sorted(defences):
+            self.play(action)
+            try:
+                if self.game_env.winner == defender or self.search(allow_three, depth - 1) is None:
+                    return False
+            finally:
+                self.undo(action)
+        return True
+
+    def deepen(self, allow_three, depth):
+        """
+        逐步加深搜索, 优先找到步数最少的取胜方法, depth以内没有时返回None, 超过限制时抛出SearchLimitReached
+        """
+        if self.game_env.game_over:
+            return None
+        for d in range(1, depth + 1):
+            action = self.search(allow_three, d)
+            if action is not None:
+                return action
+        return None
+
+    def solve(self, allow_three, depth):
+        """
+        在节点数量和时间限制内逐步加深搜索, 没有找到或超过限制时都返回None
+        不在共用预算中时每次调用重新开始计算预算
+        """
+        if not self.shared:
+            self.begin()
+        try:
+            return self.deepen(allow_three, depth)
+        except SearchLimitReached:
+            return None
+
+    def vcf(self, depth=12):
+        """当前玩家通过连续冲四取胜的第一步, 没有找到时返回None"""
+        return self.solve(False, depth)
+
+    def vct(self, depth=6):
+        """当前玩家通过连续冲四或活三取胜的第一步, 没有找到时返回None"""
+        return self.solve(True, depth)
+
+    def rival_vcf(self, depth=12):
+        """假设轮到对手落子时, 对手能否通过连续冲四取胜"""
+        env = self.game_env
+        env.current_player = 3 - env.current_player
+        try:
+            return self.vcf(depth)
+        finally:
+            env.current_player = 3 - env.current_player
+
+    def defend_vcf(self, candidates, depth=12):
+        """
+        对手存在VCF时, 在candidates中寻找落子后对手不再有VCF的位置, 对手VCF的第一步优先尝试
+        每个位置最多使用剩余预算的一份(对手VCF的第一步为一半), 预算内不能确认对手没有VCF的位置跳过
+        对手没有VCF或找不到这样的位置时返回None
+        """
+        with self.session():
+            with self.budget(VCT_SHARE):
+                threat = self.rival_vcf(depth)
+            if threat is None:
+                return None
+            actions = [threat] + [point for point in candidates if point != threat]
+            for i, action in enumerate(actions):
+                with self.budget(VCT_SHARE if i == 0 else 1 / (len(actions) - i)):
+                    try:
+                        self.play(action)
+                    except SearchLimitReached:
+                        continue
+                    try:
+                        if self.game_env.game_over or self.deepen(False, depth) is None:
+                            return action
+                    except SearchLimitReached:
+                        continue
+                    finally:
+                        self.undo(action)
+        return None
+
+    def model(self, candidates=None):
+        """
+        依次尝试VCF取胜、VCT取胜、防守对手的VCF, 返回找到的落子, 都没有时返回None
+        candidates为防守时考虑的落子位置, 默认为已有棋子周围2格以内的空位
+        所有搜索共用max_nodes个节点和time_limit秒, VCF和VCT只使用其中一部分, 见VCF_SHARE和VCT_SHARE
+        """
+        with self.session():
+            with self.budget(VCF_SHARE):
+                action = self.vcf()
+            if action is None:
+                with self.budget(VCT_SHARE):
+                    action = self.vct()
+            if action is None:
+                if candidates is None:
+                    candidates = self.game_env.get_nearby_points(n=2)
+                action = self.defend_vcf(candidates)
+        return action
@@ -0,0 +1,38 @@
+import sys
+import json
+import argparse
+from benchmark.suite import run_benchmarks, compare
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description='五子棋引擎基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', help='棋盘大小, 默认10 15 19')
+    parser.add_argument('--quick', action='store_true', help='减少重复次数, 快速检查')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--simulations', type=int, help='MCTSTree.model每个局面的模拟次数')
+    parser.add_argument('--output', help='结果保存为JSON的路径')
+    parser.add_argument('--baseline', help='与之比较的基准结果JSON')
+    parser.add_argument('--threshold', type=float, default=0.1, help='变差超过该比例视为退化')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.quick, args.seed, args.simulations)
+    for name, result in report['results'].items():
+        print(f"{name:32s} {result['value']:14.3f} {result['unit']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        print()
+        for name, base, current, change, regressed in rows:
+            print(f"{name:32s} {base:14.3f} -> {current:14.3f} {change:+8.1%}{'  退化' if regressed else ''}")
+        # 有退化时以非零状态退出, 便于在CI中检查
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
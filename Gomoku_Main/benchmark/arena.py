@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+from math import sqrt, log10
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from MCTS.GomokuEnv import GomokuGame
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from MCTS.GomokuArrayMCTS import ArrayMCTSTree
+from MCTS.GomokuThreatSearch import ThreatSpaceSearch
+
+# 引擎配置: 大写的键直接设置为搜索树的同名属性, tree为'node'(MCTSTree)或'array'(ArrayMCTSTree),
+# threat_search为True时先用威胁空间搜索, 与对局接口的设置一致
+DEFAULT_CONFIG = {
+    'tree': 'node',
+    'threat_search': False,
+    'SIMULATION_TIMES': 300,
+    'SIMULATION_DEPTH': 1000,
+    'ONLY_NEARBY': True,
+}
+# 95%置信区间
+Z = 1.96
+
+
+def make_config(overrides=None):
+    config = dict(DEFAULT_CONFIG)
+    config.update(overrides or {})
+    return config
+
+
+def choose_move(config, game):
+    """
+    按config为当前玩家选择落子, 每步新建搜索树
+
+    返回:
+        (action, simulations)
+    """
+    if config['threat_search']:
+        action = ThreatSpaceSearch(game, time_limit=0.5).model()
+        if action is not None:
+            return action, 0
+    state = BitboardGame.from_game(game)
+    tree = ArrayMCTSTree(state) if config['tree'] == 'array' else MCTSTree(MCTSNode(state, move=game.last_move))
+    for key, value in config.items():
+        if key.isupper():
+            setattr(tree, key, value)
+    return tree.model()[1], tree.simulation_count
+
+
+def opening(size, moves, seed):
+    """在中心附近随机落子moves步作为开局, 使每一对对局的局面不同"""
+    rng = random.Random(seed)
+    game = GomokuGame(size)
+    center = size // 2
+    while len(game.get_player_points(1)) + len(game.get_player_points(2)) < moves:
+        game.step((center + rng.randint(-2, 2), center + rng.randint(-2, 2)))
+    return game
+
+
+def play_game(config_a, config_b, a_first, size=10, opening_moves=2, seed=0):
+    """
+    对局一局, a_first为True时a执黑(先手). 开局由seed决定, 交换先后手的两局使用相同的开局
+
+    返回:
+        字典, winner为'a'、'b'或None(平局), 以及双方的落子次数、思考时间和模拟次数
+    """
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    game = opening(size, opening_moves, seed)
+    # 开局之后轮到的玩家与先手方交替
+    players = {1: 'a', 2: 'b'} if a_first else {1: 'b', 2: 'a'}
+    configs = {'a': config_a, 'b': config_b}
+    result = {side: {'moves': 0, 'time': 0.0, 'simulations': 0} for side in ('a', 'b')}
+    while not game.game_over:
+        side = players[game.current_player]
+        start_time = time.perf_counter()
+        action, simulations = choose_move(configs[side], game)
+        result[side]['time'] += time.perf_counter() - start_time
+        result[side]['moves'] += 1
+        result[side]['simulations'] += simulations
+        game.step((int(action[0]), int(action[1])))
+    result['winner'] = players[game.winner] if game.winner is not None else None
+    result['plies'] = int(np.count_nonzero(game.board))
+    return result
+
+
+def wilson_interval(score, n):
+    """得分率score(平局计0.5)在n局下的Wilson置信区间"""
+    if n == 0:
+        return 0.0, 1.0
+    center = (score + Z ** 2 / (2 * n)) / (1 + Z ** 2 / n)
+    margin = Z * sqrt(score * (1 - score) / n + Z ** 2 / (4 * n ** 2)) / (1 + Z ** 2 / n)
+    return max(center - margin, 0.0), min(center + margin, 1.0)
+
+
+def elo(score, n):
+    """得分率对应的Elo分差, 全胜或全负时按半局修正以得到有限值"""
+    score = min(max(score, 0.5 / n), 1 - 0.5 / n)
+    return -400 * log10(1 / score - 1)
+
+
+def summarize(results):
+    """汇总a相对于b的战绩"""
+    n = len(results)
+    wins = sum(1 for r in results if r['winner'] == 'a')
+    losses = sum(1 for r in results if r['winner'] == 'b')
+    draws = n - wins - losses
+    score = (wins + 0.5 * draws) / n
+    low, high = wilson_interval(score, n)
+    summary = {
+        'games': n,
+        'wins': wins,
+        'losses': losses,
+        'draws': draws,
+        'score': score,
+        'score_interval': [low, high],
+        'elo': elo(score, n),
+        'elo_interval': [elo(low, n), elo(high, n)],
+        'mean_plies': sum(r['plies'] for r in results) / n,
+    }
+    for side in ('a', 'b'):
+        moves = sum(r[side]['moves'] for r in results)
+        elapsed = sum(r[side]['time'] for r in results)
+        simulations = sum(r[side]['simulations'] for r in results)
+        summary[side] = {
+            'mean_think_time': elapsed / moves if moves else 0.0,
+            'simulations_per_sec': simulations / elapsed if elapsed > 0 else 0.0,
+        }
+    return summary
+
+
+def run_match(config_a, config_b, games=20, workers=None, size=10, opening_moves=2, seed=0):
+    """
+    在进程池中对局games局(按对交换先后手), 返回summarize的结果
+    """
+    config_a, config_b = make_config(config_a), make_config(config_b)
+    pairs = (games + 1) // 2
+    args = [(config_a, config_b, a_first, size, opening_moves, seed + k)
+            for k in range(pairs) for a_first in (True, False)][:games]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = list(pool.map(play_game, *zip(*args)))
+    return summarize(results)
+
+
+def tune(base, grid, opponent, target=0.5, games=20, workers=None, size=10, opening_moves=2, seed=0):
+    """
+    网格搜索: grid为{参数: [取值, ...]}, 对所有组合生成的配置分别与opponent对局
+    得分率置信区间下限不低于target的配置视为达到强度要求, 按平均思考时间从少到多排序
+
+    返回:
+        [(配置, 对局结果, 是否达到要求)], 达到要求的配置排在前面
+    """
+    keys = list(grid)
+    rows = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        config = dict(base or {})
+        config.update(zip(keys, values))
+        summary = run_match(config, opponent, games, workers, size, opening_moves, seed)
+        rows.append((config, summary, summary['score_interval'][0] >= target))
+        print(f"{json.dumps(dict(zip(keys, values)))} 得分率{summary['score']:.3f} "
+              f"Elo{summary['elo']:+.0f} 每步{summary['a']['mean_think_time']:.3f}秒", file=sys.stderr)
+    return sorted(rows, key=lambda row: (not row[2], row[1]['a']['mean_think_time']))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='两种引擎配置自我对弈, 或在参数网格上搜索达到强度要求的最省配置')
+    parser.add_argument('--a', type=json.loads, default={}, help='配置a(JSON), 未给出的参数使用DEFAULT_CONFIG')
+    parser.add_argument('--b', type=json.loads, default={}, help='配置b(JSON), 网格搜索时为对手')
+    parser.add_argument('--grid', type=json.loads, help='参数网格(JSON), 例如{"SIMULATION_TIMES": [100, 200]}')
+    parser.add_argument('--target', type=float, default=0.5, help='网格搜索时得分率置信区间下限需要达到的值')
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--size', type=int, default=10)
+    parser.add_argument('--opening', type=int, default=2, help='随机开局的步数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='结果保存为JSON的路径')
+    args = parser.parse_args()
+
+    if args.grid:
+        rows = tune(args.a, args.grid, args.b, args.target, args.games, args.workers, args.size, args.opening, args.seed)
+        report = [{'config': config, 'result': summary, 'meets_target': ok} for config, summary, ok in rows]
+    else:
+        report = run_match(args.a, args.b, args.games, args.workers, args.size, args.opening, args.seed)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,71 @@
+import os
+import json
+import random
+from MCTS.GomokuEnv import GomokuGame
+from MCTS.GomokuRule import RuleStrategy
+
+# 固定的基准局面集, 由generate_positions生成后保存, 之后不随引擎的改动而变化
+POSITIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'positions.json')
+SIZES = [10, 15, 19]
+PHASES = ['opening', 'midgame', 'endgame']
+
+
+def self_play(size, rng):
+    """从中心附近随机的两步开始, 双方按RuleStrategy落子直到分出胜负, 返回落子序列"""
+    game = GomokuGame(size)
+    center = size // 2
+    moves = []
+    while len(moves) < 2:
+        action = (center + rng.randint(-2, 2), center + rng.randint(-2, 2))
+        if game.check_point_empty(action):
+            game.step(action)
+            moves.append(action)
+    while not game.game_over:
+        action = RuleStrategy(game).model()
+        game.step(action)
+        moves.append(action)
+    return moves
+
+
+def generate_positions(seed=2024, games_per_size=3):
+    """
+    每种棋盘大小自我对弈games_per_size局, 每局取开局(6手)、中局(一半)和残局(结束前3手)三个局面
+    局面以落子序列保存, 均未分出胜负
+    """
+    rng = random.Random(seed)
+    positions = []
+    for size in SIZES:
+        for k in range(games_per_size):
+            # RuleStrategy使用全局的random
+            random.seed(rng.randrange(2 ** 32))
+            moves = self_play(size, rng)
+            cuts = {'opening': min(6, len(moves) - 1), 'midgame': len(moves) // 2, 'endgame': max(len(moves) - 3, 1)}
+            for phase in PHASES:
+                positions.append({
+                    'name': f'{size}x{size}-{phase}-{k}',
+                    'size': size,
+                    'phase': phase,
+                    'moves': [[int(x), int(y)] for x, y in moves[:cuts[phase]]],
+                })
+    return {'seed': seed, 'positions': positions}
+
+
+def load_positions(path=POSITIONS_PATH, sizes=None, phases=None):
+    """读取基准局面, 可按棋盘大小和阶段筛选"""
+    with open(path, encoding='utf-8') as f:
+        positions = json.load(f)['positions']
+    return [position for position in positions
+            if (sizes is None or position['size'] in sizes) and (phases is None or position['phase'] in phases)]
+
+
+def build_game(position, cls=GomokuGame):
+    """按落子序列还原局面, cls为GomokuGame或BitboardGame"""
+    game = cls(position['size'])
+    for x, y in position['moves']:
+        game.step((x, y))
+    return game
+
+
+if __name__ == "__main__":
+    with open(POSITIONS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(generate_positions(), f, indent=1)
@@ -0,0 +1,194 @@
+import sys
+import time
+import random
+import platform
+import tracemalloc
+import numpy as np
+from MCTS.GomokuEnv import GomokuGame
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuRule import RuleStrategy
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree, rollout
+from benchmark.positions import load_positions, build_game, SIZES
+
+# 每项测量重复REPEAT次取最快的一次, 减少其他进程的干扰
+REPEAT = 3
+
+
+def seed_all(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def best_time(func, repeat=REPEAT):
+    """运行func repeat次, 返回最短的耗时(秒)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_step(positions, rounds, repeat=REPEAT):
+    """GomokuGame.step: 在空棋盘上按顺序重放局面的所有落子, 每秒落子次数"""
+    total = sum(len(position['moves']) for position in positions) * rounds
+
+    def run():
+        for _ in range(rounds):
+            for position in positions:
+                game = GomokuGame(position['size'])
+                for x, y in position['moves']:
+                    game.step((x, y))
+
+    return total / best_time(run, repeat)
+
+
+def bench_check_win(positions, rounds, repeat=REPEAT):
+    """GomokuGame.check_win: 对局面中的每个棋子判断胜负, 每秒调用次数"""
+    games = [build_game(position) for position in positions]
+    total = sum(len(position['moves']) for position in positions) * rounds
+
+    def run():
+        for _ in range(rounds):
+            for game, position in zip(games, positions):
+                for x, y in position['moves']:
+                    game.check_win(x, y)
+
+    return total / best_time(run, repeat)
+
+
+def bench_nearby(positions, rounds, cls, repeat=REPEAT):
+    """get_nearby_points(n=2): 每次调用的平均耗时(微秒)"""
+    games = [build_game(position, cls) for position in positions]
+
+    def run():
+        for _ in range(rounds):
+            for game in games:
+                game.get_nearby_points(n=2)
+
+    return best_time(run, repeat) / (rounds * len(games)) * 1e6
+
+
+def bench_rule(positions, rounds, seed, repeat=REPEAT):
+    """RuleStrategy.model: 包括创建棋型索引, 每秒调用次数"""
+    games = [build_game(position) for position in positions]
+
+    def run():
+        seed_all(seed)
+        for _ in range(rounds):
+            for game in games:
+                RuleStrategy(game).model()
+
+    return rounds * len(games) / best_time(run, repeat)
+
+
+def bench_rollout(positions, rounds, seed, depth=1000, repeat=REPEAT):
+    """rollout: 从局面开始在位棋盘上模拟到终局, 每秒模拟次数"""
+    games = [build_game(position, BitboardGame) for position in positions]
+
+    def run():
+        seed_all(seed)
+        for _ in range(rounds):
+            for game in games:
+                _, steps = rollout(game, depth)
+                for _ in range(steps):
+                    game.unmake_move()
+
+    return rounds * len(games) / best_time(run, repeat)
+
+
+def bench_mcts(positions, simulation_times, seed, repeat=REPEAT):
+    """
+    MCTSTree.model: 每个局面新建搜索树搜索simulation_times次
+
+    返回:
+        (平均耗时(秒), 最大内存峰值(MB)), 内存峰值用tracemalloc单独测量, 不影响耗时
+    """
+    def search(position):
+        tree = MCTSTree(MCTSNode(build_game(position, BitboardGame)))
+        tree.SIMULATION_TIMES = simulation_times
+        tree.ONLY_NEARBY = True
+        tree.model()
+
+    def run():
+        seed_all(seed)
+        for position in positions:
+            search(position)
+
+    elapsed = best_time(run, repeat)
+    peak = 0
+    for position in positions:
+        seed_all(seed)
+        tracemalloc.start()
+        try:
+            search(position)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return elapsed / len(positions), peak / 2 ** 20
+
+
+def metric(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def run_benchmarks(sizes=None, quick=False, seed=0, simulation_times=None):
+    """
+    运行全部测量, 各项按棋盘大小分别统计, 名称为"测量项[大小]"
+    quick为True时减少重复次数和模拟次数, 用于快速检查
+    """
+    sizes = sizes or SIZES
+    rounds = 20 if quick else 200
+    repeat = 1 if quick else REPEAT
+    rollout_rounds = 2 if quick else 10
+    simulation_times = simulation_times or (50 if quick else 300)
+    results = {}
+    for size in sizes:
+        positions = load_positions(sizes=[size])
+        # 已分出胜负或没有空位的局面不用于模拟和搜索
+        playable = [position for position in positions if not build_game(position).game_over]
+        midgame = [position for position in playable if position['phase'] != 'opening']
+        results[f'step_ops[{size}]'] = metric(bench_step(positions, rounds, repeat), 'ops/s', True)
+        results[f'check_win_ops[{size}]'] = metric(bench_check_win(positions, rounds, repeat), 'ops/s', True)
+        results[f'nearby_latency[{size}]'] = metric(bench_nearby(positions, rounds, GomokuGame, repeat), 'us', False)
+        results[f'nearby_bitboard_latency[{size}]'] = metric(bench_nearby(positions, rounds, BitboardGame, repeat),
+                                                             'us', False)
+        results[f'rule_model_ops[{size}]'] = metric(bench_rule(playable, rounds, seed, repeat), 'ops/s', True)
+        results[f'rollouts[{size}]'] = metric(bench_rollout(playable, rollout_rounds, seed, repeat=repeat),
+                                              'rollouts/s', True)
+        mcts_time, mcts_peak = bench_mcts(midgame, simulation_times, seed, repeat)
+        results[f'mcts_model_time[{size}]'] = metric(mcts_time, 's', False)
+        results[f'mcts_peak_memory[{size}]'] = metric(mcts_peak, 'MB', False)
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': seed,
+            'quick': quick,
+            'simulation_times': simulation_times,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=0.1):
+    """
+    与保存的基准结果比较, 变差超过threshold(相对值)的测量项视为退化
+
+    返回:
+        [(名称, 基准值, 当前值, 相对变化, 是否退化)], 相对变化为正表示变好
+    """
+    rows = []
+    for name, current in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or base['value'] == 0:
+            continue
+        change = (current['value'] - base['value']) / base['value']
+        if not current['higher_is_better']:
+            change = -change
+        rows.append((name, base['value'], current['value'], change, change < -threshold))
+    return rows
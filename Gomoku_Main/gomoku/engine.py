@@ -0,0 +1,130 @@
+# engine.py
+from django.conf import settings
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from MCTS.GomokuArrayMCTS import ArrayMCTSTree
+from MCTS.GomokuThreatSearch import ThreatSpaceSearch
+from MCTS.GomokuOpening import get_opening_book
+from MCTS.GomokuCache import SearchCache
+from gomoku.metrics import engine_metrics
+
+# 开局库在启动时加载一次
+opening_book = get_opening_book(str(settings.OPENING_BOOK_PATH))
+# 跨对局的搜索结果缓存, 配置了文件时所有工作进程(包括异步任务的进程)共用
+search_cache = SearchCache(**getattr(settings, 'GOMOKU_SEARCH_CACHE', {}))
+
+# 不经过MCTS的落子的说明, 统计时作为落子来源, 其余落子来源为mcts
+BOOK_NOTE = '开局库'
+THREAT_NOTE = '算杀'
+CACHE_NOTE = '缓存'
+SOURCES = {BOOK_NOTE: 'opening_book', THREAT_NOTE: 'threat_search', CACHE_NOTE: 'search_cache'}
+
+
+def new_search_state(state, game):
+    """根据当前游戏生成MCTS搜索使用的状态"""
+    return BitboardGame.from_game(game) if state['use_bitboard'] else game.copy()
+
+
+def new_tree(state, game):
+    """
+    根据设置创建搜索树. 数组存储的树在多进程时为树并行, MCTSNode组成的树在多进程时为根并行
+    批量模拟需要虚拟损失, 只有数组存储的树支持
+    """
+    if state['compact_tree'] or state['batch_size'] > 1 or (state['tree_parallel'] and state['workers'] > 1):
+        return ArrayMCTSTree(new_search_state(state, game))
+    return MCTSTree(MCTSNode(new_search_state(state, game), move=game.last_move))
+
+
+def configure_tree(mcts, state):
+    """将对局的设置应用到搜索树上"""
+    mcts.SIMULATION_TIMES = state['simulation_times']
+    mcts.SIMULATION_DEPTH = state['simulation_depth']
+    mcts.ONLY_NEARBY = state['only_nearby']
+    mcts.WORKERS = state['workers']
+    mcts.TRANSPOSITION = state['transposition']
+    mcts.BATCH_SIZE = state['batch_size']
+    mcts.PROGRESSIVE_WIDENING = state['progressive_widening']
+    mcts.RAVE = state['rave']
+    mcts.ROLLOUT_VCF_NODES = state['rollout_vcf_nodes']
+    mcts.ROLLOUT_CUTOFF = state['rollout_cutoff']
+    mcts.TIME_BUDGET = state['time_budget']
+    mcts.NODE_BUDGET = state['node_budget']
+    mcts.INSTRUMENT = state['instrument']
+
+
+def choose_move(state, progress_callback=None):
+    """
+    为state中的对局选择AI的落子, 依次尝试开局库、威胁空间搜索、搜索缓存和MCTS, 不修改棋盘
+    缓存中的结果达到本局的模拟次数时直接使用, 否则用其统计初始化新建的搜索树, 搜索后更新缓存
+    progress_callback传给搜索树, 见MCTSTree.progress_callback
+
+    返回:
+        (ai_move, mcts, note), mcts为使用的搜索树(没有进行MCTS时为None), note为落子来源的说明
+    """
+    game = state['game']
+    # 开局库中有当前局面时直接落子
+    if state['opening_book']:
+        ai_move = opening_book.lookup(game.board, game.current_player)
+        if ai_move is not None and game.check_point_empty(ai_move):
+            return ai_move, None, BOOK_NOTE
+
+    # 先用威胁空间搜索寻找必胜或必须防守的落子, 找到时不再进行MCTS
+    if state['threat_search']:
+        ai_move = ThreatSpaceSearch(game, time_limit=state['threat_search_time']).model()
+        if ai_move is not None:
+            return ai_move, None, THREAT_NOTE
+
+    # 其他对局中搜索过相同(或对称的)局面, 且模拟次数足够时直接使用缓存的落子, 有时间预算时只用于初始化搜索树
+    cached = search_cache.get(game.board, game.current_player) if state['search_cache'] else None
+    if cached is not None and state['time_budget'] is None and cached['simulations'] >= state['simulation_times']:
+        return cached['best_move'], None, CACHE_NOTE
+
+    # 复用上一步保留的搜索树, 没有时创建MCTS树
+    mcts = state['tree'] if state['reuse_tree'] else None
+    if mcts is None:
+        mcts = new_tree(state, game)
+    configure_tree(mcts, state)
+    # 只有MCTSNode组成的树支持用缓存的统计初始化
+    if cached is not None and isinstance(mcts, MCTSTree):
+        mcts.seed(cached['visits'])
+    mcts.progress_callback = progress_callback
+    try:
+        # 让MCTS选择最佳移动
+        ai_move = mcts.model(print_simulation_result=False)[1]  # 获取移动坐标
+    finally:
+        mcts.progress_callback = None
+    if state['search_cache'] and mcts.last_statistics:
+        search_cache.put(game.board, game.current_player, ai_move, mcts.last_statistics)
+    return ai_move, mcts, f'模拟{mcts.simulation_count}次'
+
+
+def search_stats(mcts):
+    """搜索树最近一次搜索的统计(字典), 没有开启统计时为None"""
+    if mcts is None or mcts.stats is None:
+        return None
+    return mcts.stats.to_dict()
+
+
+def apply_ai_move(state, ai_move, mcts, note, think_time, stats=None):
+    """
+    执行AI的落子并更新消息. mcts为选出该落子的搜索树(已经以该落子为根节点), 为None时推进保留的搜索树
+    stats为搜索的统计, 默认从mcts中读取, 保存在state中随对局状态返回, 同时计入engine_metrics
+
+    返回:
+        落子来源, 见SOURCES
+    """
+    game = state['game']
+    source = SOURCES.get(note, 'mcts')
+    state['stats'] = stats if stats is not None else search_stats(mcts)
+    engine_metrics.record(source, think_time, state['stats'])
+    game.step(ai_move)
+    if mcts is not None:
+        state['tree'] = mcts if state['reuse_tree'] else None
+    elif state['reuse_tree'] and state['tree'] is not None:
+        state['tree'].advance(ai_move, new_search_state(state, game))
+    state['message'] = f"AI玩家落子于: ({ai_move[0]}, {ai_move[1]})，思考耗时{think_time:.2f}，{note}"
+
+    # 检查游戏是否结束
+    if game.winner is not None:
+        state['message'] = "游戏结束! 玩家 {} 获胜!".format(game.winner)
+    return source
@@ -0,0 +1,119 @@
+# jobs.py
+import time
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from gomoku.engine import choose_move, search_stats
+
+# 进度中返回访问次数最多的子节点数量
+PROGRESS_TOP = 10
+
+
+def run_ai_job(state, progress, cancel):
+    """
+    在工作进程中为state中的对局选择AI的落子, 搜索过程中把进度写入progress, cancel被设置时提前结束搜索
+    任务本身已经在进程池中运行, 搜索始终使用单进程: 不在工作进程中再创建进程池(退出时会卡住),
+    也只有单进程搜索能报告进度和响应取消. 开局库和威胁空间搜索阶段不报告进度, 取消要等该阶段结束
+    (最多threat_search_time秒)才生效
+
+    返回:
+        (ai_move, note, think_time, stats), stats见engine.search_stats
+    """
+    def report(tree, simulations):
+        statistics = sorted(tree.root_statistics(), key=lambda item: item[1], reverse=True)
+        progress['simulations'] = simulations
+        if len(statistics) > 0:
+            progress['best_move'] = [int(statistics[0][0][0]), int(statistics[0][0][1])]
+        progress['visits'] = [[int(action[0]), int(action[1]), int(visits)]
+                              for action, visits, _ in statistics[:PROGRESS_TOP]]
+        return not cancel.is_set()
+
+    state = dict(state, workers=1, tree_parallel=False)
+    start_time = time.time()
+    ai_move, mcts, note = choose_move(state, progress_callback=report)
+    if mcts is not None:
+        statistics = sorted(mcts.last_statistics or [], key=lambda item: item[1], reverse=True)
+        progress.update({
+            'simulations': mcts.simulation_count,
+            'best_move': [int(ai_move[0]), int(ai_move[1])],
+            'visits': [[int(action[0]), int(action[1]), int(visits)] for action, visits, _ in statistics[:PROGRESS_TOP]],
+        })
+    return (int(ai_move[0]), int(ai_move[1])), note, time.time() - start_time, search_stats(mcts)
+
+
+class AIJob:
+    def __init__(self, game_id, game, future, progress, cancel):
+        self.game_id = game_id
+        # 提交任务时的局面, 完成时局面已经变化(例如重新开局)则不再落子
+        self.game_hash = game.hash
+        self.last_move = game.last_move
+        self.future = future
+        self.progress = progress
+        self.cancel_event = cancel
+        self.cancelled = False
+        self.applied = False
+        self.created = time.monotonic()
+
+    @property
+    def status(self):
+        if self.cancelled:
+            return 'cancelled'
+        if not self.future.done():
+            return 'running' if self.future.running() else 'pending'
+        if self.future.exception() is not None:
+            return 'failed'
+        return 'done'
+
+    def cancel(self):
+        self.cancelled = True
+        self.cancel_event.set()
+        self.future.cancel()
+
+
+class AIJobManager:
+    """
+    在后台进程池中计算AI落子的任务, 请求只负责提交任务和查询进度
+    任务保存在提交任务的进程中, 多个工作进程部署时查询请求需要发到同一个进程
+    """
+
+    def __init__(self, workers=2, ttl=600):
+        self.workers = workers
+        self.ttl = ttl  # 秒, 结束超过ttl的任务被清理
+        self.executor = None
+        self.manager = None
+        self.jobs = {}
+
+    def start(self):
+        """第一次提交任务时创建进程池和用于传递进度的Manager"""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.manager = multiprocessing.Manager()
+
+    def submit(self, game_id, state):
+        """提交任务, 返回任务编号. 搜索树不传给工作进程"""
+        self.start()
+        self.expire()
+        snapshot = {key: value for key, value in state.items() if key != 'tree'}
+        snapshot['tree'] = None
+        progress = self.manager.dict({'simulations': 0, 'best_move': None, 'visits': []})
+        cancel = self.manager.Event()
+        future = self.executor.submit(run_ai_job, snapshot, progress, cancel)
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = AIJob(game_id, state['game'], future, progress, cancel)
+        return job_id
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def expire(self):
+        now = time.monotonic()
+        for job_id, job in list(self.jobs.items()):
+            if job.status in ('done', 'failed', 'cancelled') and now - job.created > self.ttl:
+                del self.jobs[job_id]
@@ -0,0 +1,44 @@
+# metrics.py
+import threading
+from MCTS.GomokuStats import SearchStats
+
+
+class EngineMetrics:
+    """
+    累计本进程所有AI落子的统计, 通过Metrics视图查询
+    search为开启了统计(instrument)的MCTS搜索的累计, 未开启时只统计落子次数、来源和思考时间
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.moves = 0
+        self.think_time = 0.0
+        self.max_think_time = 0.0
+        self.sources = {}  # 落子来源 -> 次数
+        self.search = SearchStats()
+
+    def record(self, source, think_time, stats=None):
+        """记录一次AI落子, stats为SearchStats.to_dict()的结果"""
+        with self.lock:
+            self.moves += 1
+            self.think_time += think_time
+            self.max_think_time = max(self.max_think_time, think_time)
+            self.sources[source] = self.sources.get(source, 0) + 1
+            if stats is not None:
+                self.search.merge(SearchStats.from_dict(stats))
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'moves': self.moves,
+                'mean_think_time': self.think_time / self.moves if self.moves else 0.0,
+                'max_think_time': self.max_think_time,
+                'sources': dict(self.sources),
+                'search': self.search.to_dict(),
+            }
+
+
+engine_metrics = EngineMetrics()
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Game',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_id', models.CharField(max_length=32, unique=True)),
+                ('session_id', models.CharField(db_index=True, max_length=32)),
+                ('size', models.PositiveSmallIntegerField()),
+                ('player_first', models.BooleanField()),
+                ('settings', models.JSONField(default=dict)),
+                ('winner', models.PositiveSmallIntegerField(null=True)),
+                ('move_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Move',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ply', models.PositiveIntegerField()),
+                ('player', models.PositiveSmallIntegerField()),
+                ('x', models.PositiveSmallIntegerField()),
+                ('y', models.PositiveSmallIntegerField()),
+                ('source', models.CharField(max_length=16)),
+                ('think_time', models.FloatField(null=True)),
+                ('simulations', models.PositiveIntegerField(null=True)),
+                ('stats', models.JSONField(null=True)),
+                ('created_at', models.DateTimeField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moves', to='gomoku.game', to_field='record_id')),
+            ],
+            options={
+                'ordering': ['game', 'ply'],
+                'constraints': [models.UniqueConstraint(fields=('game', 'ply'), name='unique_game_ply')],
+            },
+        ),
+    ]
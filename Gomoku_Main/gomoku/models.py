@@ -1,3 +1,35 @@
 from django.db import models
 
-# Create your models here.
+
+class Game(models.Model):
+    """一局游戏的记录. 同一对局编号(session_id)重新开局时产生新的记录"""
+    record_id = models.CharField(max_length=32, unique=True)
+    session_id = models.CharField(max_length=32, db_index=True)  # 对局状态存储中的对局编号
+    size = models.PositiveSmallIntegerField()
+    player_first = models.BooleanField()
+    settings = models.JSONField(default=dict)  # 开局时的AI设置
+    winner = models.PositiveSmallIntegerField(null=True)  # 平局或未结束时为空
+    move_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return self.record_id
+
+
+class Move(models.Model):
+    """一步落子的记录, AI的落子同时记录思考时间、模拟次数和搜索统计"""
+    game = models.ForeignKey(Game, to_field='record_id', on_delete=models.CASCADE, related_name='moves')
+    ply = models.PositiveIntegerField()  # 第几手, 从1开始
+    player = models.PositiveSmallIntegerField()
+    x = models.PositiveSmallIntegerField()
+    y = models.PositiveSmallIntegerField()
+    source = models.CharField(max_length=16)  # human, mcts, opening_book, threat_search, search_cache
+    think_time = models.FloatField(null=True)
+    simulations = models.PositiveIntegerField(null=True)
+    stats = models.JSONField(null=True)  # 开启统计(instrument)时的SearchStats
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['game', 'ply']
+        constraints = [models.UniqueConstraint(fields=['game', 'ply'], name='unique_game_ply')]
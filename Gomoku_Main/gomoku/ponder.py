@@ -0,0 +1,49 @@
+# ponder.py
+import threading
+
+
+class Ponderer:
+    """
+    后台思考: AI落子并返回响应后, 在玩家思考期间用后台线程继续搜索保留的搜索树,
+    玩家落子时先停止该线程再推进根节点, 后台积累的统计在下一次搜索时复用
+    每局最多一个后台线程, 以对局编号区分
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.threads = {}  # 对局编号 -> (线程, 停止事件, 完成的模拟次数)
+
+    def start(self, game_id, tree, time_budget=None, node_budget=None):
+        """开始在后台搜索tree, 该局已有后台线程时先停止"""
+        self.stop(game_id)
+        stop_event = threading.Event()
+        result = [0]
+
+        def run():
+            result[0] = tree.ponder(stop_event, time_budget, node_budget)
+
+        thread = threading.Thread(target=run, daemon=True)
+        with self.lock:
+            self.threads[game_id] = (thread, stop_event, result)
+        thread.start()
+
+    def stop(self, game_id):
+        """
+        停止该局的后台线程并等待其结束, 之后才能修改搜索树
+
+        返回:
+            后台完成的模拟次数, 没有后台线程时为0
+        """
+        with self.lock:
+            entry = self.threads.pop(game_id, None)
+        if entry is None:
+            return 0
+        thread, stop_event, result = entry
+        stop_event.set()
+        thread.join()
+        return result[0]
+
+    def is_pondering(self, game_id):
+        with self.lock:
+            entry = self.threads.get(game_id)
+        return entry is not None and entry[0].is_alive()
@@ -0,0 +1,146 @@
+# recorder.py
+import atexit
+import logging
+import threading
+from django.db import transaction, DatabaseError
+from django.utils import timezone
+from gomoku.models import Game, Move
+
+logger = logging.getLogger(__name__)
+
+# 一局的记录连续写入失败的次数上限, 超过后丢弃该局已缓冲和之后的所有记录
+MAX_RETRIES = 3
+
+
+class GameRecorder:
+    """
+    把对局和落子记录写入数据库(Game, Move). 请求中只把记录放入内存缓冲区, 由后台线程定时或在缓冲区满、
+    对局结束时用bulk_create批量写入, 避免每步落子都同步写数据库. 进程退出时写入剩余的记录
+    每局的记录在各自的保存点中写入, 一局失败不影响其他局; 失败的记录放回缓冲区下次重试,
+    连续失败MAX_RETRIES次后丢弃该局(之后的落子也不再记录), 不影响对局
+    """
+
+    def __init__(self, enabled=True, batch_size=200, flush_interval=5):
+        self.enabled = enabled
+        self.batch_size = batch_size  # 缓冲的落子数量达到batch_size时立即写入
+        self.flush_interval = flush_interval  # 秒, 后台线程写入的间隔
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # 保证同一时间只有一次写入
+        self.wake = threading.Event()
+        self.thread = None
+        self.games = {}  # 对局记录编号 -> 待写入的Game
+        self.moves = []  # 待写入的Move
+        self.updates = {}  # 对局记录编号 -> 待更新的字段
+        self.failures = {}  # 对局记录编号 -> 连续写入失败的次数
+        self.dropped = set()  # 已经放弃记录的对局
+
+    def start(self):
+        """第一次记录时启动后台线程"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+
+    def run(self):
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def start_game(self, record_id, session_id, size, player_first, settings):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.start()
+            self.games[record_id] = Game(record_id=record_id, session_id=session_id, size=size,
+                                         player_first=player_first, settings=settings, created_at=timezone.now())
+
+    def record_move(self, record_id, ply, player, action, source, think_time=None, simulations=None, stats=None):
+        """记录一步落子, ply为落子后棋盘上的棋子数. 人类玩家的落子没有思考时间和搜索统计"""
+        if not self.enabled:
+            return
+        with self.lock:
+            if record_id in self.dropped:
+                return
+            self.start()
+            self.moves.append(Move(game_id=record_id, ply=ply, player=player, x=int(action[0]), y=int(action[1]),
+                                   source=source, think_time=think_time, simulations=simulations, stats=stats,
+                                   created_at=timezone.now()))
+            self.updates.setdefault(record_id, {})['move_count'] = ply
+            full = len(self.moves) >= self.batch_size
+        if full:
+            self.wake.set()
+
+    def finish_game(self, record_id, winner):
+        """对局结束, 记录胜者(平局为None)并立即唤醒后台线程写入"""
+        if not self.enabled:
+            return
+        with self.lock:
+            if record_id in self.dropped:
+                return
+            self.updates.setdefault(record_id, {}).update(winner=winner, finished_at=timezone.now())
+        self.wake.set()
+
+    def flush(self):
+        """
+        把缓冲区中的记录写入数据库, 每局在一个保存点中写入
+
+        返回:
+            写入的落子数量
+        """
+        with self.flush_lock:
+            with self.lock:
+                games, moves, updates = self.games, self.moves, self.updates
+                self.games, self.moves, self.updates = {}, [], {}
+            if not games and not moves and not updates:
+                return 0
+            batches = {}  # 对局记录编号 -> (Game或None, [Move], 待更新的字段)
+            for record_id in list(games) + [move.game_id for move in moves] + list(updates):
+                if record_id not in batches:
+                    batches[record_id] = (games.get(record_id), [], updates.get(record_id, {}))
+            for move in moves:
+                batches[move.game_id][1].append(move)
+
+            failed = []
+            written = 0
+            try:
+                with transaction.atomic():
+                    for record_id, (game, game_moves, fields) in batches.items():
+                        try:
+                            with transaction.atomic():
+                                if game is not None:
+                                    Game.objects.bulk_create([game], ignore_conflicts=True)
+                                Move.objects.bulk_create(game_moves, batch_size=self.batch_size, ignore_conflicts=True)
+                                if fields:
+                                    Game.objects.filter(record_id=record_id).update(**fields)
+                        except DatabaseError:
+                            logger.exception("写入对局%s的记录失败", record_id)
+                            failed.append(record_id)
+                        else:
+                            written += len(game_moves)
+            except DatabaseError:
+                # 整个事务失败(例如数据库被锁定)时所有对局都需要重试
+                logger.exception("写入对局记录失败")
+                failed, written = list(batches), 0
+            self.retry({record_id: batches[record_id] for record_id in failed}, set(batches) - set(failed))
+            return written
+
+    def retry(self, failed, succeeded):
+        """把写入失败的记录放回缓冲区(排在新记录之前), 连续失败次数超过MAX_RETRIES的对局丢弃"""
+        with self.lock:
+            for record_id in succeeded:
+                self.failures.pop(record_id, None)
+            for record_id, (game, game_moves, fields) in failed.items():
+                self.failures[record_id] = self.failures.get(record_id, 0) + 1
+                if self.failures[record_id] > MAX_RETRIES:
+                    logger.error("对局%s的记录连续写入失败%d次, 丢弃%d步落子, 不再记录该局",
+                                 record_id, self.failures.pop(record_id), len(game_moves))
+                    self.dropped.add(record_id)
+                    self.games.pop(record_id, None)
+                    self.updates.pop(record_id, None)
+                    self.moves = [move for move in self.moves if move.game_id != record_id]
+                    continue
+                if game is not None:
+                    self.games.setdefault(record_id, game)
+                self.moves[:0] = game_moves
+                self.updates[record_id] = {**fields, **self.updates.get(record_id, {})}
@@ -0,0 +1,165 @@
+# store.py
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# 等待其他进程释放对局锁时的轮询间隔(秒)
+LOCK_POLL_INTERVAL = 0.05
+
+
+class StaleStateError(Exception):
+    """保存对局状态时发现缓存中的状态已经被其他请求修改"""
+    pass
+
+
+class GameStore:
+    """
+    按对局编号保存每局游戏的状态(棋盘、设置、搜索树等), 容量有限, 淘汰最久未使用(LRU)或超时(TTL)的对局
+    cache为Django缓存的名称时, 对局状态保存在该缓存中, 多个工作进程共用同一份状态;
+    搜索树体积大且只用于加速, 始终只保存在本进程中, 取出时与缓存中的棋盘不一致则丢弃
+    同一对局的读取、修改和保存需要在lock(game_id)中进行; 使用缓存时状态带有版本号, 保存时版本号不一致说明
+    其间有其他请求保存过(例如等待锁超时), 抛出StaleStateError而不覆盖
+    本进程中的对局(使用缓存时为搜索树)被删除或淘汰后调用on_evict(game_id), 例如停止该局的后台思考;
+    调用时不持有mutex, 但可能持有其他对局的锁, on_evict中不能等待对局锁
+    """
+
+    def __init__(self, capacity=1000, ttl=3600, cache=None, key_prefix='gomoku:game:', lock_timeout=300,
+                 on_evict=None):
+        self.capacity = capacity
+        self.ttl = ttl  # 秒, 对局超过ttl没有被访问时淘汰
+        self.cache = caches[cache] if cache is not None else None
+        self.key_prefix = key_prefix
+        self.lock_timeout = lock_timeout  # 秒, 跨进程的锁最多持有(和等待)的时间
+        self.entries = OrderedDict()  # 对局编号 -> (过期时间, 对局状态或搜索树)
+        # 保护entries和locks, 可重入以便在持有时调用expire
+        self.mutex = threading.RLock()
+        self.locks = {}  # 对局编号 -> [锁, 使用该锁的请求数量]
+        self.on_evict = on_evict
+
+    def __len__(self):
+        with self.mutex:
+            evicted = self.expire()
+            size = len(self.entries)
+        self.evicted(evicted)
+        return size
+
+    def expire(self):
+        """
+        删除超时的对局. 每次访问都会把对局移到末尾并刷新过期时间, 因此只需从头部开始检查
+        调用者在释放mutex后把返回值传给evicted
+
+        返回:
+            被删除的对局编号列表
+        """
+        now = time.monotonic()
+        evicted = []
+        with self.mutex:
+            while self.entries:
+                game_id, (expires_at, _) = next(iter(self.entries.items()))
+                if expires_at > now:
+                    break
+                del self.entries[game_id]
+                evicted.append(game_id)
+        return evicted
+
+    def evicted(self, game_ids):
+        """对被删除或淘汰的对局调用on_evict, 不能在持有mutex时调用"""
+        if self.on_evict is None:
+            return
+        for game_id in game_ids:
+            self.on_evict(game_id)
+
+    def get_local(self, game_id):
+        with self.mutex:
+            evicted = self.expire()
+            entry = self.entries.get(game_id)
+            if entry is not None:
+                self.entries[game_id] = (time.monotonic() + self.ttl, entry[1])
+                self.entries.move_to_end(game_id)
+        self.evicted(evicted)
+        return entry[1] if entry is not None else None
+
+    def set_local(self, game_id, value):
+        with self.mutex:
+            self.entries[game_id] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(game_id)
+            evicted = self.expire()
+            while len(self.entries) > self.capacity:
+                evicted.append(self.entries.popitem(last=False)[0])
+        self.evicted(evicted)
+
+    @contextmanager
+    def lock(self, game_id):
+        """
+        对局锁: 本进程内用线程锁, 使用缓存时再用cache.add在缓存中加锁, 多个工作进程之间也互斥
+        等待缓存中的锁超过lock_timeout时记录日志后继续, 由保存时的版本检查防止覆盖; 此时锁属于其他请求, 结束时不删除
+        """
+        with self.mutex:
+            entry = self.locks.setdefault(game_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                if self.cache is None:
+                    yield
+                    return
+                key = self.key_prefix + 'lock:' + game_id
+                deadline = time.monotonic() + self.lock_timeout
+                acquired = self.cache.add(key, 1, self.lock_timeout)
+                while not acquired:
+                    if time.monotonic() > deadline:
+                        logger.warning("等待对局%s的锁超时", game_id)
+                        break
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    acquired = self.cache.add(key, 1, self.lock_timeout)
+                try:
+                    yield
+                finally:
+                    if acquired:
+                        self.cache.delete(key)
+        finally:
+            with self.mutex:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.locks[game_id]
+
+    def get(self, game_id):
+        """返回对局状态, 不存在或已被淘汰时返回None"""
+        if self.cache is None:
+            return self.get_local(game_id)
+        state = self.cache.get(self.key_prefix + game_id)
+        if state is None:
+            return None
+        # 本进程保存的搜索树对应的局面与缓存中的棋盘一致时才能复用
+        tree = self.get_local(game_id)
+        state['tree'] = None
+        if tree is not None and tree[0] == state['game'].hash and tree[1] == state['game'].last_move:
+            state['tree'] = tree[2]
+        return state
+
+    def save(self, game_id, state):
+        if self.cache is None:
+            self.set_local(game_id, state)
+            return
+        current = self.cache.get(self.key_prefix + game_id)
+        if current is not None and current.get('version', 0) != state.get('version', 0):
+            raise StaleStateError(game_id)
+        state['version'] = state.get('version', 0) + 1
+        self.cache.set(self.key_prefix + game_id, {key: value for key, value in state.items() if key != 'tree'},
+                       self.ttl)
+        if state.get('tree') is not None:
+            self.set_local(game_id, (state['game'].hash, state['game'].last_move, state['tree']))
+        else:
+            with self.mutex:
+                self.entries.pop(game_id, None)
+
+    def delete(self, game_id):
+        with self.mutex:
+            self.entries.pop(game_id, None)
+        self.evicted([game_id])
+        if self.cache is not None:
+            self.cache.delete(self.key_prefix + game_id)
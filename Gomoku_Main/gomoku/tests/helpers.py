@@ -0,0 +1,52 @@
+import json
+from unittest import mock
+from MCTS.GomokuEnv import GomokuGame
+from gomoku import views
+
+
+def play(moves, size=15):
+    """依次落子, 返回GomokuGame"""
+    game = GomokuGame(size)
+    for action in moves:
+        game.step(action)
+    return game
+
+
+# 视图测试使用的快速设置: 模拟次数少, 不使用开局库、威胁空间搜索和搜索缓存, 落子完全由MCTS决定
+FAST_SETTINGS = {
+    'simulation_times': 30,
+    'simulation_depth': 30,
+    'opening_book': False,
+    'threat_search': False,
+    'search_cache': False,
+}
+
+
+class GameClientMixin:
+    """通过接口进行对局的测试, 每个测试使用新的对局编号, 不写入对局记录"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(views.recorder, 'enabled', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.game_id = self.id().replace('.', '-')
+        self.addCleanup(views.game_store.delete, self.game_id)
+
+    def api(self, name, data=None, status=200):
+        """data为None时GET, 否则POST JSON, 返回解析后的响应"""
+        url = f'/api/gomoku/{name}'
+        if data is None:
+            response = self.client.get(url, {'game_id': self.game_id})
+        else:
+            response = self.client.post(url, json.dumps({'game_id': self.game_id, **data}),
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def configure(self, **settings):
+        self.api('settings', {**FAST_SETTINGS, **settings})
+        return self.api('init')
+
+    def state(self):
+        return views.game_store.get(self.game_id)
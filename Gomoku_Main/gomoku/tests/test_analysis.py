@@ -0,0 +1,90 @@
+import json
+from unittest import mock
+from django.test import SimpleTestCase
+from MCTS.GomokuAnalysis import load_position, analyze, analyze_batch
+from gomoku import views
+from gomoku.tests.helpers import play
+
+FAST_ANALYSIS = {'SIMULATION_TIMES': 30, 'SIMULATION_DEPTH': 30}
+
+
+def position(moves, **extra):
+    return {'board': play(moves, size=10).board.tolist(), **extra}
+
+
+class LoadPositionTest(SimpleTestCase):
+    def test_current_player(self):
+        self.assertEqual(load_position(position([(4, 4)])).current_player, 2)
+        self.assertEqual(load_position(position([(4, 4), (4, 5)])).current_player, 1)
+        self.assertEqual(load_position(position([(4, 4)], current_player=1)).current_player, 1)
+
+    def test_invalid(self):
+        five = position([(4, 0), (0, 0), (4, 1), (0, 2), (4, 2), (0, 4), (4, 3), (0, 6), (4, 4)])
+        for data in [{}, {'board': 'abc'}, {'board': [[0, 'x']]}, {'board': [[0] * 4] * 4},
+                     {'board': [[0] * 6] * 5}, {'board': [[3] * 6] * 6}, position([(4, 4)], current_player=3),
+                     five, {'board': [[1, 2] * 3, [2, 1] * 3] * 3}]:
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                load_position(data)
+
+
+class AnalyzeTest(SimpleTestCase):
+    def test_analyze(self):
+        result = analyze(position([(4, 4), (4, 5)]), FAST_ANALYSIS, top_k=3, seed=0)
+        self.assertEqual(result['simulations'], 30)
+        self.assertEqual(len(result['visits']), 3)
+        self.assertEqual([item['visits'] for item in result['visits']],
+                         sorted((item['visits'] for item in result['visits']), reverse=True))
+        self.assertTrue(0 <= result['value'] <= 1)
+        self.assertEqual(analyze(position([(4, 4), (4, 5)]), FAST_ANALYSIS, top_k=3, seed=0)['best_move'],
+                         result['best_move'])
+
+    def test_position_budget(self):
+        result = analyze(position([(4, 4)], simulations=12), FAST_ANALYSIS)
+        self.assertEqual(result['simulations'], 12)
+
+    def test_batch(self):
+        positions = [position([(4, 4)], id='a'), {'board': 'abc', 'id': 'b'}, position([(4, 4), (4, 5)])]
+        results = sorted(analyze_batch(positions, FAST_ANALYSIS, workers=1, seed=0), key=lambda r: r['index'])
+        self.assertEqual([result['index'] for result in results], [0, 1, 2])
+        self.assertEqual([result['id'] for result in results], ['a', 'b', None])
+        self.assertIn('error', results[1])
+        self.assertNotIn('error', results[0])
+        self.assertEqual(results[2]['simulations'], 30)
+
+
+class AnalyzeEndpointTest(SimpleTestCase):
+    def post(self, data):
+        body = data if isinstance(data, str) else json.dumps(data)
+        return self.client.post('/api/gomoku/analyze', body, content_type='application/json')
+
+    def test_stream(self):
+        data = {'positions': [position([(4, 4)], id='a'), position([(4, 4), (4, 5)], id='b')],
+                'settings': {'simulation_times': 20, 'simulation_depth': 30}, 'top_k': 2}
+        with mock.patch.dict(views.ANALYSIS, workers=1):
+            response = self.post(data)
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(sorted(line['id'] for line in lines), ['a', 'b'])
+        for line in lines:
+            self.assertEqual(line['simulations'], 20)
+            self.assertLessEqual(len(line['visits']), 2)
+
+    def test_invalid_request(self):
+        board = position([(4, 4)])['board']
+        for data in ['not json', {}, {'positions': 'abc'}, {'positions': [1]}, {'positions': [{'board': 'abc'}]},
+                     {'positions': [{'board': board}], 'settings': []},
+                     {'positions': [{'board': board}], 'settings': {'simulation_times': -1}},
+                     {'positions': [{'board': board, 'time_budget': 'abc'}]}]:
+            with self.subTest(data=data):
+                response = self.post(data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_budget_limits(self):
+        board = position([(4, 4)])['board']
+        with mock.patch.dict(views.ANALYSIS, max_positions=2, max_total_time=5, max_total_simulations=500):
+            self.assertEqual(self.post({'positions': [{'board': board}] * 3}).status_code, 400)
+            # 默认每个局面500次模拟
+            self.assertEqual(self.post({'positions': [{'board': board}] * 2}).status_code, 400)
+            response = self.post({'positions': [{'board': board, 'time_budget': 4}] * 2})
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,52 @@
+from math import isfinite
+from django.test import SimpleTestCase
+from benchmark.arena import make_config, play_game, wilson_interval, elo, summarize
+
+TINY_CONFIG = {'SIMULATION_TIMES': 5, 'SIMULATION_DEPTH': 10}
+
+
+def result(winner, plies=20):
+    side = {'moves': plies // 2, 'time': 1.0, 'simulations': 100}
+    return {'winner': winner, 'plies': plies, 'a': dict(side), 'b': dict(side)}
+
+
+class ArenaStatsTest(SimpleTestCase):
+    def test_wilson_interval(self):
+        self.assertEqual(wilson_interval(0.5, 0), (0.0, 1.0))
+        low, high = wilson_interval(0.5, 100)
+        self.assertAlmostEqual(low + high, 1)
+        self.assertAlmostEqual(high - low, 0.19, places=2)
+        # 区间随局数增加而变窄, 全胜时上限为1
+        self.assertLess(wilson_interval(0.5, 400)[1], high)
+        low, high = wilson_interval(1.0, 10)
+        self.assertEqual(high, 1.0)
+        self.assertGreater(low, 0.5)
+
+    def test_elo(self):
+        self.assertAlmostEqual(elo(0.5, 10), 0)
+        self.assertAlmostEqual(elo(0.75, 100), -elo(0.25, 100))
+        self.assertAlmostEqual(elo(10 / 11, 100), 400)
+        for score in (0.0, 1.0):
+            self.assertTrue(isfinite(elo(score, 10)))
+        self.assertGreater(elo(1.0, 10), 0)
+
+    def test_summarize(self):
+        summary = summarize([result('a'), result('a'), result('b'), result(None, plies=100)])
+        self.assertEqual((summary['games'], summary['wins'], summary['losses'], summary['draws']), (4, 2, 1, 1))
+        self.assertEqual(summary['score'], 0.625)
+        self.assertEqual(summary['mean_plies'], 40)
+        self.assertLess(summary['score_interval'][0], 0.625)
+        self.assertGreater(summary['elo'], 0)
+        self.assertAlmostEqual(summary['a']['mean_think_time'], 4 / 80)
+        self.assertAlmostEqual(summary['b']['simulations_per_sec'], 100)
+
+
+class PlayGameTest(SimpleTestCase):
+    def test_play_game(self):
+        config = make_config(TINY_CONFIG)
+        game = play_game(config, config, a_first=True, seed=1)
+        self.assertIn(game['winner'], ('a', 'b', None))
+        self.assertEqual(game['plies'], 2 + game['a']['moves'] + game['b']['moves'])
+        self.assertGreater(game['a']['simulations'], 0)
+        # 相同的种子得到相同的对局
+        self.assertEqual(play_game(config, config, a_first=True, seed=1)['plies'], game['plies'])
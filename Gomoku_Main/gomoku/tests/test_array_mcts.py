@@ -0,0 +1,116 @@
+import pickle
+import random
+import numpy as np
+from django.test import SimpleTestCase
+from MCTS.GomokuArrayMCTS import ArrayMCTSTree, NodeStore
+from gomoku.tests.helpers import play, GameClientMixin
+
+
+def new_tree(simulations=60):
+    random.seed(0)
+    tree = ArrayMCTSTree(play([(4, 4), (4, 5)], size=10))
+    tree.ONLY_NEARBY = True
+    tree.SIMULATION_TIMES = simulations
+    tree.SIMULATION_DEPTH = 30
+    return tree
+
+
+class NodeStoreTest(SimpleTestCase):
+    def build(self):
+        # 0 -> (1, 2), 1 -> (3, 4, 5), 2 -> (6)
+        store = NodeStore(2)
+        store.allocate(1)
+        for parent, count in [(0, 2), (1, 3), (2, 1)]:
+            start = store.allocate(count, parent=parent)
+            store.first_child[parent] = start
+            store.child_count[parent] = count
+            store.move[start:start + count] = np.arange(start, start + count) * 10
+            store.visits[start:start + count] = np.arange(start, start + count)
+        return store
+
+    def test_allocate_grows(self):
+        store = self.build()
+        self.assertEqual(len(store), 7)
+        self.assertGreaterEqual(store.capacity, 7)
+        self.assertEqual(list(store.children(1)), [3, 4, 5])
+        self.assertEqual(list(store.parent[3:6]), [1, 1, 1])
+
+    def test_subtree(self):
+        store = self.build()
+        subtree = store.subtree(1)
+        self.assertEqual(len(subtree), 4)
+        self.assertEqual(subtree.parent[0], -1)
+        self.assertEqual(list(subtree.children(0)), [1, 2, 3])
+        self.assertEqual(list(subtree.move[1:4]), [30, 40, 50])
+        self.assertEqual(list(subtree.visits[1:4]), [3, 4, 5])
+        self.assertTrue(np.all(subtree.child_count[1:4] == 0))
+        self.assertTrue(np.all(subtree.first_child[1:4] == -1))
+
+    def test_shared_round_trip(self):
+        store = self.build()
+        shared = store.subtree(0, capacity=20, shared=True)
+        try:
+            attached = pickle.loads(pickle.dumps(shared))
+            attached.visits[6] = 99
+            self.assertEqual(shared.visits[6], 99)
+            self.assertEqual(shared.allocate(100), -1)
+            copy = shared.subtree(0)
+        finally:
+            attached.shm.close()
+            shared.close()
+        self.assertFalse(copy.shared)
+        self.assertEqual(len(copy), 7)
+        self.assertEqual(copy.visits[6], 99)
+
+    def test_local_store_not_picklable(self):
+        with self.assertRaises(TypeError):
+            pickle.dumps(self.build())
+
+
+class ArrayMCTSTreeTest(SimpleTestCase):
+    def test_model(self):
+        tree = new_tree()
+        board = tree.state.board.copy()
+        player, action = tree.model()
+        self.assertEqual(player, 1)
+        self.assertEqual(board[action], 0)
+        self.assertEqual(tree.simulation_count, 60)
+        # 搜索结束后棋盘只多了选出的落子, 根节点为该落子的子树
+        board[action] = 1
+        self.assertTrue(np.array_equal(tree.state.board, board))
+        self.assertEqual(tree.store.parent[0], -1)
+        self.assertEqual(sum(visits for _, visits, _ in tree.last_statistics), 60)
+
+    def test_advance(self):
+        tree = new_tree()
+        tree.model()
+        child = max(tree.store.children(0), key=lambda node: tree.store.visits[node])
+        action = divmod(int(tree.store.move[child]), 10)
+        visits = int(tree.store.visits[child])
+        self.assertTrue(tree.advance(action, None))
+        self.assertEqual(int(tree.store.visits[0]), visits)
+        self.assertEqual(tree.state.get_point(*action), 2)
+
+    def test_advance_without_child(self):
+        tree = new_tree()
+        tree.model()
+        children = tree.store.children(0)
+        moves = set(tree.store.move[children.start:children.stop].tolist())
+        game = tree.state.to_game()
+        action = next(point for point in game.get_empty_points() if point[0] * 10 + point[1] not in moves)
+        game.step(action)
+        self.assertFalse(tree.advance(action, game))
+        self.assertIsNone(tree.store)
+        self.assertTrue(np.array_equal(tree.state.board, game.board))
+
+
+
+class CompactTreeViewTest(GameClientMixin, SimpleTestCase):
+    def test_ai_move_with_compact_tree(self):
+        self.configure(compact_tree=True)
+        self.api('player_move', {'x': 4, 'y': 4})
+        res = self.api('ai_move')
+        self.assertEqual(res['last_move']['player'], 2)
+        tree = self.state()['tree']
+        self.assertIsInstance(tree, ArrayMCTSTree)
+        self.assertTrue(np.array_equal(tree.state.board, self.state()['game'].board))
@@ -0,0 +1,54 @@
+import random
+import numpy as np
+from django.test import SimpleTestCase
+from MCTS.GomokuBatchRollout import batch_rollout
+from MCTS.GomokuArrayMCTS import ArrayMCTSTree
+from MCTS.GomokuBitboard import BitboardGame
+from gomoku.tests.helpers import play
+
+
+class BatchRolloutTest(SimpleTestCase):
+    def test_completes_five(self):
+        # 第一局玩家1差一子成五, 第二局轮到玩家2时必须先堵, 第三局已经结束
+        boards = np.zeros((3, 10, 10), dtype=np.int8)
+        boards[0, 4, 2:6] = 1
+        boards[1, 4, 2:6] = 1
+        boards[1, 0, 0:3] = 2
+        winners = batch_rollout(boards.copy(), [1, 2, 1], 1, np.random.default_rng(0),
+                                winners=[0, 0, 2], finished=[False, False, True])
+        self.assertEqual(list(winners), [1, 0, 2])
+
+    def test_block_then_play_out(self):
+        boards = np.zeros((1, 10, 10), dtype=np.int8)
+        boards[0, 4, 2:6] = 1
+        result = boards.copy()
+        batch_rollout(result, [2], 1, np.random.default_rng(0))
+        self.assertTrue(result[0, 4, 1] == 2 or result[0, 4, 6] == 2)
+
+    def test_results_are_valid(self):
+        boards = np.zeros((16, 10, 10), dtype=np.int8)
+        winners = batch_rollout(boards, np.ones(16), 200, np.random.default_rng(1))
+        for board, winner in zip(boards, winners):
+            stones = np.count_nonzero(board == 1), np.count_nonzero(board == 2)
+            self.assertIn(stones[0] - stones[1], (0, 1))
+            if winner != 0:
+                game = BitboardGame(10)
+                game.set(size=10, board=board)
+                self.assertTrue(game.check_five(game.bits[int(winner)]))
+            else:
+                self.assertEqual(sum(stones), 100)
+
+
+class BatchSearchTest(SimpleTestCase):
+    def test_batch_search(self):
+        random.seed(0)
+        tree = ArrayMCTSTree(play([(4, 4), (4, 5)], size=10))
+        tree.ONLY_NEARBY = True
+        tree.SIMULATION_TIMES = 60
+        tree.SIMULATION_DEPTH = 30
+        tree.BATCH_SIZE = 8
+        tree.model()
+        self.assertEqual(tree.simulation_count, 60)
+        store = tree.store
+        self.assertTrue(np.all(store.virtual_loss[:len(store)] == 0))
+        self.assertEqual(sum(visits for _, visits, _ in tree.last_statistics), 60)
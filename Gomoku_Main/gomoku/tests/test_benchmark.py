@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from benchmark.positions import SIZES, PHASES, generate_positions, load_positions, build_game
+from benchmark.suite import run_benchmarks, compare
+
+
+class PositionsTest(SimpleTestCase):
+    def test_generate_is_reproducible(self):
+        positions = generate_positions(seed=1, games_per_size=1)
+        self.assertEqual(positions, generate_positions(seed=1, games_per_size=1))
+        self.assertEqual({(p['size'], p['phase']) for p in positions['positions']},
+                         {(size, phase) for size in SIZES for phase in PHASES})
+
+    def test_load_and_build(self):
+        positions = load_positions(sizes=[10], phases=['midgame'])
+        self.assertTrue(positions)
+        for position in positions:
+            game = build_game(position)
+            board = build_game(position, BitboardGame)
+            self.assertEqual(game.size, 10)
+            self.assertEqual(int((game.board != 0).sum()), len(position['moves']))
+            self.assertTrue((game.board == board.board).all())
+
+
+class SuiteTest(SimpleTestCase):
+    def test_quick_run(self):
+        report = run_benchmarks(sizes=[10], quick=True, simulation_times=10)
+        self.assertEqual(report['meta']['simulation_times'], 10)
+        self.assertIn('mcts_model_time[10]', report['results'])
+        for name, result in report['results'].items():
+            with self.subTest(name):
+                self.assertGreater(result['value'], 0)
+
+    def test_compare(self):
+        baseline = {'results': {'ops': {'value': 100, 'unit': 'ops/s', 'higher_is_better': True},
+                                'time': {'value': 1.0, 'unit': 's', 'higher_is_better': False},
+                                'zero': {'value': 0, 'unit': 's', 'higher_is_better': False}}}
+        report = {'results': {'ops': {'value': 80, 'unit': 'ops/s', 'higher_is_better': True},
+                              'time': {'value': 0.5, 'unit': 's', 'higher_is_better': False},
+                              'zero': {'value': 1, 'unit': 's', 'higher_is_better': False},
+                              'new': {'value': 1, 'unit': 's', 'higher_is_better': False}}}
+        rows = {row[0]: row for row in compare(report, baseline)}
+        self.assertEqual(set(rows), {'ops', 'time'})
+        self.assertAlmostEqual(rows['ops'][3], -0.2)
+        self.assertTrue(rows['ops'][4])
+        self.assertAlmostEqual(rows['time'][3], 0.5)
+        self.assertFalse(rows['time'][4])
@@ -0,0 +1,78 @@
+import random
+import numpy as np
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import rollout
+from gomoku.tests.helpers import play
+
+
+class BitboardTest(SimpleTestCase):
+    def bits(self, points, size=10):
+        board = BitboardGame(size)
+        return sum(1 << board.index(x, y) for x, y in points)
+
+    def test_check_five_all_directions(self):
+        board = BitboardGame(10)
+        lines = {
+            '横': [(3, y) for y in range(2, 7)],
+            '竖': [(x, 4) for x in range(5, 10)],
+            '斜': [(k, k) for k in range(5)],
+            '反斜': [(k, 9 - k) for k in range(5, 10)],
+        }
+        for name, points in lines.items():
+            with self.subTest(name):
+                self.assertTrue(board.check_five(self.bits(points)))
+                self.assertFalse(board.check_five(self.bits(points[:4])))
+
+    def test_check_five_does_not_wrap_rows(self):
+        # 每行末尾的哨兵位保证一行的末尾和下一行的开头不会连成五
+        board = BitboardGame(10)
+        self.assertFalse(board.check_five(self.bits([(0, 7), (0, 8), (0, 9), (1, 0), (1, 1)])))
+        self.assertFalse(board.check_five(self.bits([(0, 9), (1, 0), (2, 1), (3, 2), (4, 3)])))
+        self.assertFalse(board.check_five(self.bits([(1, 0), (1, 9), (2, 8), (3, 7), (4, 6)])))
+
+    def test_make_unmake_restores_state(self):
+        rng = random.Random(0)
+        board = BitboardGame(10)
+        before = (board.bits[:], board.hash, board.frontier, board.current_player, board.last_move)
+        actions = rng.sample([(x, y) for x in range(10) for y in range(10)], 30)
+        played = []
+        for action in actions:
+            if board.game_over:
+                break
+            board.make_move(action)
+            played.append(action)
+        for _ in played:
+            board.unmake_move()
+        self.assertEqual((board.bits, board.hash, board.frontier, board.current_player, board.last_move), before)
+        self.assertFalse(board.game_over)
+        self.assertIsNone(board.winner)
+
+    def test_make_move_detects_win(self):
+        board = BitboardGame(10)
+        for y in range(4):
+            board.make_move((0, y))
+            board.make_move((5, y))
+        board.make_move((0, 4))
+        self.assertTrue(board.game_over)
+        self.assertEqual(board.winner, 1)
+        board.unmake_move()
+        self.assertFalse(board.game_over)
+        self.assertEqual(board.current_player, 1)
+
+    def test_matches_gomoku_game(self):
+        game = play([(4, 4), (4, 5), (5, 5), (3, 3), (6, 6)], size=10)
+        board = BitboardGame.from_game(game)
+        self.assertTrue(np.array_equal(board.board, game.board))
+        self.assertEqual(board.to_game().board.tolist(), game.board.tolist())
+        self.assertEqual(board.get_point(4, 5), 2)
+        self.assertEqual(sorted(board.get_player_points(1)), sorted(game.get_player_points(1)))
+
+    def test_rollout_from_finished_position(self):
+        # 到达局面的落子已经取胜时, 模拟不再落子而直接返回胜者
+        board = BitboardGame(10)
+        for y in range(4):
+            board.make_move((0, y))
+            board.make_move((5, y))
+        board.make_move((0, 4))
+        self.assertEqual(rollout(board, 100), (1, 0))
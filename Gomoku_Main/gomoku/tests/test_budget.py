@@ -0,0 +1,83 @@
+import time
+import random
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from MCTS.GomokuArrayMCTS import ArrayMCTSTree
+from gomoku import views
+from gomoku.tests.helpers import play, GameClientMixin
+
+
+def new_trees():
+    random.seed(0)
+    game = play([(4, 4), (4, 5)], size=10)
+    trees = [MCTSTree(MCTSNode(BitboardGame.from_game(game), move=game.last_move)), ArrayMCTSTree(game)]
+    for tree in trees:
+        tree.ONLY_NEARBY = True
+        tree.SIMULATION_DEPTH = 30
+    return trees
+
+
+class BudgetTest(SimpleTestCase):
+    def test_time_budget(self):
+        for tree in new_trees():
+            with self.subTest(type(tree).__name__):
+                tree.SIMULATION_TIMES = 10 ** 9
+                tree.TIME_BUDGET = 0.2
+                start = time.monotonic()
+                tree.model()
+                self.assertLess(time.monotonic() - start, 2)
+                self.assertGreaterEqual(tree.simulation_count, 1)
+
+    def test_node_budget(self):
+        tree = new_trees()[0]
+        tree.search(None, node_budget=100)
+        # 检查预算前最多再扩展一个节点的全部子节点
+        self.assertGreaterEqual(tree.node_count, 100)
+        self.assertLess(tree.node_count, 100 + 100)
+
+    def test_node_budget_array(self):
+        tree = new_trees()[1]
+        tree.SIMULATION_TIMES = 10 ** 9
+        tree.NODE_BUDGET = 100
+        tree.model()
+        self.assertLess(tree.simulation_count, 10 ** 9)
+
+    def test_simulation_times_without_budget(self):
+        for tree in new_trees():
+            tree.SIMULATION_TIMES = 25
+            tree.model()
+            self.assertEqual(tree.simulation_count, 25)
+
+
+class BudgetSettingsTest(GameClientMixin, SimpleTestCase):
+    def test_budgets(self):
+        self.configure(time_budget=1500, node_budget=2000)
+        state = self.state()
+        self.assertEqual((state['time_budget'], state['node_budget']), (1.5, 2000))
+        self.configure(time_budget=0, node_budget=0)
+        state = self.state()
+        self.assertEqual((state['time_budget'], state['node_budget']), (None, None))
+
+    def test_budgets_clamped(self):
+        self.configure(time_budget=10 ** 12, node_budget=10 ** 12, simulation_times=10 ** 12)
+        state = self.state()
+        self.assertEqual(state['time_budget'], views.SEARCH_LIMITS['max_time_budget'])
+        self.assertEqual(state['node_budget'], views.SEARCH_LIMITS['max_node_budget'])
+        self.assertEqual(state['simulation_times'], views.SEARCH_LIMITS['max_simulations'])
+
+    def test_invalid_settings(self):
+        self.configure(time_budget=1000)
+        for data in [{'time_budget': 'abc'}, {'node_budget': -1}, {'node_budget': [1]}, {'simulation_times': '500'},
+                     {'only_nearby': 'yes'}]:
+            with self.subTest(data):
+                res = self.api('settings', data, status=400)
+                self.assertIn('error', res)
+        # 请求被拒绝时不修改设置
+        self.assertEqual(self.state()['time_budget'], 1)
+
+    def test_invalid_body(self):
+        response = self.client.post('/api/gomoku/settings', '[1]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/gomoku/settings', 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
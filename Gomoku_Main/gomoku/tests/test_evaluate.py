@@ -0,0 +1,60 @@
+import random
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from MCTS.GomokuRule import ThreatIndex
+from MCTS.GomokuEvaluate import evaluate, five_points
+from gomoku.tests.helpers import play
+
+# 玩家1在第4行连下四子(两端为空), 玩家2的棋子分散在第0行
+FOUR_MOVES = [(4, 2), (0, 0), (4, 3), (0, 3), (4, 4), (0, 6), (4, 5)]
+
+
+def values(moves):
+    threat_index = ThreatIndex(BitboardGame.from_game(play(moves, size=10)))
+    return evaluate(threat_index, 1), evaluate(threat_index, 2)
+
+
+class EvaluateTest(SimpleTestCase):
+    def test_finished_game(self):
+        self.assertEqual(values(FOUR_MOVES + [(9, 9), (4, 6)]), (1.0, 0.0))
+
+    def test_to_move_can_win(self):
+        self.assertEqual(values(FOUR_MOVES + [(0, 9)]), (1.0, 0.0))
+
+    def test_rival_open_four(self):
+        self.assertEqual(values(FOUR_MOVES), (1.0, 0.0))
+        threat_index = ThreatIndex(BitboardGame.from_game(play(FOUR_MOVES, size=10)))
+        self.assertEqual(five_points(threat_index, 1), {(4, 1), (4, 6)})
+
+    def test_values_are_complementary(self):
+        rng = random.Random(5)
+        for _ in range(20):
+            moves = rng.sample([(x, y) for x in range(10) for y in range(10)], 8)
+            game = play(moves, size=10)
+            if game.game_over:
+                continue
+            p1, p2 = values(moves)
+            with self.subTest(moves=moves):
+                self.assertAlmostEqual(p1 + p2, 1)
+                self.assertTrue(0 <= p1 <= 1)
+
+    def test_patterns_favour_owner(self):
+        # 玩家1有活三, 玩家2没有棋型
+        p1, _ = values([(4, 3), (0, 0), (4, 4), (9, 9), (4, 5), (0, 9)])
+        self.assertGreater(p1, 0.5)
+        self.assertLess(p1, 1)
+
+
+class RolloutCutoffTest(SimpleTestCase):
+    def test_search(self):
+        random.seed(0)
+        game = play([(4, 4), (4, 5)], size=10)
+        tree = MCTSTree(MCTSNode(BitboardGame.from_game(game), move=game.last_move))
+        tree.ONLY_NEARBY = True
+        tree.SIMULATION_TIMES = 40
+        tree.ROLLOUT_CUTOFF = 2
+        tree.model()
+        self.assertEqual(tree.simulation_count, 40)
+        # 两步之内分不出胜负, 不评估时每次模拟都按平局加0.1, 截断后改为按评估的胜率回溯
+        self.assertTrue(any(abs(wins - 0.1 * visits) > 1e-9 for _, visits, wins in tree.last_statistics))
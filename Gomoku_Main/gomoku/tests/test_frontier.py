@@ -0,0 +1,56 @@
+import random
+from django.test import SimpleTestCase
+from MCTS.GomokuEnv import GomokuGame, FRONTIER_RADIUS, get_nearby_points
+from MCTS.GomokuBitboard import BitboardGame
+
+
+def expected_points(board, n):
+    """按切比雪夫距离直接计算已有棋子周围n格以内的空位"""
+    size = len(board)
+    stones = [(x, y) for x in range(size) for y in range(size) if board[x][y] != 0]
+    return {(x, y) for x in range(size) for y in range(size)
+            if board[x][y] == 0 and any(max(abs(x - i), abs(y - j)) <= n for i, j in stones)}
+
+
+class FrontierTest(SimpleTestCase):
+    def test_frontier_matches_scan(self):
+        rng = random.Random(3)
+        game = GomokuGame(10)
+        board = BitboardGame(10)
+        for action in rng.sample([(x, y) for x in range(10) for y in range(10)], 25):
+            if game.game_over:
+                break
+            game.step(action)
+            board.make_move(action)
+            expected = expected_points(game.board, FRONTIER_RADIUS)
+            with self.subTest(action=action):
+                self.assertEqual(set(game.get_nearby_points(FRONTIER_RADIUS)), expected)
+                self.assertEqual(set(board.get_nearby_points(FRONTIER_RADIUS)), expected)
+
+    def test_other_radius(self):
+        rng = random.Random(4)
+        board = BitboardGame(10)
+        for action in rng.sample([(x, y) for x in range(10) for y in range(10)], 6):
+            board.make_move(action)
+        for n in (1, 3, 4):
+            expected = expected_points(board.board, n)
+            with self.subTest(n=n):
+                self.assertEqual(set(board.get_nearby_points(n)), expected)
+                self.assertEqual({tuple(point) for point in get_nearby_points(board.board, n)}, expected)
+
+    def test_empty_board(self):
+        self.assertEqual(GomokuGame(10).get_nearby_points(FRONTIER_RADIUS), [(5, 5)])
+        self.assertEqual(BitboardGame(10).get_nearby_points(FRONTIER_RADIUS), [(5, 5)])
+
+    def test_set_and_copy(self):
+        source = GomokuGame(10)
+        for action in [(4, 4), (4, 5), (0, 9)]:
+            source.step(action)
+        game = GomokuGame(10)
+        game.set(size=10, board=source.board)
+        self.assertEqual(game.frontier, source.frontier)
+        self.assertEqual(game.occupied_mask, source.occupied_mask)
+        copy = source.copy()
+        copy.step((9, 0))
+        self.assertNotEqual(copy.frontier, source.frontier)
+        self.assertEqual(set(source.get_nearby_points(FRONTIER_RADIUS)), expected_points(source.board, FRONTIER_RADIUS))
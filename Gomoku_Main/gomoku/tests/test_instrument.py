@@ -0,0 +1,62 @@
+import random
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from MCTS.GomokuStats import SearchStats
+from gomoku.metrics import EngineMetrics
+from gomoku.tests.helpers import play, GameClientMixin
+
+
+def search(instrument):
+    random.seed(0)
+    game = play([(4, 4), (4, 5)], size=10)
+    tree = MCTSTree(MCTSNode(BitboardGame.from_game(game), move=game.last_move))
+    tree.ONLY_NEARBY = True
+    tree.SIMULATION_TIMES = 40
+    tree.SIMULATION_DEPTH = 30
+    tree.INSTRUMENT = instrument
+    tree.model()
+    return tree
+
+
+class SearchStatsTest(SimpleTestCase):
+    def test_instrumented_search(self):
+        stats = search(True).stats
+        self.assertEqual((stats.searches, stats.simulations), (1, 40))
+        self.assertGreater(stats.elapsed, 0)
+        self.assertGreaterEqual(stats.elapsed, sum(stats.phase_time.values()))
+        self.assertLessEqual(stats.rollouts, 40)
+        self.assertLessEqual(stats.max_rollout_steps, 30)
+        self.assertGreater(stats.nodes_created, 0)
+        self.assertIsNone(search(False).stats)
+
+    def test_merge_and_round_trip(self):
+        stats = search(True).stats
+        total = SearchStats.from_dict(stats.to_dict())
+        self.assertEqual(total.to_dict(), stats.to_dict())
+        total.merge(stats)
+        data = total.to_dict()
+        self.assertEqual((data['searches'], data['simulations']), (2, 80))
+        self.assertEqual(data['tree_size'], stats.tree_size)
+        self.assertAlmostEqual(data['simulations_per_sec'], 80 / (2 * stats.elapsed))
+
+    def test_engine_metrics(self):
+        metrics = EngineMetrics()
+        metrics.record('mcts', 2.0, search(True).stats.to_dict())
+        metrics.record('opening_book', 0.0)
+        data = metrics.to_dict()
+        self.assertEqual((data['moves'], data['mean_think_time'], data['max_think_time']), (2, 1.0, 2.0))
+        self.assertEqual(data['sources'], {'mcts': 1, 'opening_book': 1})
+        self.assertEqual(data['search']['simulations'], 40)
+
+
+class MetricsEndpointTest(GameClientMixin, SimpleTestCase):
+    def test_instrumented_move(self):
+        self.configure(instrument=True)
+        self.api('player_move', {'x': 7, 'y': 7})
+        before = self.api('metrics')
+        res = self.api('ai_move')
+        self.assertEqual(res['stats']['simulations'], 30)
+        after = self.api('metrics')
+        self.assertEqual(after['moves'], before['moves'] + 1)
+        self.assertEqual(after['search']['simulations'], before['search']['simulations'] + 30)
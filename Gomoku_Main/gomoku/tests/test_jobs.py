@@ -0,0 +1,93 @@
+import json
+import time
+import threading
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase
+from gomoku import views
+from gomoku.jobs import AIJobManager, run_ai_job
+from gomoku.tests.helpers import play, GameClientMixin, FAST_SETTINGS
+
+
+def job_state(**settings):
+    return {**views.new_state(), **FAST_SETTINGS, **settings, 'game': play([(7, 7)])}
+
+
+class RunAIJobTest(SimpleTestCase):
+    def test_run(self):
+        progress = {}
+        ai_move, note, think_time, stats = run_ai_job(job_state(), progress, threading.Event())
+        self.assertEqual(play([(7, 7)]).board[ai_move], 0)
+        self.assertEqual(progress['simulations'], 30)
+        self.assertEqual(progress['best_move'], list(ai_move))
+        self.assertLessEqual(len(progress['visits']), 10)
+
+    def test_cancelled(self):
+        cancel = threading.Event()
+        cancel.set()
+        progress = {}
+        run_ai_job(job_state(simulation_times=10000), progress, cancel)
+        # 第一次报告进度时停止搜索
+        self.assertLess(progress['simulations'], 10000)
+
+
+class AIJobEndpointTest(GameClientMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        manager = AIJobManager(workers=1)
+        patcher = mock.patch.object(views, 'job_manager', manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.shutdown, manager)
+
+    @staticmethod
+    def shutdown(manager):
+        if manager.executor is not None:
+            manager.executor.shutdown()
+            manager.manager.shutdown()
+
+    def submit(self, **settings):
+        self.configure(**settings)
+        self.api('player_move', {'x': 7, 'y': 7})
+        res = self.api('ai_move_async')
+        self.assertEqual(res['status'], 'pending')
+        return res['job_id']
+
+    def wait(self, job_id, timeout=30):
+        deadline = time.monotonic() + timeout
+        while True:
+            res = self.client.get('/api/gomoku/ai_job', {'job_id': job_id}).json()
+            if res['status'] not in ('pending', 'running') or time.monotonic() > deadline:
+                return res
+            time.sleep(0.05)
+
+    def test_job_applies_move_once(self):
+        job_id = self.submit()
+        # 任务未完成时重复提交返回同一任务
+        self.assertEqual(self.api('ai_move_async')['job_id'], job_id)
+        res = self.wait(job_id)
+        self.assertEqual(res['status'], 'done')
+        self.assertEqual(res['current_player'], 1)
+        self.assertEqual(res['progress']['simulations'], 30)
+        self.wait(job_id)
+        board = self.state()['game'].board
+        self.assertEqual(int((board == 2).sum()), 1)
+        self.assertIsNone(self.state()['job_id'])
+
+    def test_cancel(self):
+        job_id = self.submit(simulation_times=100000)
+        self.assertEqual(self.api('ai_job_cancel', {'job_id': job_id})['status'], 'cancelled')
+        self.assertEqual(self.wait(job_id)['status'], 'cancelled')
+        self.assertEqual(int((self.state()['game'].board == 2).sum()), 0)
+        self.assertEqual(self.api('ai_job_cancel', {'job_id': 'missing'})['status'], 'missing')
+
+    async def test_stream(self):
+        job_id = await sync_to_async(self.submit)()
+        response = await self.async_client.get('/api/gomoku/ai_job_stream', {'job_id': job_id})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = [chunk async for chunk in response.streaming_content]
+        self.assertTrue(all(event.startswith(b'data: ') for event in events))
+        last = json.loads(events[-1][len(b'data: '):])
+        self.assertEqual(last['status'], 'done')
+        state = await sync_to_async(self.state)()
+        self.assertEqual(int((state['game'].board == 2).sum()), 1)
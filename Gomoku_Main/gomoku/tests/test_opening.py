@@ -0,0 +1,67 @@
+import os
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from MCTS.GomokuOpening import (SYMMETRIES, OpeningBook, get_opening_book, transform_board, transform_point,
+                                inverse_point, canonicalize)
+from gomoku.tests.helpers import play
+
+
+class SymmetryTest(SimpleTestCase):
+    def test_point_round_trip(self):
+        for size in (10, 15):
+            for symmetry in SYMMETRIES:
+                for x in range(size):
+                    for y in range(size):
+                        point = transform_point((x, y), size, symmetry)
+                        self.assertTrue(0 <= point[0] < size and 0 <= point[1] < size)
+                        self.assertEqual(inverse_point(point, size, symmetry), (x, y))
+                        self.assertEqual(transform_point(inverse_point((x, y), size, symmetry), size, symmetry),
+                                         (x, y))
+
+    def test_point_matches_board(self):
+        size = 10
+        board = np.arange(size * size).reshape(size, size)
+        for symmetry in SYMMETRIES:
+            transformed = transform_board(board, symmetry)
+            for x, y in [(0, 0), (0, 9), (2, 7), (9, 3)]:
+                with self.subTest(symmetry=symmetry, point=(x, y)):
+                    self.assertEqual(transformed[transform_point((x, y), size, symmetry)], board[x, y])
+
+    def test_symmetries_are_distinct(self):
+        board = np.arange(100).reshape(10, 10)
+        images = {transform_board(board, symmetry).tobytes() for symmetry in SYMMETRIES}
+        self.assertEqual(len(images), 8)
+
+    def test_canonicalize_symmetric_boards(self):
+        board = play([(4, 4), (4, 5), (5, 5), (3, 3), (6, 6)], size=10).board
+        key, _ = canonicalize(board, 2)
+        for symmetry in SYMMETRIES:
+            self.assertEqual(canonicalize(transform_board(board, symmetry), 2)[0], key)
+        self.assertNotEqual(canonicalize(board, 1)[0], key)
+
+
+class OpeningBookTest(SimpleTestCase):
+    def setUp(self):
+        self.board = play([(4, 4), (4, 5), (5, 6)], size=10).board
+
+    def test_symmetric_lookup(self):
+        book = OpeningBook(10)
+        book.add(self.board, 2, (6, 6))
+        for symmetry in SYMMETRIES:
+            with self.subTest(symmetry=symmetry):
+                self.assertEqual(book.lookup(transform_board(self.board, symmetry), 2),
+                                 transform_point((6, 6), 10, symmetry))
+        self.assertIsNone(book.lookup(self.board, 1))
+        self.assertIsNone(book.lookup(np.zeros((15, 15), dtype=int), 2))
+
+    def test_save_and_load(self):
+        book = OpeningBook(10)
+        book.add(self.board, 2, (6, 6))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.json.gz')
+            book.save(path)
+            loaded = OpeningBook.load(path)
+            self.assertIsNone(get_opening_book(os.path.join(directory, 'missing.json.gz')).lookup(self.board, 2))
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(loaded.lookup(self.board.T, 2), (6, 6))
@@ -0,0 +1,61 @@
+import random
+from django.test import SimpleTestCase
+from MCTS.GomokuPattern import (classify_window, build_table, get_windows, TABLE5, TABLE6, FIVE, OPEN_FOUR, FOUR,
+                                BROKEN_FOUR, OPEN_THREE, BROKEN_THREE, THREE)
+
+
+def window_code(values):
+    return sum(v * 3 ** k for k, v in enumerate(values))
+
+
+class PatternTest(SimpleTestCase):
+    def test_classify_window5(self):
+        cases = {
+            (1, 1, 1, 1, 1): (1, FIVE, ()),
+            (2, 2, 2, 2, 0): (2, FOUR, (4,)),
+            (0, 1, 1, 1, 1): (1, FOUR, (0,)),
+            (1, 1, 0, 1, 1): (1, BROKEN_FOUR, (2,)),
+            (1, 0, 1, 0, 1): (1, THREE, (1, 3)),
+            (1, 1, 0, 0, 0): None,
+            (1, 1, 2, 1, 1): None,
+            (0, 0, 0, 0, 0): None,
+        }
+        for values, expected in cases.items():
+            with self.subTest(values):
+                self.assertEqual(classify_window(values), expected)
+
+    def test_classify_window6(self):
+        cases = {
+            (0, 1, 1, 1, 1, 0): (1, OPEN_FOUR, (0, 5)),
+            (0, 2, 2, 2, 0, 0): (2, OPEN_THREE, (4,)),
+            (0, 0, 1, 1, 1, 0): (1, OPEN_THREE, (1,)),
+            (0, 1, 1, 0, 1, 0): (1, BROKEN_THREE, (3,)),
+            (1, 1, 1, 1, 0, 0): None,
+            (0, 1, 1, 1, 1, 2): None,
+            (0, 1, 0, 1, 0, 0): None,
+        }
+        for values, expected in cases.items():
+            with self.subTest(values):
+                self.assertEqual(classify_window(values), expected)
+
+    def test_tables_match_classifier(self):
+        self.assertEqual(len(TABLE5), 3 ** 5)
+        self.assertEqual(len(TABLE6), 3 ** 6)
+        self.assertEqual(TABLE5, build_table(5))
+        rng = random.Random(0)
+        for length, table in [(5, TABLE5), (6, TABLE6)]:
+            for _ in range(200):
+                values = tuple(rng.randrange(3) for _ in range(length))
+                self.assertEqual(table[window_code(values)], classify_window(values))
+
+    def test_windows(self):
+        size = 10
+        windows, tables, cell_windows = get_windows(size)
+        # 每个方向上长度为5的窗口: 横竖各size * (size - 4)个, 两个斜方向各(size - 4) ** 2个, 长度为6的同理
+        count5 = 2 * size * (size - 4) + 2 * (size - 4) ** 2
+        count6 = 2 * size * (size - 5) + 2 * (size - 5) ** 2
+        self.assertEqual(len(windows), count5 + count6)
+        self.assertEqual(sum(table is TABLE5 for table in tables), count5)
+        for window_id, window in enumerate(windows):
+            for k, (x, y) in enumerate(window):
+                self.assertIn((window_id, 3 ** k), cell_windows[x * size + y])
@@ -0,0 +1,67 @@
+import time
+import random
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from gomoku import views
+from gomoku.ponder import Ponderer
+from gomoku.store import GameStore
+from gomoku.tests.helpers import play, GameClientMixin
+
+
+def new_tree():
+    random.seed(0)
+    game = play([(4, 4), (4, 5)], size=10)
+    tree = MCTSTree(MCTSNode(BitboardGame.from_game(game), move=game.last_move))
+    tree.ONLY_NEARBY = True
+    tree.SIMULATION_DEPTH = 30
+    return tree
+
+
+class PondererTest(SimpleTestCase):
+    def test_start_and_stop(self):
+        ponderer = Ponderer()
+        tree = new_tree()
+        ponderer.start('a', tree)
+        time.sleep(0.1)
+        self.assertTrue(ponderer.is_pondering('a'))
+        simulations = ponderer.stop('a')
+        self.assertGreater(simulations, 0)
+        self.assertEqual(tree.root_node.visits, simulations)
+        self.assertFalse(ponderer.is_pondering('a'))
+        self.assertNotIn('a', ponderer.threads)
+        self.assertEqual(ponderer.stop('a'), 0)
+
+    def test_budget(self):
+        ponderer = Ponderer()
+        ponderer.start('a', new_tree(), node_budget=50)
+        ponderer.threads['a'][0].join(10)
+        self.assertFalse(ponderer.is_pondering('a'))
+        self.assertGreater(ponderer.stop('a'), 0)
+
+    def test_evicted_game_stops(self):
+        ponderer = Ponderer()
+        store = GameStore(capacity=1, on_evict=ponderer.stop)
+        store.save('a', {})
+        ponderer.start('a', new_tree())
+        store.save('b', {})
+        self.assertNotIn('a', ponderer.threads)
+        ponderer.start('b', new_tree())
+        store.delete('b')
+        self.assertEqual(ponderer.threads, {})
+
+
+class PonderEndpointTest(GameClientMixin, SimpleTestCase):
+    def test_ponder_after_ai_move(self):
+        self.configure(ponder=True, reuse_tree=True, ponder_time=10 ** 9)
+        self.assertEqual(self.state()['ponder_time'], views.SEARCH_LIMITS['max_ponder_time'])
+        self.api('player_move', {'x': 7, 'y': 7})
+        self.api('ai_move')
+        self.assertTrue(views.ponderer.is_pondering(self.game_id))
+        x, y = next(zip(*(self.state()['game'].board == 0).nonzero()))
+        res = self.api('player_move', {'x': int(x), 'y': int(y)})
+        self.assertFalse(views.ponderer.is_pondering(self.game_id))
+        self.assertEqual(res['current_player'], 2)
+        self.api('ai_move')
+        views.game_store.delete(self.game_id)
+        self.assertNotIn(self.game_id, views.ponderer.threads)
@@ -0,0 +1,56 @@
+import random
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from gomoku.tests.helpers import play
+
+
+def new_tree():
+    random.seed(0)
+    game = play([(4, 4), (4, 5)], size=10)
+    tree = MCTSTree(MCTSNode(BitboardGame.from_game(game), move=game.last_move))
+    tree.RAVE = True
+    tree.ONLY_NEARBY = True
+    tree.SIMULATION_DEPTH = 30
+    return tree
+
+
+class RaveTest(SimpleTestCase):
+    def test_backpropagation_updates_amaf(self):
+        tree = new_tree()
+        root = tree.root_node
+        tree.expansion(root)
+        children = {child.move[1]: child for child in root.children}
+        leaf = children[(3, 3)]
+        leaf.if_winner = 1
+        # 模拟中玩家1后来下了(5, 5), 玩家2下了(3, 4)
+        moves = [(2, (6, 6)), (1, (5, 5)), (2, (3, 4))]
+        tree.backpropagation(leaf, moves)
+        self.assertEqual((children[(5, 5)].amaf_visits, children[(5, 5)].amaf_wins), (1, 1))
+        # 同一位置但不是同一玩家的落子不计入
+        self.assertEqual(children[(3, 4)].amaf_visits, 0)
+        self.assertEqual(children[(6, 6)].amaf_visits, 0)
+        # 选择路径上的落子同样计入AMAF统计
+        self.assertEqual((leaf.visits, leaf.wins, leaf.amaf_visits), (1, 1, 1))
+        self.assertEqual(root.visits, 1)
+
+    def test_select_child_blends_amaf(self):
+        tree = new_tree()
+        root = tree.root_node
+        tree.expansion(root)
+        a, b = root.children[:2]
+        for child in root.children:
+            child.visits, child.wins = 10, 5
+        root.visits = 10 * len(root.children)
+        a.amaf_visits, a.amaf_wins = 100, 90
+        b.amaf_visits, b.amaf_wins = 100, 10
+        self.assertIs(root.select_child(ucb_c=0, rave_equivalence=1000), a)
+        b.amaf_wins = 100
+        self.assertIs(root.select_child(ucb_c=0, rave_equivalence=1000), b)
+
+    def test_search(self):
+        tree = new_tree()
+        tree.SIMULATION_TIMES = 60
+        tree.model()
+        self.assertEqual(tree.simulation_count, 60)
+        self.assertTrue(any(child.amaf_visits > child.visits for child in tree.root_node.children))
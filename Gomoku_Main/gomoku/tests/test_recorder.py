@@ -0,0 +1,92 @@
+from unittest import mock
+from django.db import DatabaseError
+from django.test import TestCase
+from gomoku import views, recorder as recorder_module
+from gomoku.models import Game, Move
+from gomoku.recorder import GameRecorder, MAX_RETRIES
+from gomoku.tests.helpers import GameClientMixin
+
+
+@mock.patch.object(GameRecorder, 'start')
+class GameRecorderTest(TestCase):
+    def record_game(self, recorder, record_id, moves):
+        recorder.start_game(record_id, 'session', 10, True, {'simulation_times': 100})
+        for ply, action in enumerate(moves, 1):
+            recorder.record_move(record_id, ply, 2 - ply % 2, action, 'human' if ply % 2 else 'mcts')
+
+    def test_flush_writes_games_and_moves(self, start):
+        recorder = GameRecorder()
+        self.record_game(recorder, 'a', [(4, 4), (4, 5), (5, 5)])
+        recorder.finish_game('a', 1)
+        self.assertEqual(recorder.flush(), 3)
+        game = Game.objects.get(record_id='a')
+        self.assertEqual((game.move_count, game.winner, game.size), (3, 1, 10))
+        self.assertIsNotNone(game.finished_at)
+        self.assertEqual(list(game.moves.values_list('ply', 'player', 'x', 'y')),
+                         [(1, 1, 4, 4), (2, 2, 4, 5), (3, 1, 5, 5)])
+        self.assertEqual(recorder.flush(), 0)
+
+    def test_flush_is_incremental(self, start):
+        recorder = GameRecorder()
+        self.record_game(recorder, 'a', [(4, 4)])
+        recorder.flush()
+        recorder.record_move('a', 2, 2, (4, 5), 'mcts', think_time=0.5, simulations=100)
+        self.assertEqual(recorder.flush(), 1)
+        self.assertEqual(Game.objects.get(record_id='a').move_count, 2)
+        self.assertEqual(Move.objects.get(game_id='a', ply=2).simulations, 100)
+
+    def test_disabled(self, start):
+        recorder = GameRecorder(enabled=False)
+        self.record_game(recorder, 'a', [(4, 4)])
+        self.assertEqual(recorder.flush(), 0)
+        self.assertFalse(Game.objects.exists())
+        start.assert_not_called()
+
+    def test_failed_game_is_retried(self, start):
+        recorder = GameRecorder()
+        self.record_game(recorder, 'a', [(4, 4)])
+        self.record_game(recorder, 'b', [(5, 5)])
+        bulk_create = Move.objects.bulk_create
+
+        def fail_b(moves, **kwargs):
+            if moves and moves[0].game_id == 'b':
+                raise DatabaseError('locked')
+            return bulk_create(moves, **kwargs)
+
+        with mock.patch.object(Move.objects, 'bulk_create', side_effect=fail_b), \
+                mock.patch.object(recorder_module.logger, 'exception'):
+            self.assertEqual(recorder.flush(), 1)
+        self.assertTrue(Move.objects.filter(game_id='a').exists())
+        self.assertFalse(Game.objects.filter(record_id='b').exists())
+        self.assertEqual(recorder.failures, {'b': 1})
+        self.assertEqual(recorder.flush(), 1)
+        self.assertTrue(Move.objects.filter(game_id='b').exists())
+        self.assertEqual(recorder.failures, {})
+
+    def test_failing_game_is_dropped(self, start):
+        recorder = GameRecorder()
+        self.record_game(recorder, 'b', [(5, 5)])
+        with mock.patch.object(Move.objects, 'bulk_create', side_effect=DatabaseError('locked')), \
+                mock.patch.object(recorder_module.logger, 'exception'), \
+                mock.patch.object(recorder_module.logger, 'error'):
+            for _ in range(MAX_RETRIES + 1):
+                recorder.flush()
+        self.assertIn('b', recorder.dropped)
+        recorder.record_move('b', 2, 2, (5, 6), 'mcts')
+        self.assertEqual(recorder.flush(), 0)
+        self.assertFalse(Game.objects.filter(record_id='b').exists())
+
+
+@mock.patch.object(GameRecorder, 'start')
+class RecordEndpointTest(GameClientMixin, TestCase):
+    def test_game_is_recorded(self, start):
+        recorder = GameRecorder()
+        self.configure()
+        with mock.patch.object(views, 'recorder', recorder):
+            self.api('player_move', {'x': 7, 'y': 7})
+            self.api('ai_move')
+        self.assertEqual(recorder.flush(), 2)
+        game = Game.objects.get(session_id=self.game_id)
+        self.assertEqual(game.settings['simulation_times'], 30)
+        self.assertEqual(list(game.moves.values_list('ply', 'player', 'source')), [(1, 1, 'human'), (2, 2, 'mcts')])
+        self.assertEqual(game.moves.get(ply=2).simulations, 30)
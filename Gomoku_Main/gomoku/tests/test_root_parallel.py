@@ -0,0 +1,76 @@
+import random
+from unittest import mock
+from django.test import SimpleTestCase
+from MCTS import GomokuMTCS
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree, get_process_pool, root_search
+from gomoku import views
+from gomoku.tests.helpers import play, GameClientMixin
+
+
+def new_tree(workers=2, simulations=40):
+    random.seed(0)
+    game = play([(4, 4), (4, 5)], size=10)
+    tree = MCTSTree(MCTSNode(BitboardGame.from_game(game), move=game.last_move))
+    tree.ONLY_NEARBY = True
+    tree.SIMULATION_TIMES = simulations
+    tree.SIMULATION_DEPTH = 30
+    tree.WORKERS = workers
+    return tree
+
+
+class RootParallelTest(SimpleTestCase):
+    def test_root_search(self):
+        tree = new_tree()
+        settings = {'SIMULATION_TIMES': 20, 'SIMULATION_DEPTH': 30, 'ONLY_NEARBY': True}
+        result = root_search(tree.root_node.state, tree.root_node.move, settings, 1)
+        self.assertEqual(sum(visits for visits, _, _, _ in result.values()), 20)
+        self.assertEqual(result, root_search(tree.root_node.state, tree.root_node.move, settings, 1))
+
+    def test_parallel_search_merges_statistics(self):
+        tree = new_tree()
+        simulations = tree.parallel_search(40)
+        root = tree.root_node
+        self.assertEqual(simulations, 40)
+        self.assertEqual(sum(child.visits for child in root.children), 40)
+        self.assertEqual(root.visits, 40)
+        self.assertEqual(len({child.move[1] for child in root.children}), len(root.children))
+
+    def test_model(self):
+        tree = new_tree()
+        player, action = tree.model()
+        self.assertEqual(player, 1)
+        self.assertEqual(tree.simulation_count, 40)
+        self.assertEqual(tree.root_node.state.get_point(*action), 1)
+
+
+class ProcessPoolTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(GomokuMTCS, '_PROCESS_POOL', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reuses_pool(self):
+        pool = get_process_pool(2)
+        self.addCleanup(pool.shutdown)
+        self.assertIs(get_process_pool(2), pool)
+
+    def test_replaces_pool_when_workers_change(self):
+        # 只保留一个进程池, 原来的进程池被关闭
+        pool = get_process_pool(2)
+        future = pool.submit(sum, [1, 2])
+        other = get_process_pool(3)
+        self.addCleanup(other.shutdown)
+        self.assertIsNot(other, pool)
+        self.assertEqual(other._max_workers, 3)
+        self.assertTrue(pool._shutdown_thread)
+        self.assertEqual(future.result(), 3)
+        self.assertIs(get_process_pool(3), other)
+
+
+class WorkersSettingTest(GameClientMixin, SimpleTestCase):
+    def test_workers_clamped(self):
+        self.configure(workers=10 ** 6)
+        self.assertEqual(self.state()['workers'], views.MAX_WORKERS)
+        self.configure(workers=0)
+        self.assertEqual(self.state()['workers'], 1)
@@ -0,0 +1,52 @@
+import random
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuRule import ThreatIndex, RuleStrategy
+from MCTS.GomokuPattern import THREAT_CLASSES
+from gomoku.tests.helpers import play
+
+
+def snapshot(index):
+    return {player: {threat_class: dict(index.threats[player][threat_class]) for threat_class in THREAT_CLASSES}
+            for player in (1, 2)}
+
+
+class ThreatIndexTest(SimpleTestCase):
+    def test_incremental_matches_rebuild(self):
+        rng = random.Random(2)
+        board = BitboardGame(10)
+        index = ThreatIndex(board)
+        points = rng.sample([(x, y) for x in range(10) for y in range(10)], 40)
+        for action in points:
+            if board.game_over:
+                break
+            board.make_move(action)
+            index.update(action)
+            self.assertEqual(snapshot(index), snapshot(ThreatIndex(board)))
+
+    def test_unmake_restores_index(self):
+        board = BitboardGame.from_game(play([(4, 4), (0, 0), (4, 5), (0, 2), (4, 6)], size=10))
+        index = ThreatIndex(board)
+        before = (snapshot(index), index.codes[:])
+        for action in [(4, 7), (4, 3)]:
+            board.make_move(action)
+            index.update(action)
+        for action in [(4, 3), (4, 7)]:
+            board.unmake_move()
+            index.update(action)
+        self.assertEqual((snapshot(index), index.codes), before)
+
+
+class RuleStrategyTest(SimpleTestCase):
+    def test_complete_five(self):
+        game = play([(4, 2), (0, 0), (4, 3), (0, 2), (4, 4), (0, 4), (4, 5), (9, 9)], size=10)
+        self.assertIn(RuleStrategy(game).model(), [(4, 1), (4, 6)])
+
+    def test_block_four(self):
+        game = play([(4, 2), (0, 0), (4, 3), (0, 2), (4, 4), (9, 9), (4, 5)], size=10)
+        self.assertIn(RuleStrategy(game).model(), [(4, 1), (4, 6)])
+
+    def test_rank_actions_prefers_threats(self):
+        game = play([(4, 2), (0, 0), (4, 3), (0, 2), (4, 4), (9, 9), (4, 5)], size=10)
+        ranked = RuleStrategy(game).rank_actions(game.get_empty_points())
+        self.assertEqual(set(ranked[:2]), {(4, 1), (4, 6)})
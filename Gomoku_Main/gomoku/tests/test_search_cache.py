@@ -0,0 +1,91 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.test import SimpleTestCase
+from MCTS.GomokuEnv import GomokuGame
+from MCTS.GomokuOpening import SYMMETRIES, transform_board, transform_point
+from MCTS.GomokuCache import SearchCache
+from gomoku import engine, views
+from gomoku.tests.helpers import play, FAST_SETTINGS
+
+
+class SearchCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.board = play([(4, 4), (4, 5), (5, 5), (3, 3), (6, 6)], size=10).board
+        self.statistics = [((7, 7), 30, 20.0), ((2, 2), 10, 4.0), ((0, 9), 0, 0.0)]
+
+    def test_symmetric_hit(self):
+        cache = SearchCache()
+        cache.put(self.board, 2, (7, 7), self.statistics)
+        for symmetry in SYMMETRIES:
+            with self.subTest(symmetry=symmetry):
+                result = cache.get(transform_board(self.board, symmetry), 2)
+                self.assertEqual(result['best_move'], transform_point((7, 7), 10, symmetry))
+                self.assertEqual(result['simulations'], 40)
+                self.assertEqual(sorted(result['visits']), sorted(
+                    (transform_point(action, 10, symmetry), visits, wins)
+                    for action, visits, wins in self.statistics if visits > 0))
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(self.board, 1))
+
+    def test_keeps_more_simulations(self):
+        cache = SearchCache()
+        cache.put(self.board, 2, (7, 7), self.statistics)
+        cache.put(transform_board(self.board, (1, False)), 2, (0, 0), [((0, 0), 5, 1.0)])
+        self.assertEqual(cache.get(self.board, 2)['best_move'], (7, 7))
+
+    def test_lru_capacity(self):
+        cache = SearchCache(capacity=1)
+        cache.put(self.board, 2, (7, 7), self.statistics)
+        cache.put(self.board, 1, (7, 7), self.statistics)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(self.board, 2))
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'cache.sqlite3'
+            writer = SearchCache(path=path)
+            writer.put(self.board, 2, (7, 7), self.statistics)
+            writer.connection.close()
+            reader = SearchCache(path=path)
+            result = reader.get(transform_board(self.board, (2, True)), 2)
+            reader.connection.close()
+        self.assertEqual(result['best_move'], transform_point((7, 7), 10, (2, True)))
+
+
+
+class EngineCacheTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(engine, 'search_cache', SearchCache())
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def state(self, board, **settings):
+        game = GomokuGame(10)
+        game.set(size=10, board=board, current_player=2)
+        return {**views.new_state(), **FAST_SETTINGS, 'search_cache': True, **settings, 'game': game}
+
+    def test_cache_hit(self):
+        board = play([(4, 4), (4, 5), (5, 6)], size=10).board
+        ai_move, mcts, note = engine.choose_move(self.state(board))
+        self.assertIsNotNone(mcts)
+        self.assertEqual(self.cache.get(board, 2)['best_move'], tuple(ai_move))
+        # 对称的局面直接使用缓存的落子
+        cached_move, mcts, note = engine.choose_move(self.state(transform_board(board, (1, True))))
+        self.assertIsNone(mcts)
+        self.assertEqual(note, engine.CACHE_NOTE)
+        self.assertEqual(tuple(cached_move), transform_point(ai_move, 10, (1, True)))
+
+    def test_seed_when_not_enough(self):
+        board = play([(4, 4), (4, 5), (5, 6)], size=10).board
+        engine.choose_move(self.state(board))
+        _, mcts, note = engine.choose_move(self.state(board, simulation_times=60))
+        self.assertIsNotNone(mcts)
+        # 缓存的30次访问计入模拟次数, 只需再模拟30次
+        self.assertEqual(mcts.simulation_count, 30)
+        self.assertGreaterEqual(self.cache.get(board, 2)['simulations'], 60)
+
+    def test_disabled(self):
+        board = play([(4, 4), (4, 5), (5, 6)], size=10).board
+        engine.choose_move(self.state(board, search_cache=False))
+        self.assertEqual(len(self.cache), 0)
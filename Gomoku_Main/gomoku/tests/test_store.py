@@ -0,0 +1,114 @@
+import time
+import threading
+from unittest import mock
+from django.core.cache import caches
+from django.test import SimpleTestCase, Client
+from gomoku import views
+from gomoku.store import GameStore, StaleStateError
+from gomoku.tests.helpers import play, GameClientMixin
+
+
+class GameStoreTest(SimpleTestCase):
+    def test_lru(self):
+        store = GameStore(capacity=2)
+        store.save('a', {'value': 1})
+        store.save('b', {'value': 2})
+        store.get('a')
+        store.save('c', {'value': 3})
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('a'), {'value': 1})
+        self.assertEqual(len(store), 2)
+
+    def test_ttl(self):
+        store = GameStore(ttl=60)
+        store.save('a', {'value': 1})
+        with mock.patch('gomoku.store.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(store.get('a'))
+            self.assertEqual(len(store), 0)
+
+    def test_concurrent_access(self):
+        store = GameStore(capacity=50, ttl=60)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(300):
+                    game_id = str((n * 7 + i) % 80)
+                    store.save(game_id, {'value': i})
+                    store.get(game_id)
+                    if i % 5 == 0:
+                        store.delete(game_id)
+                    len(store)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(store), 50)
+
+
+class CacheGameStoreTest(SimpleTestCase):
+    def setUp(self):
+        self.store = GameStore(cache='default', key_prefix='test:game:', lock_timeout=0.2)
+        self.addCleanup(caches['default'].clear)
+
+    def test_state_and_tree(self):
+        game = play([(4, 4), (4, 5)])
+        tree = object()
+        self.store.save('a', {'game': game, 'tree': tree})
+        state = self.store.get('a')
+        self.assertIs(state['tree'], tree)
+        self.assertEqual(state['version'], 1)
+        # 缓存中的棋盘被其他进程修改后本进程的搜索树不再可用
+        other = self.store.get('a')
+        other['game'] = play([(4, 4), (4, 5), (5, 5)])
+        other['tree'] = None
+        self.store.save('a', other)
+        self.assertIsNone(self.store.get('a')['tree'])
+
+    def test_version_conflict(self):
+        self.store.save('a', {'game': play([(4, 4)])})
+        first = self.store.get('a')
+        second = self.store.get('a')
+        self.store.save('a', first)
+        with self.assertRaises(StaleStateError):
+            self.store.save('a', second)
+
+    def test_lock_timeout_keeps_other_holder(self):
+        key = 'test:game:lock:a'
+        caches['default'].add(key, 1, 60)
+        with self.assertLogs('gomoku.store', 'WARNING'):
+            with self.store.lock('a'):
+                pass
+        self.assertEqual(caches['default'].get(key), 1)
+        caches['default'].delete(key)
+        with self.store.lock('a'):
+            self.assertEqual(caches['default'].get(key), 1)
+        self.assertIsNone(caches['default'].get(key))
+
+
+class GameLockedTest(GameClientMixin, SimpleTestCase):
+    def test_concurrent_moves(self):
+        with mock.patch.object(views, 'game_store', GameStore(cache='default', key_prefix='test:game:')):
+            self.addCleanup(caches['default'].clear)
+            self.configure()
+            responses = []
+
+            def move(x):
+                response = Client(raise_request_exception=False).post('/api/gomoku/player_move', {'game_id': self.game_id, 'x': x, 'y': 0},
+                                         content_type='application/json')
+                responses.append(response.status_code)
+
+            threads = [threading.Thread(target=move, args=(x,)) for x in range(6)]
+            with self.assertLogs('django.request', 'ERROR'):
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            # 请求依次执行, 只有第一个落子有效, 其余请求看到的已经是电脑的回合
+            self.assertEqual(responses.count(200), 1)
+            self.assertEqual(int((self.state()['game'].board == 1).sum()), 1)
@@ -0,0 +1,82 @@
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuThreatSearch import ThreatSpaceSearch, VCF_SHARE
+from gomoku.tests.helpers import play
+
+
+class ThreatSearchTest(SimpleTestCase):
+    def test_vcf_open_three(self):
+        # 玩家1有活三, 冲成活四即可取胜
+        game = play([(7, 3), (0, 0), (7, 4), (0, 2), (7, 5), (0, 4)])
+        search = ThreatSpaceSearch(game)
+        self.assertIn(search.vcf(), [(7, 2), (7, 6)])
+        self.assertIn(search.model(), [(7, 2), (7, 6)])
+
+    def test_vcf_four(self):
+        game = play([(7, 3), (0, 0), (7, 4), (0, 2), (7, 5), (0, 4), (7, 6), (7, 7)])
+        self.assertEqual(ThreatSpaceSearch(game).vcf(), (7, 2))
+
+    def test_vct_double_three(self):
+        # (7, 7)同时形成横竖两个活三, 没有冲四可走, 只有VCT能找到
+        game = play([(7, 5), (0, 0), (7, 6), (0, 14), (5, 7), (14, 0), (6, 7), (14, 14)])
+        search = ThreatSpaceSearch(game)
+        self.assertIsNone(search.vcf())
+        self.assertEqual(search.vct(), (7, 7))
+
+    def test_no_threat(self):
+        game = play([(7, 7), (0, 0)])
+        search = ThreatSpaceSearch(game)
+        self.assertIsNone(search.vcf())
+        self.assertIsNone(search.vct())
+        self.assertIsNone(search.model())
+
+    def test_defend_vcf(self):
+        # 轮到玩家2, 玩家1有活三, 玩家2必须堵住
+        game = play([(7, 3), (0, 0), (7, 4), (0, 2), (7, 5)])
+        search = ThreatSpaceSearch(game)
+        self.assertIsNone(search.vcf())
+        action = search.model()
+        self.assertIsNotNone(action)
+        game.step(action)
+        self.assertIsNone(ThreatSpaceSearch(game).vcf())
+
+    def test_search_restores_board(self):
+        game = play([(7, 5), (0, 0), (7, 6), (0, 14), (5, 7), (14, 0), (6, 7), (14, 14)])
+        board = BitboardGame.from_game(game)
+        before = (board.bits[:], board.hash, board.current_player)
+        ThreatSpaceSearch(board).model()
+        self.assertEqual((board.bits, board.hash, board.current_player), before)
+
+    def test_node_limit(self):
+        game = play([(7, 5), (0, 0), (7, 6), (0, 14), (5, 7), (14, 0), (6, 7), (14, 14)])
+        search = ThreatSpaceSearch(game, max_nodes=1)
+        self.assertIsNone(search.vct())
+        self.assertLessEqual(search.nodes, 2)
+
+    def test_model_shares_budget(self):
+        # model()中的所有搜索共用max_nodes, VCF只使用其中的VCF_SHARE
+        game = play([(7, 5), (0, 0), (7, 6), (0, 14), (5, 7), (14, 0), (6, 7), (14, 14), (3, 3), (11, 11)])
+        search = ThreatSpaceSearch(game, max_nodes=60)
+        search.model()
+        self.assertLessEqual(search.nodes, 61)
+        search.begin()
+        with search.session(), search.budget(VCF_SHARE):
+            self.assertEqual(search.node_limit, int(60 * VCF_SHARE))
+        self.assertEqual(search.node_limit, 60)
+
+    def test_rival_vcf(self):
+        # 轮到玩家2, 假设玩家1再走一步可以冲活四取胜
+        game = play([(7, 3), (0, 0), (7, 4), (0, 2), (7, 5)])
+        search = ThreatSpaceSearch(game)
+        self.assertIn(search.rival_vcf(), [(7, 2), (7, 6)])
+        self.assertEqual(search.game_env.current_player, 2)
+
+    def test_defend_vcf_skips_inconclusive_candidates(self):
+        # 预算只够找到对手的VCF时, 不能确认的防守点不返回
+        game = play([(7, 3), (0, 0), (7, 4), (0, 2), (7, 5)])
+        search = ThreatSpaceSearch(game, max_nodes=8)
+        with search.session(), search.budget(0.5):
+            self.assertIsNotNone(search.rival_vcf())
+        self.assertIsNone(search.defend_vcf(search.game_env.get_nearby_points(n=2)))
+        search = ThreatSpaceSearch(game)
+        self.assertIsNotNone(search.defend_vcf(search.game_env.get_nearby_points(n=2)))
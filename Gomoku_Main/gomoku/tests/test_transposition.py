@@ -0,0 +1,81 @@
+import random
+from django.test import SimpleTestCase
+from MCTS.GomokuEnv import GomokuGame
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree, TranspositionTable
+from gomoku.tests.helpers import play
+
+
+class ZobristTest(SimpleTestCase):
+    def test_incremental_hash_matches_recompute(self):
+        rng = random.Random(1)
+        for size in (10, 15):
+            game = GomokuGame(size)
+            points = rng.sample([(x, y) for x in range(size) for y in range(size)], size * 2)
+            for action in points:
+                if game.game_over:
+                    break
+                game.step(action)
+                fresh = GomokuGame(size)
+                fresh.set(size=size, board=game.board)
+                with self.subTest(size=size, action=action):
+                    self.assertEqual(game.hash, fresh.hash)
+                    self.assertEqual(BitboardGame.from_game(game).hash, game.hash)
+
+    def test_hash_after(self):
+        game = play([(4, 4), (4, 5)], size=10)
+        expected = game.hash_after((5, 5))
+        board = BitboardGame.from_game(game)
+        self.assertEqual(board.hash_after((5, 5)), expected)
+        game.step((5, 5))
+        self.assertEqual(game.hash, expected)
+        board.make_move((5, 5))
+        self.assertEqual(board.hash, expected)
+        board.unmake_move()
+        self.assertEqual(board.hash, BitboardGame.from_game(play([(4, 4), (4, 5)], size=10)).hash)
+
+    def test_hash_depends_on_player(self):
+        first = play([(4, 4), (0, 0)], size=10)
+        second = play([(0, 0), (4, 4)], size=10)
+        self.assertNotEqual(first.hash, second.hash)
+
+    def test_hash_ignores_move_order(self):
+        first = play([(4, 4), (0, 0), (5, 5), (1, 1)], size=10)
+        second = play([(5, 5), (1, 1), (4, 4), (0, 0)], size=10)
+        self.assertEqual(first.hash, second.hash)
+
+
+class TranspositionTableTest(SimpleTestCase):
+    def test_lru(self):
+        table = TranspositionTable(capacity=2)
+        a = table.lookup(1)
+        table.lookup(2)
+        self.assertIs(table.lookup(1), a)
+        table.lookup(3)
+        self.assertEqual(len(table), 2)
+        self.assertIs(table.lookup(1), a)
+        self.assertNotIn(2, table.entries)
+
+    def test_transposed_nodes_share_statistics(self):
+        tree = MCTSTree(MCTSNode(BitboardGame.from_game(play([(4, 4), (4, 5)], size=10))))
+        tree.TRANSPOSITION = True
+        table = tree.get_transposition_table()
+        root = tree.root_node
+        # 不同的落子顺序到达同一局面: 玩家1下(5, 5)和(3, 3), 玩家2下(6, 6)
+        first = root.new_child((5, 5), table).new_child((6, 6), table).new_child((3, 3), table)
+        second = root.new_child((3, 3), table).new_child((6, 6), table).new_child((5, 5), table)
+        self.assertIs(first.entry, second.entry)
+        self.assertIs(first.state, second.state)
+        first.update(1)
+        self.assertEqual((second.visits, second.wins), (1, 1))
+
+    def test_search_with_transposition(self):
+        random.seed(0)
+        tree = MCTSTree(MCTSNode(BitboardGame.from_game(play([(4, 4), (4, 5)], size=10))))
+        tree.TRANSPOSITION = True
+        tree.ONLY_NEARBY = True
+        tree.SIMULATION_TIMES = 80
+        tree.SIMULATION_DEPTH = 30
+        tree.model()
+        self.assertEqual(tree.simulation_count, 80)
+        self.assertGreater(len(tree.transposition_table), 0)
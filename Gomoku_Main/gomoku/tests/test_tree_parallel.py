@@ -0,0 +1,82 @@
+import os
+import random
+import multiprocessing
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+from MCTS.GomokuArrayMCTS import ArrayMCTSTree, NodeStore
+from gomoku.tests.helpers import play
+
+
+def new_tree(workers=2, simulations=40):
+    random.seed(0)
+    tree = ArrayMCTSTree(play([(4, 4), (4, 5)], size=10))
+    tree.ONLY_NEARBY = True
+    tree.SIMULATION_TIMES = simulations
+    tree.SIMULATION_DEPTH = 30
+    tree.WORKERS = workers
+    tree.store = NodeStore(1024)
+    tree.store.allocate(1)
+    return tree
+
+
+def crash(*args):
+    """代替tree_search_worker的异常退出的工作进程"""
+    os._exit(3)
+
+
+class TreeParallelTest(SimpleTestCase):
+    def assert_consistent(self, tree, simulations):
+        store = tree.store
+        self.assertFalse(store.shared)
+        self.assertEqual(int(store.visits[0]), simulations)
+        children = store.children(0)
+        self.assertEqual(int(store.visits[children.start:children.stop].sum()), simulations)
+        self.assertTrue(np.all(store.virtual_loss[:len(store)] == 0))
+
+    def test_parallel_search(self):
+        tree = new_tree()
+        self.assertEqual(tree.parallel_search(40), 40)
+        self.assert_consistent(tree, 40)
+
+    def test_model(self):
+        tree = new_tree()
+        player, action = tree.model()
+        self.assertEqual(player, 1)
+        self.assertEqual(tree.simulation_count, 40)
+        self.assertEqual(tree.state.get_point(*action), 1)
+
+    def test_node_budget_shared_by_workers(self):
+        tree = new_tree()
+        tree.parallel_search(None, node_budget=50)
+        # 每个进程在检查预算前最多再扩展一个节点的全部子节点
+        self.assertLessEqual(len(tree.store), 1 + 50 + tree.WORKERS * 100)
+
+    def test_fallback_when_process_start_fails(self):
+        tree = new_tree()
+        with mock.patch.object(multiprocessing.Process, 'start', side_effect=OSError('no processes')), \
+                self.assertLogs('MCTS.GomokuArrayMCTS', 'ERROR'):
+            self.assertEqual(tree.parallel_search(40), 40)
+        self.assert_consistent(tree, 40)
+
+    def test_fallback_when_lock_fails(self):
+        tree = new_tree()
+        with mock.patch.object(multiprocessing, 'Lock', side_effect=OSError('no semaphores')), \
+                self.assertLogs('MCTS.GomokuArrayMCTS', 'ERROR'):
+            self.assertEqual(tree.parallel_search(40), 40)
+        self.assert_consistent(tree, 40)
+
+    def test_fallback_when_worker_exits(self):
+        tree = new_tree()
+        with mock.patch('MCTS.GomokuArrayMCTS.tree_search_worker', crash), \
+                self.assertLogs('MCTS.GomokuArrayMCTS', 'ERROR') as logs:
+            self.assertEqual(tree.parallel_search(40), 40)
+        self.assertIn('3', logs.output[0])
+        self.assert_consistent(tree, 40)
+
+    def test_fallback_when_shared_memory_fails(self):
+        tree = new_tree()
+        with mock.patch('MCTS.GomokuArrayMCTS.shared_memory.SharedMemory', side_effect=OSError('no space')), \
+                self.assertLogs('MCTS.GomokuArrayMCTS', 'ERROR'):
+            self.assertEqual(tree.parallel_search(40), 40)
+        self.assert_consistent(tree, 40)
@@ -0,0 +1,90 @@
+import random
+import numpy as np
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from gomoku.tests.helpers import play, GameClientMixin
+
+
+def new_tree(simulations=60):
+    random.seed(0)
+    game = play([(4, 4), (4, 5)], size=10)
+    tree = MCTSTree(MCTSNode(BitboardGame.from_game(game), move=game.last_move))
+    tree.ONLY_NEARBY = True
+    tree.SIMULATION_TIMES = simulations
+    tree.SIMULATION_DEPTH = 30
+    return tree
+
+
+class TreeReuseTest(SimpleTestCase):
+    def test_model_keeps_best_subtree(self):
+        tree = new_tree()
+        player, action = tree.model()
+        root = tree.root_node
+        self.assertEqual(root.move, (player, action))
+        self.assertIsNone(root.parent)
+        self.assertEqual(root.state.get_point(*action), player)
+        self.assertGreater(root.visits, 0)
+
+    def test_advance_reuses_child(self):
+        tree = new_tree()
+        tree.model()
+        child = max(tree.root_node.children, key=lambda node: node.visits)
+        action = child.move[1]
+        self.assertTrue(tree.advance(action, None))
+        self.assertIs(tree.root_node, child)
+        self.assertIsNone(child.parent)
+
+    def test_advance_without_child(self):
+        tree = new_tree()
+        tree.model()
+        state = tree.root_node.state.copy()
+        action = next(point for point in state.get_empty_points()
+                      if point not in [child.move[1] for child in tree.root_node.children])
+        state.step(action)
+        self.assertFalse(tree.advance(action, state))
+        self.assertIs(tree.root_node.state, state)
+        self.assertEqual(tree.root_node.children, [])
+
+    def test_reused_visits_count_towards_simulations(self):
+        tree = new_tree()
+        tree.model()
+        child = max(tree.root_node.children, key=lambda node: node.visits)
+        tree.advance(child.move[1], None)
+        reused = sum(node.visits for node in tree.root_node.children)
+        tree.model()
+        self.assertEqual(tree.simulation_count, max(tree.SIMULATION_TIMES - reused, 1))
+
+
+class TreeReuseViewTest(GameClientMixin, SimpleTestCase):
+    def assert_tree_matches_game(self):
+        state = self.state()
+        tree = state['tree']
+        self.assertIsNotNone(tree)
+        self.assertTrue(np.array_equal(tree.root_node.state.board, state['game'].board))
+
+    def test_tree_follows_moves(self):
+        self.configure(reuse_tree=True)
+        self.api('player_move', {'x': 4, 'y': 4})
+        self.assertIsNone(self.state()['tree'])
+        self.api('ai_move')
+        self.assert_tree_matches_game()
+        board = self.state()['game'].board
+        x, y = next((x, y) for x in range(10) for y in range(10) if board[x, y] == 0)
+        self.api('player_move', {'x': x, 'y': y})
+        self.assert_tree_matches_game()
+        self.api('ai_move')
+        self.assert_tree_matches_game()
+
+    def test_reuse_disabled(self):
+        self.configure(reuse_tree=False)
+        self.api('player_move', {'x': 4, 'y': 4})
+        self.api('ai_move')
+        self.assertIsNone(self.state()['tree'])
+
+    def test_init_discards_tree(self):
+        self.configure(reuse_tree=True)
+        self.api('player_move', {'x': 4, 'y': 4})
+        self.api('ai_move')
+        self.api('init')
+        self.assertIsNone(self.state()['tree'])
@@ -0,0 +1,62 @@
+import random
+from math import ceil
+from django.test import SimpleTestCase
+from MCTS.GomokuBitboard import BitboardGame
+from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from gomoku.tests.helpers import play
+
+
+def new_tree(moves):
+    random.seed(0)
+    game = play(moves, size=10)
+    tree = MCTSTree(MCTSNode(BitboardGame.from_game(game), move=game.last_move))
+    tree.PROGRESSIVE_WIDENING = True
+    tree.ONLY_NEARBY = True
+    tree.SIMULATION_DEPTH = 30
+    return tree
+
+
+class ProgressiveWideningTest(SimpleTestCase):
+    def test_expands_in_rank_order(self):
+        # 玩家1有四连, 成五的点排在最前
+        tree = new_tree([(4, 2), (0, 0), (4, 3), (0, 2), (4, 4), (0, 4), (4, 5), (9, 9)])
+        root = tree.root_node
+        first = root.expand_progressive(only_nearby=True)
+        self.assertIn(first.move[1], [(4, 1), (4, 6)])
+        self.assertEqual(len(root.children), 1)
+        second = root.expand_progressive(only_nearby=True)
+        self.assertIn(second.move[1], [(4, 1), (4, 6)])
+        self.assertNotEqual(first.move, second.move)
+
+    def test_runs_out_of_candidates(self):
+        tree = new_tree([(4, 4)])
+        root = tree.root_node
+        candidates = len(root.state.get_nearby_points(2))
+        for _ in range(candidates):
+            self.assertIsNotNone(root.expand_progressive(only_nearby=True))
+        self.assertIsNone(root.expand_progressive(only_nearby=True))
+        self.assertEqual(len({child.move for child in root.children}), candidates)
+
+    def test_widen_limit(self):
+        tree = new_tree([(4, 4)])
+        root = tree.root_node
+        tree.expansion(root)
+        self.assertEqual(len(root.children), 1)
+        # 访问次数为0时只允许1个子节点
+        self.assertIsNone(tree.widen(root))
+        root.visits = 4
+        # WIDENING_C * 4 ** 0.5 = 4
+        for _ in range(3):
+            self.assertIsNotNone(tree.widen(root))
+        self.assertIsNone(tree.widen(root))
+        self.assertEqual(len(root.children), 4)
+
+    def test_search(self):
+        tree = new_tree([(4, 4), (4, 5)])
+        tree.SIMULATION_TIMES = 100
+        tree.search(100)
+        root = tree.root_node
+        self.assertEqual(root.visits, 100)
+        limit = ceil(tree.WIDENING_C * root.visits ** tree.WIDENING_ALPHA)
+        self.assertLessEqual(len(root.children), limit)
+        self.assertEqual(len(root.children) + len(root.untried_actions), len(root.state.get_nearby_points(2)))
@@ -1,9 +1,16 @@
 from django.urls import path
-from gomoku.views import InitGame, AIMove, PlayerMove, Settings
+from gomoku.views import (InitGame, AIMove, PlayerMove, Settings, AIMoveAsync, AIJobStatus, AIJobStream, AIJobCancel,
+                          Metrics, AnalyzePositions)
 
 urlpatterns = [
     path("init", InitGame.as_view()),
     path("player_move", PlayerMove.as_view()),
     path("ai_move", AIMove.as_view()),
     path("settings", Settings.as_view()),
+    path("ai_move_async", AIMoveAsync.as_view()),
+    path("ai_job", AIJobStatus.as_view()),
+    path("ai_job_stream", AIJobStream.as_view()),
+    path("ai_job_cancel", AIJobCancel.as_view()),
+    path("metrics", Metrics.as_view()),
+    path("analyze", AnalyzePositions.as_view()),
 ]
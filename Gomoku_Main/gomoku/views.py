@@ -1,23 +1,228 @@
 # views.py
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views import View
+from django.conf import settings
+from asgiref.sync import sync_to_async
+import os
 import json
 import time
+import uuid
+import asyncio
+import logging
+import functools
 from MCTS.GomokuEnv import GomokuGame
-from MCTS.GomokuMTCS import MCTSNode, MCTSTree
+from MCTS.GomokuAnalysis import analyze_batch
+from gomoku.store import GameStore, StaleStateError
+from gomoku.engine import new_search_state, choose_move, apply_ai_move
+from gomoku.jobs import AIJobManager
+from gomoku.ponder import Ponderer
+from gomoku.metrics import engine_metrics
+from gomoku.recorder import GameRecorder
 
-# 全局变量存储游戏状态
-state = {
-    'game': GomokuGame(),
+logger = logging.getLogger(__name__)
+
+# 玩家思考期间在后台继续搜索保留的搜索树, 修改对局状态前需要先停止
+ponderer = Ponderer()
+
+# 按对局编号保存每局游戏的状态, 对局编号通过cookie或game_id参数传递. 对局被删除或淘汰时停止其后台思考
+game_store = GameStore(**getattr(settings, 'GOMOKU_GAME_STORE', {}), on_evict=ponderer.stop)
+GAME_ID_COOKIE = 'gomoku_game_id'
+
+# 异步计算AI落子的任务, 见AIMoveAsync
+job_manager = AIJobManager(**getattr(settings, 'GOMOKU_AI_JOBS', {}))
+STREAM_INTERVAL = 0.2  # 推送任务进度的间隔(秒)
+
+# 对局和落子记录先缓冲在内存中, 由后台线程批量写入数据库
+recorder = GameRecorder(**getattr(settings, 'GOMOKU_RECORDER', {}))
+# 对局状态中不属于设置的键, 记录对局时不保存
+RUNTIME_KEYS = ('tree', 'job_id', 'stats', 'record_id', 'message')
+
+# 对局设置中搜索参数的上限, 见Settings. max_workers为None时为CPU核数, max_time_budget和max_ponder_time的单位为秒
+SEARCH_LIMITS = {'max_workers': None, 'max_simulations': 100000, 'max_simulation_depth': 1000,
+                 'max_time_budget': 60, 'max_node_budget': 1000000, 'max_batch_size': 256,
+                 'max_rollout_vcf_nodes': 10000, 'max_ponder_time': 60,
+                 **getattr(settings, 'GOMOKU_SEARCH_LIMITS', {})}
+MAX_WORKERS = SEARCH_LIMITS['max_workers'] or os.cpu_count() or 1
+# 对局设置接口中可以设置的项: 省略或为null时的值、类型、SEARCH_LIMITS中的上限
+GAME_SETTINGS = {
+    'simulation_times': (1000, int, 'max_simulations'),
+    'simulation_depth': (500, int, 'max_simulation_depth'),
+    'only_nearby': (True, bool, None),
+    'use_bitboard': (True, bool, None),
+    'reuse_tree': (True, bool, None),
+    'workers': (1, int, None),
+    'tree_parallel': (False, bool, None),
+    'compact_tree': (False, bool, None),
+    'transposition': (True, bool, None),
+    'progressive_widening': (False, bool, None),
+    'rave': (False, bool, None),
+    'opening_book': (True, bool, None),
+    'threat_search': (True, bool, None),
+    'rollout_vcf_nodes': (0, int, 'max_rollout_vcf_nodes'),
+    'rollout_cutoff': (None, int, 'max_simulation_depth'),
+    'batch_size': (1, int, 'max_batch_size'),
+    'time_budget': (None, float, None),  # 毫秒
+    'node_budget': (None, int, 'max_node_budget'),
+    'ponder': (False, bool, None),
+    'ponder_time': (30, float, 'max_ponder_time'),
+    'instrument': (False, bool, None),
+    'search_cache': (True, bool, None),
+    'player_first': (True, bool, None),
+}
+
+# 批量分析: 进程数、每次请求的局面数量上限、每个局面的预算和搜索参数的上限、每次请求的总预算上限
+ANALYSIS = {'workers': 2, 'max_positions': 10000, 'max_simulations': 20000, 'max_time_budget': 10,
+            'max_node_budget': 200000, 'max_simulation_depth': 1000, 'max_ucb_c': 10,
+            'max_total_simulations': 1000000, 'max_total_time': 600,
+            **getattr(settings, 'GOMOKU_ANALYSIS', {})}
+# 批量分析请求中可以设置的搜索参数: 对应的搜索树属性、类型、ANALYSIS中的上限
+ANALYSIS_SETTINGS = {
+    'simulation_times': ('SIMULATION_TIMES', int, 'max_simulations'),
+    'simulation_depth': ('SIMULATION_DEPTH', int, 'max_simulation_depth'),
+    'only_nearby': ('ONLY_NEARBY', bool, None),
+    'transposition': ('TRANSPOSITION', bool, None),
+    'progressive_widening': ('PROGRESSIVE_WIDENING', bool, None),
+    'rave': ('RAVE', bool, None),
+    'rollout_cutoff': ('ROLLOUT_CUTOFF', int, 'max_simulation_depth'),
+    'ucb_c': ('UCB_C', float, 'max_ucb_c'),
+}
+# 每个局面可以单独设置的预算: 类型、ANALYSIS中的上限
+ANALYSIS_BUDGETS = {
+    'simulations': (int, 'max_simulations'),
+    'time_budget': (float, 'max_time_budget'),
+    'node_budget': (int, 'max_node_budget'),
+}
+
+# 新对局的默认状态
+DEFAULT_STATE = {
     'simulation_times': 500,  # 不使用邻近扩展节点的10X10的棋盘需要大约500的模拟次数才能做到初具智能
     'simulation_depth': 1000,
     'only_nearby': True,
+    'use_bitboard': True,  # 搜索时使用位棋盘, 避免每次扩展和模拟都深拷贝NumPy棋盘
+    'reuse_tree': True,  # 在AI和玩家的落子之间保留搜索树, 复用对手可能应对的统计
+    'workers': 1,  # 并行搜索的进程数, 1为单进程搜索
+    'tree_parallel': False,  # 多进程时使用共享同一棵树的树并行, 否则为根并行
+    'compact_tree': False,  # 使用数组存储节点的ArrayMCTSTree代替MCTSNode组成的树
+    'transposition': True,  # MCTSNode组成的树使用置换表共享相同局面的统计
+    'progressive_widening': False,  # MCTSNode组成的树按规则优先级逐个添加子节点
+    'rave': False,  # MCTSNode组成的树在选择时混合AMAF统计
+    'opening_book': True,  # 开局阶段优先使用开局库中的落子
+    'threat_search': True,  # MCTS之前先用VCF/VCT搜索必胜和必须防守的落子
+    'threat_search_time': 0.5,  # 威胁空间搜索的时间上限(秒)
+    'rollout_vcf_nodes': 0,  # 大于0时模拟中接近终局的局面用VCF判断胜负
+    'rollout_cutoff': None,  # 模拟最多进行的步数, 未分出胜负时用静态评估打分, 0为只用静态评估
+    'batch_size': 1,  # 大于1时使用ArrayMCTSTree, 每次选出多个叶子节点用NumPy一起模拟
+    'time_budget': None,  # 每步思考时间(秒), 设置后不再受simulation_times限制
+    'node_budget': None,  # 每步搜索最多新建的节点数量
+    'ponder': False,  # AI落子后在玩家思考期间继续搜索保留的搜索树, 需要reuse_tree
+    'ponder_time': 30,  # 每次后台思考的时间上限(秒)
+    'instrument': False,  # 记录每次搜索各阶段的耗时等统计, 随AI的落子返回
+    'search_cache': True,  # 使用跨对局的搜索结果缓存, 见engine.search_cache
+    'tree': None,
+    'job_id': None,  # 正在进行的异步AI任务
+    'stats': None,  # 上一次AI落子的搜索统计
+    'record_id': None,  # 数据库中本局的记录编号, 第一步落子时创建
     'player_first': True,
     'message': '',
 }
 
 
-def get_game_state():
+def new_state():
+    state = dict(DEFAULT_STATE)
+    state['game'] = GomokuGame()
+    return state
+
+
+def request_game_id(request):
+    """请求中的对局编号(game_id参数或cookie), 没有时生成新的编号"""
+    game_id = getattr(request, 'game_id', None) or request.GET.get('game_id')
+    if game_id is None and request.method == 'POST':
+        try:
+            game_id = json.loads(request.body).get('game_id')
+        except (ValueError, AttributeError):
+            game_id = None
+    if game_id is None:
+        game_id = request.COOKIES.get(GAME_ID_COOKIE)
+    return game_id or uuid.uuid4().hex
+
+
+def game_locked(view_method):
+    """
+    视图方法在对局锁中执行, 同一对局的并发请求(例如重复点击、轮询任务与玩家落子)依次读取、修改和保存状态
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        request.game_id = request_game_id(request)
+        with game_store.lock(request.game_id):
+            return view_method(self, request, *args, **kwargs)
+    return wrapper
+
+
+def load_state(request):
+    """
+    根据请求中的对局编号取出对局状态, 对局已被淘汰时新建对局. 需要在game_locked的视图中调用
+
+    返回:
+        (game_id, state)
+    """
+    game_id = request_game_id(request)
+    state = game_store.get(game_id)
+    if state is None:
+        state = new_state()
+    return game_id, state
+
+
+def save_state(game_id, state, res):
+    """保存对局状态, 并在响应中返回对局编号. 状态已被其他进程的请求修改时不保存, 返回409"""
+    try:
+        game_store.save(game_id, state)
+    except StaleStateError:
+        logger.warning("对局%s的状态已被其他请求修改, 放弃本次修改", game_id)
+        return JsonResponse({'game_id': game_id, 'error': '对局状态已被其他请求修改, 请重新获取'}, status=409)
+    res['game_id'] = game_id
+    response = JsonResponse(res)
+    response.set_cookie(GAME_ID_COOKIE, game_id, max_age=game_store.ttl, samesite='Lax')
+    return response
+
+
+def start_pondering(game_id, state):
+    """AI落子后开始后台思考"""
+    if state['ponder'] and state['reuse_tree'] and state['tree'] is not None and not state['game'].game_over:
+        ponderer.start(game_id, state['tree'], state['ponder_time'], state['node_budget'])
+
+
+def record_move(game_id, state, source, think_time=None, simulations=None, stats=None):
+    """记录刚刚执行的落子, 本局的第一步落子时创建对局记录, 对局结束时记录胜者"""
+    game = state['game']
+    if state['record_id'] is None:
+        state['record_id'] = uuid.uuid4().hex
+        game_settings = {key: value for key, value in state.items() if key in DEFAULT_STATE and key not in RUNTIME_KEYS}
+        recorder.start_game(state['record_id'], game_id, game.size, state['player_first'], game_settings)
+    player, action = game.last_move
+    ply = int((game.board != 0).sum())
+    recorder.record_move(state['record_id'], ply, player, action, source, think_time, simulations, stats)
+    if game.game_over:
+        recorder.finish_game(state['record_id'], game.winner)
+
+
+def checked_value(name, value, kind, maximum=None):
+    """把请求中的参数转换为kind类型, 数值不能为负数且不超过maximum, 类型不对时抛出ValueError"""
+    if kind is bool:
+        if not isinstance(value, bool):
+            raise ValueError(f'{name}必须是true或false')
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f'{name}必须是非负数')
+    value = kind(value)
+    return min(value, kind(maximum)) if maximum is not None else value
+
+
+def analysis_value(name, value, kind, limit=None):
+    """批量分析请求中的参数, 上限为ANALYSIS[limit], 见checked_value"""
+    return checked_value(name, value, kind, ANALYSIS[limit] if limit is not None else None)
+
+
+def get_game_state(state):
     player, (x, y) = state['game'].last_move
     if x is not None and y is not None:
         x = int(x)
@@ -30,32 +235,42 @@ def get_game_state():
         'game_over': state['game'].game_over,
         'winner': state['game'].winner,
         'message': state['message'],
+        'stats': state['stats'],
     }
     return res
 
 
 class InitGame(View):
+    @game_locked
     def get(self, request):
-        """初始化游戏状态"""
+        """初始化游戏状态, 保留该对局的设置"""
+        game_id, state = load_state(request)
+        ponderer.stop(game_id)
         state['game'] = GomokuGame()
+        state['tree'] = None
+        state['stats'] = None
+        state['record_id'] = None
         state['message'] = "游戏已初始化，人类玩家(1)的回合"
         if not state['player_first']:
             state['game'].current_player = 2
             state['message'] = "游戏已初始化，电脑玩家(2)的回合"
-        res = get_game_state()
-        return JsonResponse(res)
+        res = get_game_state(state)
+        return save_state(game_id, state, res)
 
 
 class PlayerMove(View):
+    @game_locked
     def post(self, request):
         """处理玩家移动"""
+        game_id, state = load_state(request)
+        pondered = ponderer.stop(game_id)
         game = state['game']
 
         # 检查游戏是否结束
         if game.winner is not None:
             state['message'] = '游戏已结束，玩家 {} 获胜!'.format(game.winner)
-            res = get_game_state()
-            return JsonResponse(res)
+            res = get_game_state(state)
+            return save_state(game_id, state, res)
 
         # 处理人类玩家移动
         if game.current_player == 1:
@@ -71,81 +286,245 @@ class PlayerMove(View):
                 # 验证输入是否有效
                 if not game.check_boarder((x, y)):
                     state['message'] = '坐标超出范围'
-                    res = get_game_state()
-                    return JsonResponse(res)
+                    res = get_game_state(state)
+                    return save_state(game_id, state, res)
 
                 if game.board[x][y] != 0:
                     state['message'] = '该位置已有棋子'
-                    res = get_game_state()
-                    return JsonResponse(res)
+                    res = get_game_state(state)
+                    return save_state(game_id, state, res)
 
                 # 执行人类玩家的移动
                 human_action = (x, y)
                 game.step(human_action)
+                record_move(game_id, state, 'human')
                 state['message'] = "人类玩家落子于: ({}, {})".format(x, y)
+                if pondered > 0:
+                    state['message'] += "，AI后台思考{}次".format(pondered)
+                # 将保留的搜索树推进到玩家落子后的局面
+                if state['tree'] is not None:
+                    state['tree'].advance(human_action, new_search_state(state, game))
 
                 # 检查游戏是否结束
                 if game.winner is not None:
                     state['message'] = "游戏结束! 玩家 {} 获胜!".format(game.winner)
-                    res = get_game_state()
-                    return JsonResponse(res)
+                    res = get_game_state(state)
+                    return save_state(game_id, state, res)
 
-                res = get_game_state()
-                return JsonResponse(res)
+                res = get_game_state(state)
+                return save_state(game_id, state, res)
 
-            except Exception as e:
-                print(e)
+            except Exception:
+                logger.exception("处理玩家落子失败")
 
 
 class AIMove(View):
+    @game_locked
     def get(self, request):
         """获取AI移动"""
+        game_id, state = load_state(request)
         game = state['game']
 
         if game.current_player == 2 and game.winner is None:
+            ponderer.stop(game_id)
             try:
                 start_time = time.time()
-                # 创建MCTS树
-                root_node = MCTSNode(game.copy(), move=game.last_move)
-                mcts = MCTSTree(root_node)
-                mcts.SIMULATION_TIMES = state['simulation_times']
-                mcts.SIMULATION_DEPTH = state['simulation_depth']
-                mcts.ONLY_NEARBY = state['only_nearby']
-
-                # 让MCTS选择最佳移动
-                ai_move = mcts.model(print_simulation_result=False)[1]  # 获取移动坐标
-
-                end_time = time.time()  # 记录结束时间
-                think_time = end_time - start_time  # 计算执行时间（秒）
+                ai_move, mcts, note = choose_move(state)
+                think_time = time.time() - start_time  # 计算执行时间（秒）
 
                 # 执行AI的移动
-                game.step(ai_move)
-                state['message'] = f"AI玩家落子于: ({ai_move[0]}, {ai_move[1]})，思考耗时{think_time:.2f}"
+                source = apply_ai_move(state, ai_move, mcts, note, think_time)
+                record_move(game_id, state, source, think_time, mcts.simulation_count if mcts is not None else None,
+                            state['stats'])
+                start_pondering(game_id, state)
+                res = get_game_state(state)
+                return save_state(game_id, state, res)
 
-                # 检查游戏是否结束
-                if game.winner is not None:
-                    state['message'] = "游戏结束! 玩家 {} 获胜!".format(game.winner)
-                    res = get_game_state()
-                    return JsonResponse(res)
+            except Exception:
+                logger.exception("计算AI落子失败")
 
-                res = get_game_state()
-                return JsonResponse(res)
-
-            except Exception as e:
-                print(e)
+        # 不是AI的回合(例如重复的请求在对局锁中等到前一个请求落子之后)时返回当前对局
+        res = get_game_state(state)
+        return save_state(game_id, state, res)
 
 
 class Settings(View):
+    @game_locked
     def post(self, request):
+        """
+        更新对局的设置, 未给出的项使用GAME_SETTINGS中的值. 类型不对或为负数时返回400,
+        超过SEARCH_LIMITS中上限的数值按上限设置
+        """
         try:
             data = json.loads(request.body)
-            state['simulation_times'] = data.get('simulation_times', 1000)
-            state['simulation_depth'] = data.get('simulation_depth', 500)
-            state['only_nearby'] = data.get('only_nearby', True)
-            state['player_first'] = data.get('player_first', True)
+            if not isinstance(data, dict):
+                raise ValueError('请求体必须是对象')
+            values = {}
+            for key, (default, kind, limit) in GAME_SETTINGS.items():
+                value = data.get(key)
+                values[key] = default if value is None else checked_value(
+                    key, value, kind, SEARCH_LIMITS[limit] if limit is not None else None)
+        except (ValueError, TypeError) as e:
+            return JsonResponse({'error': f'请求格式错误: {e}'}, status=400)
+        values['workers'] = min(max(values['workers'], 1), MAX_WORKERS)
+        values['batch_size'] = max(values['batch_size'], 1)
+        # 前端传入的时间预算单位为毫秒, 0表示不限制
+        if values['time_budget']:
+            values['time_budget'] = min(values['time_budget'] / 1000, SEARCH_LIMITS['max_time_budget'])
+        else:
+            values['time_budget'] = None
+        values['node_budget'] = values['node_budget'] or None
+
+        game_id, state = load_state(request)
+        ponderer.stop(game_id)
+        state.update(values)
+        state['tree'] = None
+        res = {'status': True}
+        return save_state(game_id, state, res)
 
-            res = {'status': True}
-            return JsonResponse(res)
-        except Exception as e:
-            print(e)
 
+def get_job_state(job_id):
+    """返回任务的状态和进度, 任务完成时执行AI的落子(只执行一次)并附带对局状态"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return {'job_id': job_id, 'status': 'missing'}
+    status = job.status
+    res = {'job_id': job_id, 'game_id': job.game_id, 'status': status, 'progress': dict(job.progress)}
+    if status == 'failed':
+        res['error'] = str(job.future.exception())
+    if status != 'done':
+        return res
+    # 在对局锁中检查和落子, 保证只落子一次
+    with game_store.lock(job.game_id):
+        state = game_store.get(job.game_id)
+        if state is None:
+            return res
+        game = state['game']
+        if not job.applied and game.hash == job.game_hash and game.last_move == job.last_move:
+            ai_move, note, think_time, stats = job.future.result()
+            source = apply_ai_move(state, ai_move, None, note, think_time, stats)
+            record_move(job.game_id, state, source, think_time, job.progress.get('simulations'), stats)
+            state['job_id'] = None
+            try:
+                game_store.save(job.game_id, state)
+            except StaleStateError:
+                logger.warning("对局%s的状态已被其他请求修改, 放弃任务%s的落子", job.game_id, job_id)
+                job.applied = True
+                return res
+            start_pondering(job.game_id, state)
+        job.applied = True
+    res.update(get_game_state(state))
+    return res
+
+
+class AIMoveAsync(View):
+    @game_locked
+    def get(self, request):
+        """
+        提交计算AI落子的任务, 返回任务编号, 之后通过AIJobStatus或AIJobStream查询进度和结果
+        任务中的搜索始终是单进程的(忽略workers和tree_parallel设置), 见jobs.run_ai_job
+        """
+        game_id, state = load_state(request)
+        game = state['game']
+        if game.current_player != 2 or game.winner is not None:
+            res = get_game_state(state)
+            res['status'] = 'rejected'
+            return save_state(game_id, state, res)
+
+        ponderer.stop(game_id)
+        # 同一局已有未完成的任务时直接返回该任务
+        job = job_manager.get(state['job_id']) if state['job_id'] else None
+        if job is None or job.status not in ('pending', 'running'):
+            state['job_id'] = job_manager.submit(game_id, state)
+            state['message'] = "AI玩家思考中"
+        res = get_game_state(state)
+        res.update({'job_id': state['job_id'], 'status': 'pending'})
+        return save_state(game_id, state, res)
+
+
+class AIJobStatus(View):
+    def get(self, request):
+        """查询任务的状态、进度(已完成的模拟次数、当前最优落子、访问次数分布), 任务完成时返回落子后的对局"""
+        return JsonResponse(get_job_state(request.GET.get('job_id')))
+
+
+class AIJobStream(View):
+    async def get(self, request):
+        """以Server-Sent Events推送任务进度, 任务结束(完成、失败或取消)后关闭"""
+        job_id = request.GET.get('job_id')
+
+        async def events():
+            while True:
+                res = await sync_to_async(get_job_state)(job_id)
+                yield f"data: {json.dumps(res, ensure_ascii=False)}\n\n"
+                if res['status'] not in ('pending', 'running'):
+                    break
+                await asyncio.sleep(STREAM_INTERVAL)
+
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class AIJobCancel(View):
+    def post(self, request):
+        """取消任务, 已经开始的搜索会在下一次报告进度时停止, 不会落子"""
+        data = json.loads(request.body)
+        job_id = data.get('job_id')
+        res = {'job_id': job_id, 'status': 'cancelled' if job_manager.cancel(job_id) else 'missing'}
+        return JsonResponse(res)
+
+
+class Metrics(View):
+    def get(self, request):
+        """本进程所有AI落子的累计统计: 落子次数和来源、思考时间, 以及开启统计的搜索的各阶段耗时等"""
+        return JsonResponse(engine_metrics.to_dict())
+
+
+class AnalyzePositions(View):
+    def post(self, request):
+        """
+        批量分析局面, 与对局状态无关. 请求体为
+        {"positions": [{"id": ..., "board": [[...]], "current_player": 1, "simulations": 500, "time_budget": 1}],
+         "settings": {"simulation_times": 500, ...}, "top_k": 5}
+        各局面在进程池中并行分析, 按完成的先后以NDJSON逐行返回最佳落子、胜率和访问次数最多的top_k个落子
+        """
+        try:
+            data = json.loads(request.body)
+            positions = data['positions']
+            if not isinstance(positions, list) or not all(isinstance(position, dict) for position in positions):
+                raise ValueError('positions必须是局面对象的列表')
+            if len(positions) > ANALYSIS['max_positions']:
+                raise ValueError(f"局面数量不能超过{ANALYSIS['max_positions']}")
+            request_settings = data.get('settings', {})
+            if not isinstance(request_settings, dict):
+                raise ValueError('settings必须是对象')
+            search_settings = {'SIMULATION_TIMES': 500}
+            for key, (attribute, kind, limit) in ANALYSIS_SETTINGS.items():
+                if request_settings.get(key) is not None:
+                    search_settings[attribute] = analysis_value(key, request_settings[key], kind, limit)
+            # 每个局面的预算不超过上限, 所有局面的模拟次数(没有时间预算的)和时间预算之和不超过总预算
+            total_simulations = total_time = 0
+            for position in positions:
+                if not isinstance(position.get('board'), list):
+                    raise ValueError('每个局面的board必须是二维列表')
+                for key, (kind, limit) in ANALYSIS_BUDGETS.items():
+                    if position.get(key) is not None:
+                        position[key] = analysis_value(key, position[key], kind, limit)
+                if position.get('time_budget') is not None:
+                    total_time += position['time_budget']
+                else:
+                    total_simulations += position.get('simulations') or search_settings['SIMULATION_TIMES']
+            if total_simulations > ANALYSIS['max_total_simulations']:
+                raise ValueError(f"模拟次数之和不能超过{ANALYSIS['max_total_simulations']}")
+            if total_time > ANALYSIS['max_total_time']:
+                raise ValueError(f"时间预算之和不能超过{ANALYSIS['max_total_time']}秒")
+            top_k = max(analysis_value('top_k', data.get('top_k', 5), int), 1)
+        except (ValueError, KeyError, TypeError) as e:
+            return JsonResponse({'error': f'请求格式错误: {e}'}, status=400)
+
+        results = analyze_batch(positions, search_settings, top_k, ANALYSIS['workers'])
+        lines = (json.dumps(result, ensure_ascii=False) + '\n' for result in results)
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-cache'
+        return response